@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from paths import cache_path
+
+
+def end_time(conversation: Dict) -> datetime:
+    return datetime.fromisoformat(conversation['endDatetime'])
+
+
+class AnalysisCheckpoint:
+    def __init__(self, api, path: Optional[Path] = None, open_timeout: float = 7 * 24 * 3600.0):
+        """
+        How far the SSAgent batch analysis got, kept on disk between runs.
+
+        The checkpoint is keyed on the backend's conversation id, which the
+        backend assigns in increasing order when a conversation arrives, not
+        on a bench clock: conversations can reach the backend late (spooled
+        while offline) and benches may disagree about the time. last_id is
+        the highest id a run has looked at. Conversations up to it that were
+        still open, or whose analysis failed, are kept in `open` and looked
+        at again by every run, so a run only fetches from the lowest open id
+        on. A conversation that stays open longer than open_timeout (on this
+        machine's clock) is given up on, so an abandoned one doesn't keep
+        the window open forever.
+
+        Args:
+            api: APIClient for the backend, one checkpoint is kept per backend URL
+            path: Checkpoint file (defaults to a file per backend in the bench cache)
+            open_timeout: Seconds an open conversation is looked at again before it is given up on
+        """
+        if path is None:
+            digest = hashlib.sha1(api.url("conversations").encode("utf-8")).hexdigest()[:8]
+            path = cache_path("analysis") / f"ss_checkpoint-{digest}.json"
+        self.path = Path(path)
+        self.open_timeout = open_timeout
+        self.last_id = 0
+        self.open: Dict[int, float] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        self.last_id = int(data.get("last_id", 0))
+        self.open = {int(conversation_id): since for conversation_id, since in data.get("open", {}).items()}
+
+    def save(self) -> None:
+        data = {"last_id": self.last_id, "open": {str(conversation_id): since for conversation_id, since in self.open.items()}}
+        temp = self.path.with_suffix(".tmp")
+        temp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(str(temp), str(self.path))
+
+    @property
+    def floor(self) -> int:
+        """Every conversation the next run has to look at has an id above this one."""
+        return min(self.open) - 1 if self.open else self.last_id
+
+    def wants(self, conversation: Dict) -> bool:
+        """True for a conversation no run has settled yet."""
+        return conversation['id'] > self.last_id or conversation['id'] in self.open
+
+    def hold(self, conversation: Dict) -> None:
+        """Look at a conversation again next run: it is still open or its analysis failed."""
+        self.open.setdefault(conversation['id'], time.time())
+
+    def settle(self, conversation: Dict) -> None:
+        """The conversation is analyzed, or doesn't need to be."""
+        self.open.pop(conversation['id'], None)
+
+    def finish(self, last_id: int) -> None:
+        """Record the highest id looked at, give up on long-open conversations and save."""
+        self.last_id = max(self.last_id, last_id)
+        expired = [conversation_id for conversation_id, since in self.open.items()
+                   if time.time() - since > self.open_timeout]
+        for conversation_id in expired:
+            print(f"Conversation {conversation_id} is still open after {self.open_timeout / 3600:.0f}h, "
+                  f"no longer looking at it")
+            del self.open[conversation_id]
+        self.save()
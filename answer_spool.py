@@ -0,0 +1,317 @@
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from paths import cache_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    local_id TEXT PRIMARY KEY,
+    remote_id INTEGER,
+    bench_id INTEGER,
+    start TEXT,
+    end TEXT,
+    end_sent INTEGER NOT NULL DEFAULT 0,
+    reserved INTEGER NOT NULL DEFAULT 0,
+    start_sent INTEGER NOT NULL DEFAULT 1,
+    rejected INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS answers (
+    key TEXT PRIMARY KEY,
+    local_id TEXT NOT NULL REFERENCES conversations(local_id),
+    question_id INTEGER NOT NULL,
+    response TEXT NOT NULL,  -- JSON
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_pending ON answers(status, created);
+"""
+
+
+class PermanentError(Exception):
+    """The backend rejected a request; retrying the same request cannot succeed."""
+
+
+class AnswerSpool:
+    def __init__(self, path: Optional[Path] = None, batch_size: int = 20, retry_delay: float = 2.0,
+                 max_retry_delay: float = 300.0):
+        """
+        Durable outbox for conversations and answers, drained to the backend in the background.
+
+        Conversations and answers are written to a local SQLite database (WAL
+        mode) and the caller returns immediately. A drain thread creates the
+        conversation on the backend, posts its answers in order and ends it.
+        Whatever is not sent survives restarts and network outages and is
+        replayed on the next start. Every answer has an idempotency key, so
+        spooling it twice stores it once locally, and the key is sent along
+        so the backend can drop a replay of a POST that did arrive.
+
+        Args:
+            path: SQLite database file (defaults to answer_spool.sqlite3 in the bench cache)
+            batch_size: Answers sent per drain pass before checking for new work
+            retry_delay: First delay after a failed pass; doubles per failure, with jitter
+            max_retry_delay: Upper bound of the delay between failed passes
+        """
+        self.path = Path(path) if path is not None else cache_path("spool") / "answer_spool.sqlite3"
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(conversations)")]
+        for column, default in (("reserved", 0), ("rejected", 0), ("start_sent", 1)):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE conversations ADD COLUMN {column} INTEGER NOT NULL DEFAULT {default}")
+
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.backend = None
+        self.failures = 0
+
+    def _execute(self, sql: str, args: tuple = ()):
+        with self._lock:
+            return self._db.execute(sql, args).fetchall()
+
+    # Writing, called from the conversation
+
+    def start_conversation(self, bench_id: int, start: str) -> str:
+        """Record a new conversation and return its local id."""
+        local_id = uuid.uuid4().hex
+        self._execute("INSERT INTO conversations (local_id, bench_id, start, created) VALUES (?, ?, ?, ?)",
+                      (local_id, bench_id, start, time.time()))
+        self.notify()
+        return local_id
+
+    def reserve_conversation(self, bench_id: int, start: str) -> str:
+        """
+        Create a conversation ahead of time, so the next visitor doesn't wait for it.
+
+        The reservation is created on the backend like any other conversation
+        and kept (also across restarts) until claim_reservation() hands it out.
+        """
+        local_id = uuid.uuid4().hex
+        self._execute("INSERT INTO conversations (local_id, bench_id, start, reserved, created) "
+                      "VALUES (?, ?, ?, 1, ?)", (local_id, bench_id, start, time.time()))
+        self.notify()
+        return local_id
+
+    def has_reservation(self, bench_id: int) -> bool:
+        return bool(self._execute("SELECT 1 FROM conversations WHERE reserved = 1 AND rejected = 0 AND bench_id = ?", (bench_id,)))
+
+    def claim_reservation(self, bench_id: int, start: str) -> Optional[str]:
+        """
+        Take a reserved conversation for a visitor who just started.
+
+        The real start time replaces the reservation time and is sent to the
+        backend by the drain thread, so the backend never keeps the time the
+        conversation was reserved as its start.
+
+        Returns:
+            str: Its local id, or None when there is no reservation
+        """
+        with self._lock:
+            row = self._db.execute("SELECT local_id FROM conversations WHERE reserved = 1 AND rejected = 0 AND bench_id = ? "
+                                   "ORDER BY created LIMIT 1", (bench_id,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE conversations SET reserved = 0, start = ?, start_sent = 0 WHERE local_id = ?",
+                             (start, row["local_id"]))
+        self.notify()
+        return row["local_id"]
+
+    @staticmethod
+    def idempotency_key(local_id: str, question_id: int, response: str) -> str:
+        return hashlib.sha256(f"{local_id}\n{question_id}\n{response}".encode("utf-8")).hexdigest()[:32]
+
+    def add_answer(self, local_id: str, question_id: int, response) -> str:
+        """
+        Spool an answer; the same answer for the same conversation is stored once.
+
+        Args:
+            local_id: Conversation from start_conversation
+            question_id: Question the answer belongs to
+            response: Anything JSON serializable, sent to the backend as is
+
+        Returns:
+            str: The answer's idempotency key
+        """
+        encoded = json.dumps(response, ensure_ascii=False)
+        key = self.idempotency_key(local_id, question_id, encoded)
+        self._execute("INSERT OR IGNORE INTO answers (key, local_id, question_id, response, created) "
+                      "VALUES (?, ?, ?, ?, ?)", (key, local_id, question_id, encoded, time.time()))
+        self.notify()
+        return key
+
+    def end_conversation(self, local_id: str, end: str) -> None:
+        """Record the end time; the conversation is closed on the backend after its answers."""
+        self._execute("UPDATE conversations SET end = ? WHERE local_id = ?", (end, local_id))
+        self.notify()
+
+    def remote_id(self, local_id: str) -> Optional[int]:
+        rows = self._execute("SELECT remote_id FROM conversations WHERE local_id = ?", (local_id,))
+        return rows[0]["remote_id"] if rows else None
+
+    def pending(self) -> int:
+        """Number of answers and conversation updates not yet on the backend."""
+        # Same selection as drain_once(): answers without a live conversation are not work
+        answers = self._execute(
+            "SELECT COUNT(*) FROM answers JOIN conversations USING (local_id) "
+            "WHERE answers.status = 'pending' AND conversations.remote_id IS NOT NULL AND conversations.rejected = 0"
+        )[0][0]
+        conversations = self._execute(
+            "SELECT COUNT(*) FROM conversations WHERE rejected = 0 "
+            "AND (remote_id IS NULL OR (end IS NULL AND start_sent = 0) OR (end IS NOT NULL AND end_sent = 0))"
+        )[0][0]
+        return answers + conversations
+
+    def _reject_conversation(self, row, action: str, error: Exception) -> None:
+        print(f"Backend rejected {action} of conversation {row['local_id']}, dropping it and its answers: {error}")
+        self._execute("UPDATE conversations SET rejected = 1 WHERE local_id = ?", (row["local_id"],))
+        self._execute("UPDATE answers SET status = 'rejected' WHERE local_id = ? AND status = 'pending'",
+                      (row["local_id"],))
+
+    # Draining, in the background thread
+
+    def drain_once(self) -> int:
+        """
+        Send one batch: create conversations, update claimed start times, post answers,
+        then end conversations.
+
+        Returns:
+            int: Number of requests that succeeded
+
+        Raises:
+            Exception: The first failure that is worth retrying later
+        """
+        sent = 0
+        for row in self._execute("SELECT * FROM conversations WHERE remote_id IS NULL AND rejected = 0 "
+                                 "ORDER BY created"):
+            try:
+                remote_id = self.backend.post_conversation(dict(row))
+            except PermanentError as e:
+                # A rejected conversation must not hold up the ones after it
+                self._reject_conversation(row, "creation", e)
+                continue
+            self._execute("UPDATE conversations SET remote_id = ? WHERE local_id = ?", (remote_id, row["local_id"]))
+            # A reservation claimed while it was being created still needs its new start time sent
+            self._execute("UPDATE conversations SET start_sent = 1 WHERE local_id = ? AND start = ?",
+                          (row["local_id"], row["start"]))
+            sent += 1
+
+        # Claimed reservations of running conversations; ending one sends its start time too
+        for row in self._execute("SELECT * FROM conversations WHERE remote_id IS NOT NULL AND end IS NULL "
+                                 "AND start_sent = 0 AND rejected = 0 ORDER BY created"):
+            try:
+                self.backend.put_conversation(row["remote_id"], dict(row))
+            except PermanentError as e:
+                self._reject_conversation(row, "start time update", e)
+                continue
+            self._execute("UPDATE conversations SET start_sent = 1 WHERE local_id = ? AND start = ?",
+                          (row["local_id"], row["start"]))
+            sent += 1
+
+        answers = self._execute(
+            "SELECT answers.*, conversations.remote_id FROM answers JOIN conversations USING (local_id) "
+            "WHERE answers.status = 'pending' AND conversations.remote_id IS NOT NULL AND conversations.rejected = 0 "
+            "ORDER BY answers.created LIMIT ?", (self.batch_size,)
+        )
+        for row in answers:
+            self._execute("UPDATE answers SET attempts = attempts + 1 WHERE key = ?", (row["key"],))
+            try:
+                self.backend.post_answer(row["remote_id"], row["question_id"], json.loads(row["response"]), row["key"])
+            except PermanentError as e:
+                print(f"Backend rejected answer {row['key']}, dropping it: {e}")
+                self._execute("UPDATE answers SET status = 'rejected' WHERE key = ?", (row["key"],))
+                continue
+            self._execute("UPDATE answers SET status = 'sent' WHERE key = ?", (row["key"],))
+            sent += 1
+
+        # Only end conversations whose answers are all on the backend
+        for row in self._execute(
+            "SELECT * FROM conversations WHERE remote_id IS NOT NULL AND end IS NOT NULL AND end_sent = 0 "
+            "AND rejected = 0 AND NOT EXISTS (SELECT 1 FROM answers WHERE answers.local_id = conversations.local_id "
+            "AND answers.status = 'pending') ORDER BY created"
+        ):
+            try:
+                self.backend.put_conversation(row["remote_id"], dict(row))
+            except PermanentError as e:
+                self._reject_conversation(row, "end", e)
+                continue
+            self._execute("UPDATE conversations SET end_sent = 1, start_sent = 1 WHERE local_id = ?", (row["local_id"],))
+            sent += 1
+        return sent
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            # Clear before looking for work, so a notify() during the pass is not lost
+            self._wake.clear()
+            try:
+                if self.pending():
+                    self.drain_once()
+                    self.failures = 0
+                    if self.pending():
+                        continue
+                self._wake.wait()
+            except Exception as e:
+                self.failures += 1
+                delay = random.uniform(0.5, 1.0) * min(self.max_retry_delay, self.retry_delay * 2 ** (self.failures - 1))
+                print(f"Answer spool: {e}; {self.pending()} pending, retrying in {delay:.1f}s")
+                self._wake.wait(delay)
+
+    def start(self, backend) -> None:
+        """
+        Start draining, including anything left over from earlier runs.
+
+        Args:
+            backend: Object with post_conversation(row) -> remote id,
+                post_answer(remote_id, question_id, response, key) and
+                put_conversation(remote_id, row) sending its start and end; each raises on failure
+        """
+        self.backend = backend
+        if self._thread is None:
+            leftover = self.pending()
+            if leftover:
+                print(f"Answer spool: replaying {leftover} pending items")
+            self._thread = threading.Thread(target=self._run, name="answer-spool", daemon=True)
+            self._thread.start()
+
+    def notify(self) -> None:
+        """Wake the drain thread, e.g. after new work or when the network is back."""
+        self._wake.set()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Wait until everything is sent or the timeout passes; what is left stays spooled.
+
+        Returns:
+            bool: True when nothing is pending
+        """
+        if self._thread is None:
+            return not self.pending()
+        deadline = time.monotonic() + timeout
+        self.notify()
+        while self.pending() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return not self.pending()
+
+    def close(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,191 @@
+import os
+import random
+import threading
+import time
+from typing import Dict, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import LatencyHistogram
+from rate_limit import RateLimitGate
+
+# Firebase password sign-in; point SIGN_IN_URL at api_stub.py to run without the real service
+SIGN_IN_URL = os.environ.get("SIGN_IN_URL", "https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword")
+
+# (connect, read) timeouts in seconds per endpoint
+DEFAULT_TIMEOUTS = {
+    "token": (3.05, 10.0),
+    "questions": (3.05, 10.0),
+    "conversations": (3.05, 10.0),
+    "answers": (3.05, 10.0),
+    "default": (3.05, 15.0),
+}
+
+# Status codes worth another attempt; anything else is returned to the caller
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Methods that can be repeated without side effects beyond the first call
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+
+class APIClient:
+    def __init__(self, base_url: str, timeouts: Dict[str, Tuple[float, float]] = None, retries: int = 2,
+                 backoff: float = 0.3, max_backoff: float = 5.0, pool_size: int = 4, name: str = "api",
+                 sign_in_url: str = SIGN_IN_URL, gate: RateLimitGate = None, max_retry_after: float = 60.0):
+        """
+        Shared HTTP client for the bench backend and the sign-in service.
+
+        All calls go through one requests.Session, so connections are kept
+        alive and reused instead of doing a TCP and TLS handshake per call.
+        Every call has a timeout. Failed calls are retried with exponential
+        backoff and full jitter: idempotent methods on connection errors,
+        timeouts and 429/5xx; POST only when the request cannot have reached
+        the server (connect timeout) or the server asked to retry (429/503).
+
+        Args:
+            base_url: Prefix for relative paths, e.g. 'https://.../api/'
+            timeouts: Endpoint name to (connect, read) timeout, merged over DEFAULT_TIMEOUTS
+            retries: Extra attempts after the first one
+            backoff: Base delay in seconds; attempt n waits up to backoff * 2**n
+            max_backoff: Upper bound of a single backoff delay
+            pool_size: Connections kept open per host
+            name: Label printed in the report
+            sign_in_url: Password sign-in endpoint used by fetch_token
+            gate: Shared pause for concurrent callers; a 429 holds back every call through it
+            max_retry_after: Upper bound of a server's Retry-After, which is honoured
+                (for the retry and the gate) beyond max_backoff
+        """
+        self.base_url = base_url if base_url.endswith("/") else base_url + "/"
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.name = name
+        self.sign_in_url = sign_in_url
+        self.gate = gate
+        self.headers = {"Content-Type": "application/json"}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.errors: Dict[str, int] = {}
+
+    def url(self, path: str) -> str:
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return self.base_url + path.lstrip("/")
+
+    def endpoint_name(self, path: str) -> str:
+        """
+        Name of the endpoint a path or URL belongs to, for timeouts and the report.
+
+        Backend calls are named by their first path segment ('conversations/12'
+        is 'conversations'); calls to other hosts by their last one.
+        """
+        url = self.url(path).split("?")[0]
+        if url.startswith(self.base_url):
+            return url[len(self.base_url):].strip("/").split("/")[0] or "default"
+        return urlparse(url).path.strip("/").split("/")[-1] or "default"
+
+    def _record(self, endpoint: str, seconds: float, failed: bool) -> None:
+        with self._lock:
+            if endpoint not in self.latency:
+                self.latency[endpoint] = LatencyHistogram()
+                self.errors[endpoint] = 0
+            self.latency[endpoint].observe(seconds)
+            self.errors[endpoint] += failed
+
+    def _should_retry(self, method: str, error: Exception = None, status: int = None) -> bool:
+        if status is not None:
+            if method in IDEMPOTENT_METHODS:
+                return status in RETRY_STATUSES
+            return status in (429, 503)
+        if method in IDEMPOTENT_METHODS:
+            return isinstance(error, (requests.ConnectionError, requests.Timeout))
+        return isinstance(error, requests.ConnectTimeout)
+
+    def _delay(self, attempt: int, response: requests.Response = None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_retry_after)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def request(self, method: str, path: str, endpoint: str = None, **kwargs) -> requests.Response:
+        """
+        Send a request, retrying transient failures.
+
+        Args:
+            method: HTTP method
+            path: Path relative to base_url, or an absolute URL
+            endpoint: Name used for the timeout and the latency histogram (defaults to
+                endpoint_name(path))
+            **kwargs: Passed on to requests (json, params, headers, ...)
+
+        Returns:
+            requests.Response: The last response; status codes are left to the caller
+
+        Raises:
+            requests.RequestException: When the last attempt failed without a response
+        """
+        method = method.upper()
+        if endpoint is None:
+            endpoint = self.endpoint_name(path)
+        kwargs.setdefault("timeout", self.timeouts.get(endpoint, self.timeouts["default"]))
+        kwargs["headers"] = dict(self.headers, **kwargs.get("headers", {}))
+        url = self.url(path)
+
+        attempt = 0
+        while True:
+            if self.gate is not None:
+                self.gate.wait()
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                self._record(endpoint, time.perf_counter() - started, True)
+                if attempt >= self.retries or not self._should_retry(method, error=e):
+                    raise
+                delay = self._delay(attempt)
+                print(f"{method} {endpoint} failed ({e.__class__.__name__}), retrying in {delay:.2f}s")
+            else:
+                failed = response.status_code >= 500
+                self._record(endpoint, time.perf_counter() - started, failed)
+                delay = self._delay(attempt, response)
+                if response.status_code == 429 and self.gate is not None:
+                    self.gate.pause(delay)
+                if attempt >= self.retries or not self._should_retry(method, status=response.status_code):
+                    return response
+                print(f"{method} {endpoint} returned {response.status_code}, retrying in {delay:.2f}s")
+            attempt += 1
+            time.sleep(delay)
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path: str, **kwargs) -> requests.Response:
+        return self.request("PUT", path, **kwargs)
+
+    def report(self) -> None:
+        """Print call counts, errors and latency per endpoint."""
+        if not self.latency:
+            return
+        print(f"\n[{self.name}] {'endpoint':<16}{'calls':>6}{'errors':>8}{'mean (s)':>10}"
+              f"{'p50 (s)':>9}{'p95 (s)':>9}{'max (s)':>9}")
+        with self._lock:
+            for endpoint, latency in sorted(self.latency.items()):
+                print(f"[{self.name}] {endpoint:<16}{latency.count:>6}{self.errors[endpoint]:>8}"
+                      f"{latency.mean:>10.3f}{latency.percentile(0.5):>9.2f}"
+                      f"{latency.percentile(0.95):>9.2f}{latency.max:>9.2f}")
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,248 @@
+"""
+In-memory stand-in for the bench backend API and the sign-in service.
+
+Serves the endpoints ManagerAgent and SSAgent use on localhost, with optional
+latency and injected failures. Running this module drives a ManagerAgent
+through the APIClient and answer spool against the stub, including retried
+failures and an outage the spool has to ride out, and prints the latency
+report:
+
+    python api_stub.py
+
+To run the bench or SSAgent against it instead, start it with --serve and
+set SIGN_IN_URL and TOKEN_REFRESH_URL to the printed URLs.
+"""
+import hashlib
+import itertools
+import json
+import urllib.parse
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+QUESTIONS = [
+    {"id": 1, "text": "Wat vind je van het openbaar vervoer in de stad?", "active": True},
+    {"id": 2, "text": "Wat zou je verbeteren aan de parken?", "active": True},
+    {"id": 3, "text": "Welke plek in de stad raad je toeristen aan?", "active": False},
+]
+
+
+class StubBackend:
+    def __init__(self, questions: List[Dict] = None, delay: float = 0.0):
+        """
+        Backend state shared by all request handlers.
+
+        Args:
+            questions: Questions to serve (defaults to QUESTIONS)
+            delay: Seconds to wait before every response (per path in `delays`)
+        """
+        self.questions = list(questions if questions is not None else QUESTIONS)
+        self.delay = delay
+        self.delays: Dict[str, float] = {}
+        self.conversations: Dict[int, Dict] = {}
+        self.answers: Dict[int, Dict] = {}
+        self.requests: List[Tuple[str, str]] = []
+        self.idempotency_keys: Dict[str, Dict] = {}
+        self.token_lifetime = 3600
+        self.sign_ins = 0
+        self.refreshes = 0
+        self.failures: Dict[Tuple[str, str], List[int]] = {}
+        self.retry_after: Dict[Tuple[str, str], str] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def fail(self, method: str, path: str, *statuses: int, retry_after: int = None) -> None:
+        """Answer the next requests for a path with these status codes, in order, optionally with a Retry-After."""
+        self.failures.setdefault((method, path), []).extend(statuses)
+        if retry_after is not None:
+            self.retry_after[(method, path)] = str(retry_after)
+
+    def handle(self, method: str, path: str, body: Dict, idempotency_key: str = None,
+               query: Dict[str, str] = None) -> Tuple[int, object]:
+        query = query or {}
+        with self._lock:
+            self.requests.append((method, path))
+            pending = self.failures.get((method, path))
+            if pending:
+                return pending.pop(0), {"error": "injected failure"}
+
+            parts = path.strip("/").split("/")
+            if parts[-1].startswith("accounts:signInWithPassword"):
+                self.sign_ins += 1
+                return 200, {"idToken": f"stub-id-token-{next(self._ids)}", "refreshToken": "stub-refresh-token",
+                             "expiresIn": str(self.token_lifetime)}
+            if parts[-2:] == ["v1", "token"] and method == "POST":
+                if body.get("refresh_token") != "stub-refresh-token":
+                    return 400, {"error": {"message": "INVALID_REFRESH_TOKEN"}}
+                self.refreshes += 1
+                return 200, {"id_token": f"stub-id-token-{next(self._ids)}", "refresh_token": "stub-refresh-token",
+                             "expires_in": str(self.token_lifetime)}
+            if parts[:1] != ["api"]:
+                return 404, {"error": "not found"}
+            parts = parts[1:]
+
+            if parts == ["questions"] and method == "GET":
+                return 200, self.questions
+            if parts == ["questions", "active"] and method == "GET":
+                return 200, [question for question in self.questions if question.get("active", True)]
+            if parts == ["conversations"] and method == "GET":
+                conversations = list(self.conversations.values())
+                # Paging and idAfter as SSAgent.fetch_conversations assumes them; the real backend may ignore them
+                if "idAfter" in query:
+                    conversations = [convo for convo in conversations if convo["id"] > int(query["idAfter"])]
+                if "pageSize" in query:
+                    size = int(query["pageSize"])
+                    start = (int(query.get("page", 1)) - 1) * size
+                    conversations = conversations[start:start + size]
+                return 200, conversations
+            if parts == ["conversations"] and method == "POST":
+                conversation = dict(body, id=next(self._ids))
+                self.conversations[conversation["id"]] = conversation
+                return 201, conversation
+            if parts[:1] == ["conversations"] and len(parts) == 2 and method == "PUT":
+                conversation_id = int(parts[1])
+                if conversation_id not in self.conversations:
+                    return 404, {"error": "unknown conversation"}
+                self.conversations[conversation_id].update(body)
+                return 204, None
+            if parts == ["answers"] and method == "POST":
+                if idempotency_key in self.idempotency_keys:
+                    return 201, self.idempotency_keys[idempotency_key]
+                answer = {
+                    "id": next(self._ids),
+                    "conversationId": body.get("ConversationId"),
+                    "questionId": body.get("QuestionId"),
+                    "response": body.get("response"),
+                    "keywords": None,
+                }
+                self.answers[answer["id"]] = answer
+                if idempotency_key:
+                    self.idempotency_keys[idempotency_key] = answer
+                return 201, answer
+            if parts[:2] == ["answers", "conversation"] and len(parts) == 3 and method == "GET":
+                conversation_id = int(parts[2])
+                return 200, [answer for answer in self.answers.values() if answer["conversationId"] == conversation_id]
+            if parts[:1] == ["answers"] and len(parts) == 2 and method == "PUT":
+                answer_id = int(parts[1])
+                if answer_id not in self.answers:
+                    return 404, {"error": "unknown answer"}
+                self.answers[answer_id].update(body)
+                return 204, None
+            return 404, {"error": "not found"}
+
+
+def _handler(backend: StubBackend):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, like the real backend
+
+        def _respond(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length).decode() if length else ""
+            if self.headers.get("Content-Type", "").startswith("application/x-www-form-urlencoded"):
+                body = dict(urllib.parse.parse_qsl(raw))
+            else:
+                body = json.loads(raw) if raw else {}
+            path, _, query = self.path.partition("?")
+            delay = backend.delays.get(path, backend.delay)
+            if delay:
+                time.sleep(delay)
+            status, payload = backend.handle(self.command, path, body, self.headers.get("Idempotency-Key"),
+                                             dict(urllib.parse.parse_qsl(query)))
+            data = b"" if payload is None else json.dumps(payload).encode()
+            etag = None
+            if self.command == "GET" and status == 200:
+                etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    status, data = 304, b""
+            self.send_response(status)
+            if status in (429, 503) and (self.command, path) in backend.retry_after:
+                self.send_header("Retry-After", backend.retry_after[(self.command, path)])
+            if etag:
+                self.send_header("ETag", etag)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PUT = _respond
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(backend: StubBackend = None, host: str = "127.0.0.1", port: int = 0):
+    """
+    Start the stub in a background thread.
+
+    Returns:
+        Tuple of (server, backend, base url of the API, sign-in url, token refresh url)
+    """
+    backend = backend if backend is not None else StubBackend()
+    server = ThreadingHTTPServer((host, port), _handler(backend))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    root = f"http://{host}:{server.server_address[1]}"
+    return server, backend, f"{root}/api/", f"{root}/v1/accounts:signInWithPassword", f"{root}/v1/token"
+
+
+def main():
+    if "--serve" in sys.argv:
+        server, backend, api_url, sign_in_url, refresh_url = serve(port=8765)
+        print(f"API: {api_url}\nSIGN_IN_URL={sign_in_url}\nTOKEN_REFRESH_URL={refresh_url}")
+        threading.Event().wait()
+
+    backend = StubBackend(delay=0.01)
+    backend.token_lifetime = 3
+    server, backend, api_url, sign_in_url, refresh_url = serve(backend)
+
+    import tempfile
+    from answer_spool import AnswerSpool
+    from api_client import APIClient
+    from manager import ManagerAgent
+    from question_cache import QuestionCache
+    from token_manager import TokenManager
+
+    directory = Path(tempfile.mkdtemp())
+    token_file = directory / "token.json"
+    client = APIClient(api_url, backoff=0.01, name="stub api", sign_in_url=sign_in_url)
+    spool = AnswerSpool(":memory:", retry_delay=0.1)
+    tokens = TokenManager(client, path=token_file, refresh_margin=1, refresh_url=refresh_url)
+    manager = ManagerAgent(None, None, None, api_url, 1, api_client=client, spool=spool, token_manager=tokens)
+    manager.question_cache = QuestionCache(client, "questions/active", headers=lambda: manager.headers,
+                                           ttl=0, path=directory / "questions.json")
+    backend.fail("GET", "/api/questions/active", 503, 502)
+    # More failures than the client retries: the spool keeps the answer and tries again later
+    backend.fail("POST", "/api/answers", 503, 503, 503, 503)
+
+    manager.prepare()
+    # Idle time: the reserved conversation is created on the backend before anyone sits down
+    spool.flush(timeout=5)
+    manager.create_conversation()
+    for question in manager.questions:
+        manager.submit_answer(question["id"], "Prima")
+        manager.submit_answer(question["id"], "Prima")  # Spooled once
+    manager.end_conversation()
+    spool.flush(timeout=10)
+
+    # The next conversation starts from the cached questions; the stale copy is revalidated with a 304
+    manager.fetch_questions()
+
+    # The token is refreshed in the background before it expires; a new run reuses the cached one
+    time.sleep(2.5)
+    TokenManager(client, path=token_file, refresh_margin=1, refresh_url=refresh_url).token()
+
+    print(f"\nRequests seen by the stub: {len(backend.requests)}")
+    print(f"Answers stored: {len(backend.answers)}")
+    print(f"Sign-ins: {backend.sign_ins}, token refreshes: {backend.refreshes}")
+    print(f"Conversation ended: {backend.conversations[manager.conversation_id].get('endDatetime')}")
+    manager.api.report()
+    spool.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
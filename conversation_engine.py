@@ -0,0 +1,272 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from conversation_flow import QuestionnaireFlow, GOODBYE_MESSAGE, ERROR_MESSAGE
+from llm_dutch import stream_sentences
+from speculation import SpeculativeResponder
+
+
+class ConversationEngine:
+    def __init__(self, manager, queue_size: int = 8, listen_during_playback: bool = False,
+                 speculation: str = "likely"):
+        """
+        Asyncio conversation engine running audio in, audio out, LLM and API work as separate tasks.
+
+        The tasks are connected by bounded queues, so backend calls (creating
+        the conversation, submitting answers, ending it) never hold up the
+        conversation, and the first question is spoken while the conversation
+        is still being created. The question/follow-up/off-topic/'Einde' logic
+        is the same QuestionnaireFlow that ManagerAgent.run uses. Playback and
+        recording each run on their own single thread, so the audio device and
+        the speech engines, which are not thread-safe, are only ever touched
+        from one thread and never wait for a free worker in the shared pool.
+
+        Args:
+            manager: ManagerAgent providing the STT, TTS and LLM agents and the backend API calls
+            queue_size: Capacity of each queue between the tasks
+            listen_during_playback: Start listening as soon as a reply starts playing
+                (only for benches with echo cancellation); otherwise listen after it ends
+            speculation: Generate replies while the answer is evaluated: 'off', 'likely'
+                or 'all' (see SpeculativeResponder); needs an LLM agent with async methods
+        """
+        self.manager = manager
+        self.queue_size = queue_size
+        self.listen_during_playback = listen_during_playback
+        self.listening_ahead = False
+        self.speculator = None
+        if speculation != "off" and hasattr(manager.llm_agent, "aevaluate_response"):
+            self.speculator = SpeculativeResponder(manager.llm_agent, speculation)
+
+    # Tasks
+
+    async def _audio_out(self) -> None:
+        """Play speech requests one at a time."""
+        while True:
+            function, args, done = await self.speech_queue.get()
+            try:
+                result = await self._in_thread(function, *args, executor=self.speaker)
+                if not done.done():
+                    done.set_result(result)
+            except Exception as e:
+                if not done.done():
+                    done.set_exception(e)
+            finally:
+                self.speech_queue.task_done()
+
+    async def _audio_in(self) -> None:
+        """Capture and transcribe one utterance per listen request."""
+        while True:
+            await self.listen_queue.get()
+            try:
+                text = await self._in_thread(self.manager.stt_agent.transcribe_audio, executor=self.recorder)
+                await self.utterance_queue.put(text)
+            except Exception as e:
+                print(f"Error listening: {e}")
+                await self.utterance_queue.put("")
+            finally:
+                self.listen_queue.task_done()
+
+    async def _llm(self) -> None:
+        """Run LLM requests in order."""
+        while True:
+            function, args, done = await self.llm_queue.get()
+            try:
+                result = await self._in_thread(function, *args)
+                if not done.done():
+                    done.set_result(result)
+            except Exception as e:
+                if not done.done():
+                    done.set_exception(e)
+            finally:
+                self.llm_queue.task_done()
+
+    async def _api(self) -> None:
+        """Run backend calls in order, in the background."""
+        while True:
+            function, args = await self.api_queue.get()
+            try:
+                await self._in_thread(function, *args)
+            except Exception as e:
+                print(f"Error calling the backend ({function.__name__}): {e}")
+            finally:
+                self.api_queue.task_done()
+
+    # Helpers used by the dialogue
+
+    async def _in_thread(self, function, *args, executor: ThreadPoolExecutor = None):
+        return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+
+    async def _request(self, queue: asyncio.Queue, function, *args):
+        done = asyncio.get_running_loop().create_future()
+        await queue.put((function, args, done))
+        return done
+
+    async def say(self, text: str) -> None:
+        """Speak a fixed text and wait until it has been played."""
+        await (await self._request(self.speech_queue, self.manager.tts_agent.text_to_speech, text))
+
+    async def call_api(self, function, *args) -> None:
+        """Queue a backend call without waiting for it."""
+        await self.api_queue.put((function, args))
+
+    async def listen(self) -> str:
+        """Request one utterance from the microphone and wait for its transcription."""
+        await self.listen_queue.put(True)
+        return await self.utterance_queue.get()
+
+    async def evaluate(self, user_message: str, conversation_history: List[Dict], question_text: str) -> str:
+        llm_agent = self.manager.llm_agent
+        return await (await self._request(self.llm_queue, llm_agent.evaluate_response,
+                                          user_message, conversation_history, question_text))
+
+    async def reply(self, plan: Dict, user_message: str, conversation_history: List[Dict],
+                    qa_response: str = None) -> str:
+        """
+        Generate the reply for a plan and speak it, streaming sentence by sentence when possible.
+
+        A reply that was already generated speculatively is spoken as is.
+        """
+        llm_agent = self.manager.llm_agent
+        tts_agent = self.manager.tts_agent
+        args = (plan["prompt"], user_message, list(conversation_history), plan["follow_up_question"])
+        streaming = hasattr(llm_agent, "generate_response_stream") and hasattr(tts_agent, "speak_stream")
+
+        if qa_response is not None:
+            if hasattr(tts_agent, "speak_stream"):
+                function, speak_args = tts_agent.speak_stream, (stream_sentences([qa_response]),)
+            else:
+                function, speak_args = tts_agent.text_to_speech, (qa_response,)
+            playback = await self._request(self.speech_queue, function, *speak_args)
+            streaming = False
+        elif streaming:
+            def speak():
+                return tts_agent.speak_stream(stream_sentences(llm_agent.generate_response_stream(*args)))
+            playback = await self._request(self.speech_queue, speak)
+        else:
+            qa_response = await (await self._request(self.llm_queue, llm_agent.generate_response, *args))
+            playback = await self._request(self.speech_queue, tts_agent.text_to_speech, qa_response)
+
+        # With echo cancellation the answer can be captured while the reply plays
+        if self.listen_during_playback:
+            await self.listen_queue.put(True)
+            self.listening_ahead = True
+
+        result = await playback
+        if streaming:
+            qa_response = result
+        print(f"AI response: {qa_response}")
+        return qa_response
+
+    # Dialogue
+
+    async def dialogue(self) -> None:
+        """Run one questionnaire from the first question until it ends."""
+        manager = self.manager
+        conversation_history: List[Dict] = []
+        flow = QuestionnaireFlow(manager.questions, manager.max_follow_ups,
+                                 start_index=manager.current_question_index)
+
+        await self.call_api(manager.create_conversation)
+
+        current_question = flow.current_question
+        if not current_question:
+            print("Questionnaire is complete")
+            await self.call_api(manager.end_conversation)
+            return
+
+        # Ask the first question while the conversation is being created
+        if manager.stopwatch is not None:
+            manager.stopwatch.mark("first question")
+        print(f"\nAI: {current_question['text']}")
+        await self.say(current_question['text'])
+        conversation_history.append({"bank": current_question['text']})
+
+        while not flow.finished:
+            try:
+                print("\nListening...")
+                if self.listening_ahead:
+                    self.listening_ahead = False
+                    user_message = await self.utterance_queue.get()
+                else:
+                    user_message = await self.listen()
+
+                # Check for silence/no response
+                if not user_message:
+                    if flow.register_silence():
+                        partial = flow.flush()
+                        if partial is not None:
+                            await self.call_api(manager.submit_answer, *partial)
+                        await self.say(GOODBYE_MESSAGE)
+                        await self.call_api(manager.end_conversation)
+                        return
+                    continue
+
+                print(f"User said: {user_message}")
+
+                ready_reply = None
+                if self.speculator is not None:
+                    is_response_complete, plan, ready_reply = await self.speculator.run_turn(
+                        flow, user_message, conversation_history
+                    )
+                    print(is_response_complete)
+                else:
+                    is_response_complete = await self.evaluate(
+                        user_message,
+                        list(conversation_history),
+                        flow.current_question['text']
+                    )
+                    print(is_response_complete)
+                    plan = flow.plan(is_response_complete, user_message)
+                if plan["submit"] is not None:
+                    await self.call_api(manager.submit_answer, *plan["submit"])
+                flow.apply(plan, user_message)
+
+                if plan["end"]:
+                    print(f"AI: {plan['reply']}")
+                    await self.say(plan["reply"])
+                    await self.call_api(manager.end_conversation)
+                    return
+
+                qa_response = await self.reply(plan, user_message, conversation_history, ready_reply)
+
+                conversation_history.append({
+                    "user": user_message,
+                    "bank": qa_response
+                })
+
+            except Exception as e:
+                print(f"Fout tijdens het gesprek: {e}")
+                await self.say(ERROR_MESSAGE)
+
+    async def run(self) -> None:
+        """Prepare the questionnaire if needed, run the dialogue and flush pending backend calls."""
+        manager = self.manager
+        if not manager.prepared:
+            await self._in_thread(manager.prepare)
+
+        self.speech_queue = asyncio.Queue(self.queue_size)
+        self.listen_queue = asyncio.Queue(1)
+        self.utterance_queue = asyncio.Queue(self.queue_size)
+        self.llm_queue = asyncio.Queue(self.queue_size)
+        self.api_queue = asyncio.Queue(self.queue_size)
+        self.speaker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-out")
+        self.recorder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-in")
+
+        workers = [
+            asyncio.create_task(self._audio_out(), name="audio-out"),
+            asyncio.create_task(self._audio_in(), name="audio-in"),
+            asyncio.create_task(self._llm(), name="llm"),
+            asyncio.create_task(self._api(), name="api"),
+        ]
+        try:
+            await self.dialogue()
+            # Make sure every answer reaches the backend before we stop
+            await self.api_queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            # A recording started ahead of time may still be waiting for the microphone
+            self.speaker.shutdown(wait=False)
+            self.recorder.shutdown(wait=False)
@@ -0,0 +1,210 @@
+"""
+Deterministic stand-ins for the bench's STT, TTS and LLM agents and backend API.
+
+Running this module plays a scripted conversation through the ConversationEngine
+without a microphone, speaker, Groq or backend:
+
+    python conversation_fakes.py
+
+It then replays a set of scenarios through both conversation loops and checks
+that every question is submitted to the backend exactly once. The same
+scenarios run under pytest from tests/test_conversation_fakes.py.
+"""
+import asyncio
+from typing import Dict, List
+
+from answer_spool import AnswerSpool
+from conversation_engine import ConversationEngine
+from manager import ManagerAgent
+
+QUESTIONS = [
+    {"id": 1, "text": "Wat vind je van het openbaar vervoer in de stad?"},
+    {"id": 2, "text": "Wat zou je verbeteren aan de parken?"},
+    {"id": 3, "text": "Welke plek in de stad raad je toeristen aan?"},
+]
+
+
+class FakeSTTAgent:
+    def __init__(self, replies: List[str]):
+        """Return scripted user replies in order; an empty string is silence."""
+        self.replies = list(replies)
+
+    def transcribe_audio(self) -> str:
+        return self.replies.pop(0) if self.replies else ""
+
+
+class FakeTTSAgent:
+    def __init__(self):
+        """Record everything the bench would say."""
+        self.spoken: List[str] = []
+
+    def text_to_speech(self, text: str) -> None:
+        self.spoken.append(text)
+
+    def speak_stream(self, sentences) -> str:
+        text = " ".join(sentences)
+        self.spoken.append(text)
+        return text
+
+
+class FakeLLMAgent:
+    def __init__(self, verdicts: List[str]):
+        """Return scripted verdicts in order and predictable replies."""
+        self.verdicts = list(verdicts)
+        self.calls: List[str] = []
+
+    def evaluate_response(self, user_message, conversation_history=None, current_question=None) -> str:
+        self.calls.append("evaluate_response")
+        return self.verdicts.pop(0) if self.verdicts else "Ja"
+
+    def generate_response(self, prompt, user_message, conversation_history=None, follow_up_question=None) -> str:
+        self.calls.append("generate_response")
+        return f"Bedankt. {follow_up_question or 'Kun je daar meer over vertellen?'}"
+
+    async def aevaluate_response(self, user_message, conversation_history=None, current_question=None) -> str:
+        return self.evaluate_response(user_message, conversation_history, current_question)
+
+    async def agenerate_response(self, prompt, user_message, conversation_history=None, follow_up_question=None) -> str:
+        return self.generate_response(prompt, user_message, conversation_history, follow_up_question)
+
+    def generate_response_stream(self, prompt, user_message, conversation_history=None, follow_up_question=None):
+        for word in self.generate_response(prompt, user_message, conversation_history, follow_up_question).split(" "):
+            yield word + " "
+
+
+class FakeManagerAgent(ManagerAgent):
+    def __init__(self, llm_agent, stt_agent, tts_agent, questions: List[Dict] = None):
+        """ManagerAgent whose backend calls are recorded instead of sent."""
+        super().__init__(llm_agent, stt_agent, tts_agent, "http://fake-backend/api/", 1,
+                         spool=AnswerSpool(":memory:"), reserve_conversations=False)
+        self.fake_questions = questions if questions is not None else QUESTIONS
+        self.api_calls: List[tuple] = []
+
+    def fetch_token(self) -> None:
+        self.api_calls.append(("fetch_token",))
+
+    def fetch_questions(self) -> None:
+        self.api_calls.append(("fetch_questions",))
+        self.questions = list(self.fake_questions)
+
+    def create_conversation(self) -> None:
+        self.api_calls.append(("create_conversation",))
+        self.conversation_id = 1
+        self.new_conversation = {"startDatetime": None}
+
+    def submit_answer(self, question_id: int, user_response) -> None:
+        self.api_calls.append(("submit_answer", question_id, user_response))
+
+    def end_conversation(self) -> None:
+        self.api_calls.append(("end_conversation",))
+
+
+def run_scripted(replies: List[str], verdicts: List[str], questions: List[Dict] = None,
+                 engine: bool = True) -> FakeManagerAgent:
+    """
+    Run one conversation with fake agents.
+
+    Args:
+        replies: What the user says on each turn ('' for silence)
+        verdicts: What the evaluator returns for each non-silent turn
+        questions: Questionnaire to use (defaults to QUESTIONS)
+        engine: Use the ConversationEngine; otherwise the synchronous ManagerAgent.run
+
+    Returns:
+        FakeManagerAgent: Holds the recorded speech (tts_agent.spoken) and API calls (api_calls)
+    """
+    manager = FakeManagerAgent(FakeLLMAgent(verdicts), FakeSTTAgent(replies), FakeTTSAgent(), questions)
+    if engine:
+        asyncio.run(ConversationEngine(manager).run())
+    else:
+        manager.run()
+    return manager
+
+
+def submitted_answers(manager: FakeManagerAgent) -> Dict[int, List]:
+    """Question ID to every response submitted for it, in order."""
+    answers: Dict[int, List] = {}
+    for call in manager.api_calls:
+        if call[0] == "submit_answer":
+            answers.setdefault(call[1], []).append(call[2])
+    return answers
+
+
+# (name, replies, verdicts, expected answer per question ID)
+SCENARIOS = [
+    ("follow-ups, off-topic and goodbye",
+     ["Het is prima", "De bus is vaak te laat", "", "Wat is het weer morgen?", "Meer bankjes", "Tot ziens"],
+     ["Nee", "Ja", "Off", "Ja", "Einde"],
+     {1: "Het is prima De bus is vaak te laat", 2: "Meer bankjes"}),
+    ("follow-up limit reached",
+     ["Goed", "Ja hoor", "Echt prima", "Groener", "Tot ziens"],
+     ["Nee", "Nee", "Nee", "Ja", "Einde"],
+     {1: "Goed Ja hoor Echt prima", 2: "Groener"}),
+    ("goodbye halfway through a question",
+     ["De tram", "Tot ziens"],
+     ["Nee", "Einde"],
+     {1: "De tram"}),
+    ("silence halfway through a question",
+     ["De tram", "", "", "", "", ""],
+     ["Nee"],
+     {1: "De tram"}),
+    ("whole questionnaire",
+     ["Snel", "Meer bomen", "Het museum"],
+     ["Ja", "Ja", "Ja"],
+     {1: "Snel", 2: "Meer bomen", 3: "Het museum"}),
+]
+
+
+def check_scenario(name: str, replies: List[str], verdicts: List[str], expected: Dict[int, str],
+                   engine: bool = True) -> str:
+    """
+    Run one scenario through a conversation loop and check the backend requests.
+
+    The conversation must be created and ended once and every question that
+    got a reply must be submitted exactly once, as one consolidated string.
+
+    Returns:
+        str: One line describing the requests that were made
+
+    Raises:
+        Exception: When the requests don't match the scenario
+    """
+    manager = run_scripted(replies, verdicts, engine=engine)
+    calls = [call[0] for call in manager.api_calls]
+    answers = submitted_answers(manager)
+    loop = "engine" if engine else "run()"
+    if calls.count("create_conversation") != 1 or calls.count("end_conversation") != 1:
+        raise Exception(f"{name} ({loop}): conversation created/ended more than once: {calls}")
+    if answers != {question_id: [answer] for question_id, answer in expected.items()}:
+        raise Exception(f"{name} ({loop}): expected {expected}, submitted {answers}")
+    return f"{name:<40}{loop:<8}{len(manager.api_calls) - 2} conversation requests for {len(answers)} answers"
+
+
+def check_scenarios() -> None:
+    """
+    Run every scenario through both conversation loops (see check_scenario).
+
+    Raises:
+        Exception: On the first scenario that does not match
+    """
+    for name, replies, verdicts, expected in SCENARIOS:
+        for engine in (True, False):
+            print(f"OK  {check_scenario(name, replies, verdicts, expected, engine)}")
+
+def main():
+    manager = run_scripted(
+        replies=["Het is prima", "De bus is vaak te laat", "", "Wat is het weer morgen?", "Meer bankjes", "Tot ziens"],
+        verdicts=["Nee", "Ja", "Off", "Ja", "Einde"],
+    )
+    print("\nSpoken:")
+    for text in manager.tts_agent.spoken:
+        print(f"  {text}")
+    print("\nBackend calls:")
+    for call in manager.api_calls:
+        print(f"  {call}")
+    print()
+    check_scenarios()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+from typing import Dict, List, Optional, Tuple
+
+WELCOME_MESSAGE = """Let op, dit gesprek wordt opgenomen en jouw feedback zal binnen ons bedrijf worden gebruikt. Deel alsjeblieft geen persoonlijke informatie met de bank! 
+    Hallo! Ik ben jouw vriendelijke stadfeedbackbank. Ik ben hier om jouw gedachten over onze stad te horen en je ideeën te verzamelen om het nog beter te maken. Wil je jouw ervaringen met mij delen? 
+        """
+GOODBYE_MESSAGE = "Ik heb al een tijdje geen reactie gehoord. Bedankt voor je tijd. Fijne dag verder!"
+END_MESSAGE = "Bedankt voor het delen van je gedachten! Jouw feedback zal helpen om onze stad beter te maken. Nog een geweldige dag verder!"
+ERROR_MESSAGE = "Ik heb moeite met begrijpen. Kun je dat alstublieft herhalen?"
+CANNED_MESSAGES = [WELCOME_MESSAGE, GOODBYE_MESSAGE, END_MESSAGE, ERROR_MESSAGE]
+
+CLARIFY_PROMPT = "1. Genereer een verduidelijkende vraag om vriendelijk meer details te verkrijgen of gewoon een vraag om feedback van de gebruiker over de stad te verzamelen. De vragen moeten open-ended zijn."
+NEXT_QUESTION_PROMPT = "1. Reageer vriendelijk op hun antwoorden. Erken dat we doorgaan naar de volgende vraag in onze vragenlijst. 3. Stel een aangeleverde vervolgvraag."
+OFF_TOPIC_PROMPT = "Behandel off-topic reacties van de gebruiker door te bevestigen wat er is gehoord en het gesprek op een beleefde manier terug te leiden naar de vragenlijst. 1. Erkenning van de input van de gebruiker. Als de gebruiker een off-topic vraag stelt, beantwoord deze dan niet. 2. Een vriendelijke opmerking dat de focus ligt op de onderwerpen van de vragenlijst. 3. Stel de vervolgvraag om het gesprek soepel weer op koers te brengen."
+
+VERDICTS = ("Ja", "Nee", "Off", "Einde")
+
+
+class AnswerAggregator:
+    def __init__(self):
+        """
+        Buffer the partial replies to a question and hand out one consolidated answer per question.
+
+        Follow-up replies are kept locally instead of being submitted one by
+        one; the answer is committed once, when the question is done or the
+        conversation ends halfway through it.
+        """
+        self.question_id = None
+        self.parts: List[str] = []
+        self.committed = set()
+
+    def add(self, question_id, text: str) -> None:
+        if question_id != self.question_id:
+            self.question_id, self.parts = question_id, []
+        self.parts.append(text)
+
+    def preview(self, question_id, text: str = None) -> Optional[Tuple]:
+        """The (question_id, answer) commit() would return, without committing."""
+        if question_id in self.committed:
+            return None
+        parts = list(self.parts) if question_id == self.question_id else []
+        if text:
+            parts.append(text)
+        if not parts:
+            return None
+        return question_id, " ".join(parts)
+
+    def commit(self, question_id, text: str = None) -> Optional[Tuple]:
+        """
+        Consolidate the buffered replies (plus text) into the question's answer.
+
+        Returns:
+            (question_id, answer), or None when there is nothing to submit or
+            the question was already committed
+        """
+        answer = self.preview(question_id, text)
+        if answer is not None:
+            self.committed.add(question_id)
+        if question_id == self.question_id:
+            self.question_id, self.parts = None, []
+        return answer
+
+    def pending(self) -> Optional[Tuple]:
+        """The partial answer for the question in progress, if any."""
+        if self.question_id is None:
+            return None
+        return self.preview(self.question_id)
+
+
+class QuestionnaireFlow:
+    def __init__(self, questions: List[Dict], max_follow_ups: int = 2, max_silent_attempts: int = 5,
+                 start_index: int = 0):
+        """
+        State machine for the questionnaire, independent of audio, LLM and API.
+
+        After every user turn the evaluator's verdict decides what happens:
+        'Ja' submits the answer and moves on to the next question, 'Nee' asks a
+        follow-up (at most max_follow_ups times, after which the answer counts
+        as complete), 'Off' steers back to the current question and 'Einde'
+        ends the conversation. Replies to follow-ups are buffered, so every
+        question gets exactly one submitted answer: all its replies joined.
+
+        Args:
+            questions: Active questions, in the order they are asked
+            max_follow_ups: Follow-up questions allowed per question
+            max_silent_attempts: Silent listening attempts before the bench gives up
+            start_index: Index of the first question to ask
+        """
+        self.questions = questions
+        self.max_follow_ups = max_follow_ups
+        self.max_silent_attempts = max_silent_attempts
+        self.question_index = start_index
+        self.follow_up_count = 0
+        self.silent_attempts = 0
+        self.answers = AnswerAggregator()
+        self.finished = False
+
+    @property
+    def current_question(self) -> Optional[Dict]:
+        if 0 <= self.question_index < len(self.questions):
+            return self.questions[self.question_index]
+        return None
+
+    def register_silence(self) -> bool:
+        """
+        Count a listening attempt without a response.
+
+        Returns:
+            bool: True when the bench should give up and end the conversation
+        """
+        self.silent_attempts += 1
+        print(f"Geen reactie gedetecteerd. Poging {self.silent_attempts} van {self.max_silent_attempts}")
+        if self.silent_attempts >= self.max_silent_attempts:
+            print("Maximaal aantal stille pogingen bereikt. Gesprek wordt beëindigd.")
+            self.finished = True
+            return True
+        return False
+
+    def plan(self, verdict: str, user_message: str) -> Dict:
+        """
+        Decide how to react to a verdict without changing any state.
+
+        Args:
+            verdict: 'Ja', 'Nee', 'Off' or 'Einde' from the evaluator
+            user_message: What the user just said
+
+        Returns:
+            dict with keys:
+                verdict: The verdict after applying the follow-up limit
+                prompt: Instruction for the reply generator (None when 'reply' is set)
+                follow_up_question: Question text to pass to the reply generator
+                reply: Fixed text to speak instead of a generated reply
+                submit: (question_id, response) to store, or None
+                end: Whether the conversation ends after this turn
+        """
+        question = self.current_question
+        plan = {"verdict": verdict, "prompt": None, "follow_up_question": None,
+                "reply": None, "submit": None, "end": False}
+
+        # Check if the user wants to end the conversation; keep what was said so far
+        if verdict == "Einde":
+            plan.update(reply=END_MESSAGE, end=True, submit=self.answers.pending())
+            return plan
+
+        # A detailed question can be asked max 2 times
+        if self.follow_up_count >= self.max_follow_ups:
+            plan["verdict"] = verdict = "Ja"
+
+        if verdict == "Nee":
+            # Buffered until the question is done
+            plan["prompt"] = CLARIFY_PROMPT
+        elif verdict == "Ja":
+            # Concatenate all responses for this question
+            plan["submit"] = self.answers.preview(question['id'], user_message)
+            next_question = self.questions[self.question_index + 1] if self.question_index + 1 < len(self.questions) else None
+            if next_question is None:
+                print("Questionnaire is complete")
+                plan.update(reply=END_MESSAGE, end=True)
+            else:
+                plan.update(prompt=NEXT_QUESTION_PROMPT, follow_up_question=next_question['text'])
+        else:
+            plan.update(prompt=OFF_TOPIC_PROMPT, follow_up_question=question['text'])
+        return plan
+
+    def apply(self, plan: Dict, user_message: str) -> None:
+        """Advance the state machine according to a plan from plan()."""
+        self.silent_attempts = 0
+        verdict = plan["verdict"]
+        question = self.current_question
+        if verdict == "Nee":
+            print("User response is on-topic, but incomplete. Asking for more details.")
+            self.answers.add(question['id'], user_message)
+            self.follow_up_count += 1
+        elif verdict == "Ja":
+            self.answers.commit(question['id'], user_message)
+            print("We gaan verder naar de volgende vraag met de samengevoegde reactie:", plan["submit"][1])
+            self.question_index += 1
+            self.follow_up_count = 0
+        elif verdict == "Off":
+            print("User response is off-topic. Asking the same question")
+        if plan["end"]:
+            self.flush()
+            self.finished = True
+
+    def flush(self) -> Optional[Tuple]:
+        """
+        Commit the partial answer to the question in progress, e.g. when the conversation
+        ends before the question was answered completely.
+
+        Returns:
+            (question_id, answer) to submit, or None
+        """
+        pending = self.answers.pending()
+        if pending is None:
+            return None
+        return self.answers.commit(pending[0])
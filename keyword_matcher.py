@@ -0,0 +1,327 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from paths import cache_path
+from word_lists import NON_ANSWERS, STOPWORDS
+
+# Category vocabularies, nouns and adjectives only: verb stems like 'werk' or 'bouw' also match
+# 'ik werk in de stad', 'samenwerken' or 'landbouw'. The LLM prompt (KEYWORD_CATEGORIES in main.py)
+# gives examples from the same categories.
+CATEGORIES = {
+    "Openbaar Vervoer": [
+        "bus", "metro", "trein", "verkeer", "parkeren", "tram", "halte", "bushalte", "station",
+        "openbaar vervoer", "ov", "fiets", "fietspad", "fietsenstalling", "file", "parkeerplaats",
+        "auto", "dienstregeling", "vertraging", "overstap",
+    ],
+    "Toerisme": [
+        "museum", "bezienswaardigheden", "monumenten", "hotels", "musea", "toerist", "toerisme", "rondleiding",
+        "stadswandeling", "restaurant", "terras", "café", "markt", "kerk", "kathedraal", "winkel",
+        "winkelen", "haven", "kasteel", "evenement", "festival",
+    ],
+    "Infrastructuur": [
+        "wegen", "bruggen", "bouwplaats", "netheid", "straat", "stoep", "wegenwerken", "werkzaamheden", "afval",
+        "vuilnis", "zwerfvuil", "vuilbak", "riolering", "schoon", "vuil", "gebouw", "plein", "park",
+        "groen", "bankje",
+    ],
+    "Veiligheid": [
+        "criminaliteit", "politie", "verlichting", "ongelukken", "agent", "diefstal", "inbraak",
+        "onveilig", "veilig", "overlast", "camera", "camerabewaking", "drugs", "vandalisme",
+        "zakkenroller", "geweld", "brand", "brandweer",
+    ],
+}
+
+# Patterns this long also match as the last part of a compound (stads|park, straat|verlichting)
+COMPOUND_MIN_LENGTH = 4
+
+VOWELS = set("aeiouyè")
+
+# Words that carry no feedback on their own; an answer of only these has no keywords, and they
+# don't count when checking how much of an answer the keywords cover
+EMPTY_WORDS = STOPWORDS | {
+    "ja", "nee", "geen", "idee", "mening", "weet", "weten", "niks", "niets", "misschien", "ok", "oke",
+    "oké", "goed", "prima", "dank", "bedankt", "hmm", "uhm", "eh", "euh", "nou", "gewoon", "nooit",
+    "veel", "weinig", "vaak", "soms", "altijd", "echt", "best", "beetje", "hier", "daar", "dan", "zo",
+    "nu", "me", "mij", "we", "wij", "ze", "zij", "hij", "men", "heb", "hebt", "heeft", "hebben", "had",
+    "wordt", "worden", "werd", "waren", "moet", "moeten", "kunnen", "mag", "vinden", "denk",
+}
+
+# A keyword right after one of these ('geen brand', 'niet veilig') is not what the answer is about
+NEGATIONS = {"geen", "niet", "nooit", "zonder"}
+NEGATION_WINDOW = 2
+
+
+def normalize(text: str) -> str:
+    """Lowercase words without punctuation, the form answers are matched and cached in."""
+    text = unicodedata.normalize("NFKC", text or "").lower().replace("'s", "s")
+    return " ".join(re.findall(r"[^\W\d_]+", text))
+
+
+def _undouble_consonant(word: str) -> str:
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in VOWELS:
+        return word[:-1]
+    return word
+
+
+def stem(word: str) -> str:
+    """
+    Light Dutch stemmer after the Snowball rules: plural, diminutive and -e endings.
+
+    It only has to map the forms of a word onto the same stem, e.g. 'bussen'
+    and 'bus', or 'parkeren' and 'parkeer', so vocabulary and answers are
+    stemmed with the same function. A final -s after a t is kept, so that
+    'plaats' and 'plaatsen' or 'fiets' and 'fietsen' share a stem.
+    """
+    word = unicodedata.normalize("NFKD", word)
+    word = "".join(char for char in word if not unicodedata.combining(char))
+    if word.endswith("heden"):
+        word = word[:-5] + "heid"
+    for suffix in ("etjes", "tjes", "jes", "etje", "tje", "je"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    for suffix in ("en", "s", "e"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and word[-len(suffix) - 1] not in VOWELS \
+                and not (suffix == "s" and word[-2] == "t"):
+            word = _undouble_consonant(word[:-len(suffix)])
+            break
+    # Undouble a long vowel in a closed last syllable: parkeer -> parker, like parkeren -> parker
+    if len(word) >= 4 and word[-1] not in VOWELS and word[-2] == word[-3] and word[-2] in "aeou" \
+            and word[-4] not in VOWELS:
+        word = word[:-2] + word[-1]
+    return word
+
+
+class AhoCorasick:
+    def __init__(self, patterns: Dict[str, object]):
+        """
+        Aho-Corasick automaton that finds all patterns in a text in one pass.
+
+        Args:
+            patterns: Pattern string to the value returned when it matches
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[str, object]]] = [[]]
+        for pattern, value in patterns.items():
+            state = 0
+            for char in pattern:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state].append((pattern, value))
+
+        # Breadth-first: the failure link of a state is the longest proper suffix that is also a prefix
+        queue = list(self._goto[0].values())
+        while queue:
+            state = queue.pop(0)
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0) if state else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def search(self, text: str) -> Iterator[Tuple[int, int, str, object]]:
+        """Yield (start, end, pattern, value) for every occurrence of every pattern."""
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for pattern, value in self._output[state]:
+                yield index + 1 - len(pattern), index + 1, pattern, value
+
+
+class KeywordMatcher:
+    def __init__(self, categories: Dict[str, List[str]] = None, model_path: Optional[str] = None,
+                 threshold: float = 0.8, path: Optional[Path] = None, min_coverage: float = 0.6,
+                 max_entries: int = 20000, max_age: float = 90 * 24 * 3600.0):
+        """
+        Local keyword extraction for the fixed category taxonomy, without an LLM call.
+
+        Vocabulary and answers are stemmed with a light Dutch stemmer and all
+        vocabulary stems are found in one pass with an Aho-Corasick index that
+        is compiled once, so 'bussen' finds 'bus' and 'stadspark' finds
+        'park'. A keyword right after a negation ('geen brand') is dropped.
+        The matched keywords only cover an answer when they make up at least
+        min_coverage of its content words; a longer answer with more to say
+        is left to the LLM. When a fine-tuned Dutch classifier with the
+        category names as labels is configured (model_path or
+        KEYWORD_CLASSIFIER_MODEL), it labels answers the vocabulary misses.
+        Answers with no content words are covered without keywords.
+        Everything else is left to the LLM, whose result can be stored with
+        remember(). Results are cached by normalized answer text, in memory
+        and on disk; the cache keeps the max_entries most recently used
+        answers and forgets answers unused for max_age seconds.
+
+        Args:
+            categories: Category name to vocabulary (defaults to CATEGORIES)
+            model_path: Path or hub id of a transformers model with the category names as labels
+            threshold: Minimum classifier confidence to accept its category
+            path: Cache file (defaults to a file per taxonomy in the bench cache)
+            min_coverage: Share of an answer's content words the keywords must cover
+            max_entries: Answers kept in the cache
+            max_age: Seconds an unused answer stays in the cache
+        """
+        self.categories = categories or CATEGORIES
+        self.model_path = model_path or os.environ.get("KEYWORD_CLASSIFIER_MODEL")
+        self.threshold = threshold
+        self.min_coverage = min_coverage
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._pipeline = None
+
+        patterns = {}
+        for category, words in self.categories.items():
+            for word in words:
+                # Several forms of a word share a stem: the first one listed is the keyword
+                patterns.setdefault(" ".join(stem(token) for token in normalize(word).split()), (word, category))
+        self.index = AhoCorasick(patterns)
+
+        if path is None:
+            digest = hashlib.sha1(json.dumps(self.categories, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+            path = cache_path("keywords") / f"answers-{digest}.json"
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._model_lock = threading.Lock()
+        self.cache: Dict[str, Dict] = {}
+        self.hits = {"cache": 0, "local": 0, "classifier": 0, "empty": 0, "llm": 0}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            cache = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        oldest = time.time() - self.max_age
+        self.cache = {key: entry for key, entry in cache.items() if entry.get("used", 0) >= oldest}
+        self._evict()
+
+    def _evict(self) -> None:
+        # Drop the least recently used tenth at once, so a full cache isn't sorted on every store
+        if len(self.cache) > self.max_entries:
+            keep = self.max_entries - self.max_entries // 10
+            recent = sorted(self.cache.items(), key=lambda item: item[1].get("used", 0), reverse=True)[:keep]
+            self.cache = dict(recent)
+
+    def save(self) -> None:
+        with self._lock:
+            data = json.dumps(self.cache, ensure_ascii=False)
+        temp = self.path.with_suffix(".tmp")
+        temp.write_text(data, encoding="utf-8")
+        os.replace(str(temp), str(self.path))
+
+    def _load_model(self):
+        if self._pipeline is None and self.model_path:
+            from transformers import pipeline
+
+            self._pipeline = pipeline("text-classification", model=self.model_path, device=-1)
+        return self._pipeline
+
+    def _scan(self, text: str) -> Tuple[Dict[str, List[str]], float]:
+        words = normalize(text).split()
+        stemmed = " " + " ".join(stem(word) for word in words) + " "
+        matches = []
+        for start, end, pattern, value in self.index.search(stemmed):
+            # Whole words, or the last part of a compound for longer patterns
+            if stemmed[end] != " ":
+                continue
+            if stemmed[start - 1] != " " and (len(pattern) < COMPOUND_MIN_LENGTH or " " in pattern):
+                continue
+            matches.append((start, end, value))
+
+        found: Dict[str, List[str]] = {}
+        matched = set()
+        for start, end, (word, category) in sorted(matches):
+            # 'halte' inside 'bushalte' or 'veilig' inside 'onveilig' is part of the longer match
+            if any(other_start <= start and end <= other_end and (other_start, other_end) != (start, end)
+                   for other_start, other_end, _ in matches):
+                continue
+            first = stemmed.count(" ", 0, start) - 1
+            last = stemmed.count(" ", 0, end) - 1
+            if NEGATIONS & set(words[max(first - NEGATION_WINDOW, 0):first]):
+                continue
+            matched.update(range(first, last + 1))
+            if word not in found.setdefault(category, []):
+                found[category].append(word)
+
+        content = [index for index, word in enumerate(words) if word not in EMPTY_WORDS]
+        coverage = len(matched.intersection(content)) / len(content) if content else 0.0
+        return found, coverage
+
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """
+        Find the vocabulary words in a text, leaving out negated ones.
+
+        Returns:
+            Dict[str, List[str]]: Category to the keywords found, in order of appearance
+        """
+        return self._scan(text)[0]
+
+    def _classify(self, text: str) -> Optional[str]:
+        if not self.model_path:
+            return None
+        with self._model_lock:
+            prediction = self._load_model()(text)
+        if isinstance(prediction, list):
+            prediction = prediction[0]
+        if prediction["label"] in self.categories and prediction["score"] >= self.threshold:
+            return prediction["label"]
+        return None
+
+    def _store(self, key: str, keywords: Optional[List[str]], source: str) -> Optional[List[str]]:
+        with self._lock:
+            self.cache[key] = {"keywords": keywords, "source": source, "used": time.time()}
+            self.hits[source] += 1
+            self._evict()
+        return keywords
+
+    def extract(self, text: str) -> Tuple[bool, Optional[List[str]]]:
+        """
+        Extract the keywords of an answer locally.
+
+        Returns:
+            Tuple[bool, Optional[List[str]]]: Whether the answer is covered, and its keywords
+                (None for no keywords); an answer that isn't covered needs the LLM
+        """
+        key = normalize(text)
+        with self._lock:
+            cached = self.cache.get(key)
+            if cached is not None:
+                cached["used"] = time.time()
+                self.hits["cache"] += 1
+                return True, cached["keywords"]
+
+        words = key.split()
+        if not words or key in NON_ANSWERS or all(word in EMPTY_WORDS for word in words):
+            return True, self._store(key, None, "empty")
+
+        found, coverage = self._scan(text)
+        if found and coverage >= self.min_coverage:
+            return True, self._store(key, [word for words in found.values() for word in words], "local")
+
+        category = self._classify(text)
+        if category is not None:
+            return True, self._store(key, [category.lower()], "classifier")
+        return False, None
+
+    def remember(self, text: str, keywords: Optional[List[str]]) -> None:
+        """Cache the LLM's keywords for an answer the local engine didn't cover."""
+        self._store(normalize(text), keywords, "llm")
+
+    def report(self) -> None:
+        """Print where the keywords of this run came from."""
+        total = sum(self.hits.values())
+        if total:
+            print(f"\n[keywords] {total} answers: " + ", ".join(f"{count} {source}" for source, count in self.hits.items()))
@@ -1,31 +1,72 @@
 import os
-from typing import List, Dict
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import groq
 from datetime import datetime
 
+from metrics import TaskMetrics
+from model_router import BENCH_ROUTES, ModelRouter
+from turn_classifier import TurnClassifier
 
-class LLMAgent:
-    def __init__(self):
-        """Initialize the LLM Agent with Groq client."""
-        self.client = groq.Client(api_key=os.environ.get("GROQ_API_KEY"))
-        self.model = "llama-3.3-70b-versatile"  
+FALLBACK_RESPONSE = "Ik lijk even in gedachten verzonken te zijn. Misschien kunnen we straks weer verder praten?"
 
-    def generate_response(self, 
-                         prompt: str,
-                         user_message: str, 
-                         conversation_history: List[Dict[str, str]] = None, 
-                         follow_up_question: str = None) -> str:
+# The evaluator's verdict as a whole word, e.g. "Ja", "'Nee'." or "Off-topic"
+VERDICT_RE = re.compile(r"\b(ja|nee|off|einde)\b")
+
+# A sentence ends at ., ! or ? (optionally followed by closing quotes/brackets) and whitespace
+SENTENCE_END = re.compile(r"(?<=[.!?…])[\"')\]]*\s+")
+
+
+def stream_sentences(chunks: Iterable[str], min_length: int = 20) -> Iterator[str]:
+    """
+    Regroup a stream of text fragments into whole sentences.
+
+    Args:
+        chunks: Text fragments in order, e.g. streamed LLM tokens
+        min_length: Sentences shorter than this are joined with the next one
+
+    Yields:
+        str: Complete sentences, as soon as their end is seen
+    """
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        start = 0
+        for match in SENTENCE_END.finditer(pending):
+            if match.end() - start >= min_length:
+                yield pending[start:match.end()].strip()
+                start = match.end()
+        pending = pending[start:]
+    if pending.strip():
+        yield pending.strip()
+
+
+class LLMAgent:
+    def __init__(self, classifier: TurnClassifier = None, routes: Dict = None, metrics: TaskMetrics = None):
         """
-        Generate a contextual response using Groq's chat completion.
-        
+        Initialize the LLM Agent with Groq client.
+
+        Evaluation runs on the small model and replies on the large one; each
+        task falls back to the other model when its call fails (see BENCH_ROUTES).
+
         Args:
-            user_message: The current message from the user
-            conversation_history: Previous conversation messages
-            follow_up_question: Optional next question to include
-            
-        Returns:
-            str: Generated response from the AI
+            classifier: Local turn classifier tried before the remote evaluator
+                (defaults to the keyword cascade, plus a model if TURN_CLASSIFIER_MODEL is set)
+            routes: Task name to ModelRoute, overriding BENCH_ROUTES
+            metrics: Collects latency, tokens and cost per task and model
         """
+        self.client = groq.Client(api_key=os.environ.get("GROQ_API_KEY"))
+        self.async_client = groq.AsyncClient(api_key=os.environ.get("GROQ_API_KEY"))
+        self.classifier = classifier if classifier is not None else TurnClassifier()
+        self.metrics = metrics if metrics is not None else TaskMetrics("llm")
+        self.router = ModelRouter(self.client, self.async_client, dict(BENCH_ROUTES, **(routes or {})), self.metrics)
+
+    def _build_response_messages(self,
+                                 prompt: str,
+                                 user_message: str,
+                                 conversation_history: List[Dict[str, str]] = None,
+                                 follow_up_question: str = None) -> List[Dict[str, str]]:
+        """Construct the chat messages for generate_response and generate_response_stream."""
         if conversation_history is None:
             conversation_history = []
             
@@ -71,47 +112,68 @@ Jouw taak:"""
                 
         # Add the current user message
         messages.append({"role": "user", "content": user_message})
+        return messages
+
+    def generate_response(self, 
+                         prompt: str,
+                         user_message: str, 
+                         conversation_history: List[Dict[str, str]] = None, 
+                         follow_up_question: str = None) -> str:
+        """
+        Generate a contextual response using Groq's chat completion.
+        
+        Args:
+            user_message: The current message from the user
+            conversation_history: Previous conversation messages
+            follow_up_question: Optional next question to include
+            
+        Returns:
+            str: Generated response from the AI
+        """
+        messages = self._build_response_messages(prompt, user_message, conversation_history, follow_up_question)
         
         try:
             # Generate response using Groq
-            chat_completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=150,
-                top_p=0.9,
-                stream=False
-            )
-            
-            response = chat_completion.choices[0].message.content
-            
-            return response
+            return self.router.complete("generate", messages)
             
         except Exception as e:
             print(f"Fout bij het genereren van een reactie: {str(e)}")
-            return "Ik lijk even in gedachten verzonken te zijn. Misschien kunnen we straks weer verder praten?"
-    
-    def evaluate_response(self, 
-                          user_message: str, 
-                          conversation_history: List[Dict[str, str]] = None, 
-                          current_question: str = None, 
-                          temperature: float = 0.0, 
-                          max_tokens: int = 15, 
-                          top_p: float = 0.9) -> str:
+            return FALLBACK_RESPONSE
+
+    def generate_response_stream(self,
+                                 prompt: str,
+                                 user_message: str,
+                                 conversation_history: List[Dict[str, str]] = None,
+                                 follow_up_question: str = None) -> Iterator[str]:
         """
-        Use Groq's chat completion API to determine if a response is complete.
-        
+        Generate a contextual response, yielding text fragments as Groq streams them.
+
         Args:
-            user_message: The current message or response from the user.
-            conversation_history: Previous messages exchanged.
-            current_question: The current question being discussed.
-            temperature: Sampling temperature.
-            max_tokens: Maximum number of tokens in the response.
-            top_p: Top-p sampling value.
+            user_message: The current message from the user
+            conversation_history: Previous conversation messages
+            follow_up_question: Optional next question to include
 
-        Returns:
-            str: "Yes," "No," or "Off" based on the evaluation.
+        Yields:
+            str: Fragments of the generated response
         """
+        messages = self._build_response_messages(prompt, user_message, conversation_history, follow_up_question)
+
+        produced = False
+        try:
+            for delta in self.router.stream("generate", messages):
+                produced = True
+                yield delta
+
+        except Exception as e:
+            print(f"Fout bij het genereren van een reactie: {str(e)}")
+            if not produced:
+                yield FALLBACK_RESPONSE
+    
+    def _build_evaluation_messages(self,
+                                   user_message: str,
+                                   conversation_history: List[Dict[str, str]] = None,
+                                   current_question: str = None) -> List[Dict[str, str]]:
+        """Construct the chat messages for evaluate_response and aevaluate_response."""
         if conversation_history is None:
             conversation_history = []
 
@@ -132,33 +194,136 @@ Geef een oordeel in het volgende formaat: 'Ja', 'Nee', 'Off', 'Einde'.
             if "bank" in msg:
                 messages.append({"role": "assistant", "content": msg["bank"]})
         messages.append({"role": "user", "content": f"Vraag: {current_question}\nReactie: {user_message}"})
+        return messages
+
+    @staticmethod
+    def _parse_evaluation(evaluation: str) -> str:
+        """Normalize the evaluator's answer to "Ja", "Nee", "Off" or "Einde"."""
+        match = VERDICT_RE.search(evaluation.strip().lower())
+        if match:
+            return match.group(1).capitalize()
+        return "Nee"  # Default to "No" if the response is ambiguous
 
+    @staticmethod
+    def _is_verdict(evaluation: str) -> bool:
+        """Whether the evaluator's answer contains a verdict; otherwise the next model is asked."""
+        return VERDICT_RE.search(evaluation.strip().lower()) is not None
+
+    def classify_turn(self, user_message: str, current_question: str = None) -> Optional[Tuple[str, float]]:
+        """
+        Run the local classifier.
+
+        Returns:
+            Tuple[str, float]: The verdict and its confidence, or None when the classifier failed
+        """
         try:
-            chat_completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                top_p=top_p,
-                stream=False
-            )
-            evaluation = chat_completion.choices[0].message.content.strip()
-            
-            # Normalize the response to ensure it is "Yes," "No," or "Off"
-            evaluation_lower = evaluation.lower()
-            if "ja" in evaluation_lower:
-                return "Ja"
-            elif "nee" in evaluation_lower:
-                return "Nee"
-            elif "off" in evaluation_lower:
-                return "Off"
-            elif "einde" in evaluation_lower:
-                return "Einde"
-            else:
-                return "Nee"  # Default to "No" if the response is ambiguous
+            return self.classifier.classify(user_message, current_question)
+        except Exception as e:
+            print(f"Error in local turn classifier: {e}")
+            return None
+
+    def classify_locally(self, user_message: str, current_question: str = None,
+                         classification: Tuple[str, float] = None):
+        """
+        Try the local classifier first.
+
+        Args:
+            classification: Result of classify_turn when the caller already has it
+
+        Returns:
+            str: The verdict when the classifier is confident, otherwise None
+        """
+        if classification is None:
+            classification = self.classify_turn(user_message, current_question)
+        if classification is None:
+            return None
+        verdict, confidence = classification
+        if self.classifier.is_confident(confidence):
+            print(f"Local classifier: {verdict} ({confidence:.2f})")
+            return verdict
+        return None
+
+    def evaluate_response(self, 
+                          user_message: str, 
+                          conversation_history: List[Dict[str, str]] = None, 
+                          current_question: str = None, 
+                          temperature: float = 0.0, 
+                          max_tokens: int = 15, 
+                          top_p: float = 0.9) -> str:
+        """
+        Determine if a response is complete, using the local classifier when it is
+        confident and Groq's chat completion API otherwise.
+        
+        Args:
+            user_message: The current message or response from the user.
+            conversation_history: Previous messages exchanged.
+            current_question: The current question being discussed.
+            temperature: Sampling temperature.
+            max_tokens: Maximum number of tokens in the response.
+            top_p: Top-p sampling value.
+
+        Returns:
+            str: "Ja", "Nee", "Off" or "Einde" based on the evaluation.
+        """
+        verdict = self.classify_locally(user_message, current_question)
+        if verdict is not None:
+            return verdict
+
+        messages = self._build_evaluation_messages(user_message, conversation_history, current_question)
+
+        try:
+            evaluation = self.router.complete("evaluate", messages, validate=self._is_verdict,
+                                              temperature=temperature, max_tokens=max_tokens, top_p=top_p)
+            return self._parse_evaluation(evaluation)
         except Exception as e:
             return "Nee"  # Fallback to "No" in case of an error
 
+    async def aevaluate_response(self,
+                                 user_message: str,
+                                 conversation_history: List[Dict[str, str]] = None,
+                                 current_question: str = None,
+                                 classification: Tuple[str, float] = None) -> str:
+        """
+        Asynchronous evaluate_response; cancelling the coroutine aborts the request.
+
+        Args:
+            classification: Local classifier result from classify_turn, so it isn't run twice
+
+        Returns:
+            str: "Ja", "Nee", "Off" or "Einde" based on the evaluation.
+        """
+        verdict = self.classify_locally(user_message, current_question, classification)
+        if verdict is not None:
+            return verdict
+
+        messages = self._build_evaluation_messages(user_message, conversation_history, current_question)
+
+        try:
+            evaluation = await self.router.acomplete("evaluate", messages, validate=self._is_verdict)
+            return self._parse_evaluation(evaluation)
+        except Exception as e:
+            return "Nee"  # Fallback to "No" in case of an error
+
+    async def agenerate_response(self,
+                                 prompt: str,
+                                 user_message: str,
+                                 conversation_history: List[Dict[str, str]] = None,
+                                 follow_up_question: str = None) -> str:
+        """
+        Asynchronous generate_response; cancelling the coroutine aborts the request.
+
+        Returns:
+            str: Generated response from the AI
+        """
+        messages = self._build_response_messages(prompt, user_message, conversation_history, follow_up_question)
+
+        try:
+            return await self.router.acomplete("generate", messages)
+
+        except Exception as e:
+            print(f"Fout bij het genereren van een reactie: {str(e)}")
+            return FALLBACK_RESPONSE
+
     def _get_time_of_day(self) -> str:
         """Determine the current time of day."""
         uur = datetime.now().hour
@@ -1,58 +1,162 @@
-from typing import List, Dict, Tuple
+from concurrent.futures import Future
+from typing import Iterator, List, Dict, Optional, Tuple
+import json
 import re
+import sys
 import groq
-import requests
 import os
-from datetime import datetime
+
+from analysis_checkpoint import AnalysisCheckpoint, end_time
+from api_client import APIClient
+from keyword_matcher import KeywordMatcher
+from metrics import TaskMetrics
+from model_router import CLOUD_ROUTES, ModelRouter
+from question_cache import QuestionCache
+from rate_limit import RateLimitGate, RateLimited
+from token_manager import TokenManager
+from work_pool import WorkPool
+
+SENTIMENT_RE = re.compile(r"SENTIMENT: (\d+)")
+KEYWORDS_MARKER = "Geëxtraheerde trefwoorden:"
+
+# Groq and backend calls in flight at the same time
+WORKERS = int(os.environ.get("SS_WORKERS", "8"))
+
+KEYWORD_CATEGORIES = """- Openbaar Vervoer (bus, metro, trein, verkeer, parkeren)
+- Toerisme (museum, bezienswaardigheden, monumenten, hotels)
+- Infrastructuur (wegen, bruggen, bouw, netheid)
+- Veiligheid (criminaliteit, politie, verlichting, ongelukken)
+..."""
+
+# Batched keyword extraction: estimated answer tokens per request, and answers per request so the
+# JSON reply (about KEYWORD_REPLY_TOKENS per answer) fits in the route's max_tokens
+KEYWORD_BATCH_TOKENS = 1500
+KEYWORD_REPLY_TOKENS = 30
+KEYWORD_BATCH_SIZE = CLOUD_ROUTES["keywords_batch"].max_tokens // KEYWORD_REPLY_TOKENS
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token), good enough for splitting batches."""
+    return len(text) // 4 + 1
+
+
+def keyword_batches(answers: List[Dict]) -> List[List[Dict]]:
+    """Split answers into batches that stay within the keyword batch token budget."""
+    batches = []
+    batch, tokens = [], 0
+    for answer in answers:
+        cost = estimate_tokens(answer['response']) + 10  # id and JSON around the text
+        if batch and (tokens + cost > KEYWORD_BATCH_TOKENS or len(batch) >= KEYWORD_BATCH_SIZE):
+            batches.append(batch)
+            batch, tokens = [], 0
+        batch.append(answer)
+        tokens += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+# Combined analysis: tries of the whole model chain before falling back to separate calls,
+# and the reply tokens for the sentiment and summary on top of the keywords
+ANALYSIS_ATTEMPTS = 2
+ANALYSIS_REPLY_TOKENS = 250
+
+
+def parse_analysis(text: str, count: int) -> Optional[Tuple[int, str, Dict[int, Optional[List[str]]]]]:
+    """
+    Parse the JSON reply of a combined conversation analysis.
+
+    Args:
+        text: Model output, {"sentiment": <1-100>, "summary": "...", "answers": [{"id": <n>, "keywords": [...]}]}
+        count: Number of answers in the conversation, numbered from 1
+
+    Returns:
+        Optional[Tuple[int, str, Dict[int, Optional[List[str]]]]]: Sentiment, summary and keywords per
+            answer number, None when the reply is not valid
+    """
+    keywords = parse_keyword_batch(text, count)
+    if keywords is None:
+        return None
+    data = json.loads(text)
+    score = data.get("sentiment")
+    if isinstance(score, str) and score.strip().isdigit():
+        score = int(score)
+    summary = data.get("summary")
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not isinstance(summary, str) or not summary.strip():
+        return None
+    return max(1, min(int(score), 100)), summary.strip(), keywords
+
+
+def parse_keyword_batch(text: str, count: int) -> Optional[Dict[int, Optional[List[str]]]]:
+    """
+    Parse the JSON reply of a keyword batch.
+
+    Args:
+        text: Model output, {"answers": [{"id": <n>, "keywords": [...]}, ...]}
+        count: Number of answers in the batch, numbered from 1
+
+    Returns:
+        Optional[Dict[int, Optional[List[str]]]]: Keywords per answer number (None for no keywords);
+            answers the model left out are missing, None when the reply is not valid JSON
+    """
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    items = data.get("answers") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return None
+    result = {}
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get("keywords"), list):
+            continue
+        number = item.get("id")
+        if isinstance(number, int) and 1 <= number <= count:
+            keywords = [str(keyword).strip() for keyword in item["keywords"] if str(keyword).strip()]
+            result[number] = keywords or None
+    return result
 
 class SSAgent:
         def __init__(self):
             """Initialize the SS Agent with Groq client."""
             self.client = groq.Client(api_key=os.environ.get("GROQ_API_KEY"))
-            self.model = "llama-3.1-8b-instant" 
+            # Small model first, the large one only when the small one's output can't be parsed
+            self.metrics = TaskMetrics("ss")
+            self.router = ModelRouter(self.client, routes=CLOUD_ROUTES, metrics=self.metrics)
             self.last_conversation = None
             self.conversation_id = None
             self.answers = None
             self.questions = None
             self.conversation_history=None
             self.api_base_url = "https://frankdepratendebank.azurewebsites.net/api/"
-            self.headers = {
-            "Authorization": "",
-            "Content-Type": "application/json",
-        }
+            # Sized for the worker pool; a 429 from the backend pauses every worker
+            self.api = APIClient(self.api_base_url, name="ss api", pool_size=WORKERS, gate=RateLimitGate("backend"))
+            self.pool = WorkPool(WORKERS, name="ss pool")
+            # Keywords from the category vocabulary without an LLM call, cached by answer text
+            self.keyword_matcher = KeywordMatcher()
+            # Cached on disk between runs and refreshed before it expires
+            self.tokens = TokenManager(self.api)
+            # All questions, shared by every conversation that is analyzed
+            self.question_cache = QuestionCache(self.api, "questions", headers=lambda: self.headers)
+            # How far the batch analysis got, so a run only looks at conversations that ended since
+            self.checkpoint = AnalysisCheckpoint(self.api)
+
+        @property
+        def headers(self) -> Dict[str, str]:
+            """Request headers with a valid bearer token."""
+            return self.tokens.headers()
             
         # Fetch Token
         def fetch_token(self) -> None:
-            """Fetch the last conversation for analysis."""
-            email = "john.doe@example.com"
-            password = "hashedpassword1"
-            API_KEY = os.environ.get("API_KEY")
-
-            url = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={API_KEY}"
-
-            payload = {
-                "email": email,
-                "password": password,
-                "returnSecureToken":True
-            }
-            print(url)
-
-            response = requests.post(url, json=payload)
-            token = response.json()
-            if "idToken" in token:
-                self.headers = {
-                    "Authorization": "Bearer " + token['idToken'],
-                    "Content-Type": "application/json",
-                    }
-                print("Bearer token:", token['idToken'])
-            else:
-                print("Error: ", token)
+            """Make sure a valid bearer token is available and keep it fresh from now on."""
+            self.tokens.token()
+            self.tokens.start()
 
         # Get Conversations  
         def fetch_last_conversation(self) -> None:
             """Fetch the last conversation for analysis."""
-            url = f"{self.api_base_url}/conversations"
-            response = requests.get(url, headers=self.headers)
+            url = "conversations"
+            response = self.api.get(url, headers=self.headers)
 
             
             if response.status_code == 200:
@@ -61,30 +165,62 @@ class SSAgent:
                 convo for convo in conversations if convo['endDatetime'] is not None
                 ]
                 if conversations_with_end_datetime:
-                    # Sort conversations by 'end_datetime' in descending order and get the most recent one
-                    conversations_with_end_datetime.sort(
-                        key=lambda x: datetime.fromisoformat(x['endDatetime']), reverse=True
-                    )
-                    self.last_conversation = conversations_with_end_datetime[0]  # Get the most recent conversation
+                    # The most recent conversation by 'end_datetime'
+                    self.last_conversation = max(conversations_with_end_datetime, key=end_time)
                     self.conversation_id = self.last_conversation['id']
                     print(f"Fetched last conversation: {self.last_conversation}")
                 else:
                     print("No conversations with a valid 'end_datetime' found.")
             else:
                 raise Exception(f"Failed to fetch conversations: {response.status_code}")
+
+        def fetch_conversations(self, after_id: int = 0, page_size: int = 100) -> Iterator[Dict]:
+            """
+            Fetch the conversations with an id above after_id, page by page.
+
+            The page, pageSize and idAfter query parameters are assumptions
+            about the backend: the API is only known to list all conversations
+            on GET conversations. A backend that ignores them returns the
+            whole list at once; that is detected and the list is filtered
+            here instead, so the result is the same, only the transfer is not
+            incremental.
+
+            Args:
+                after_id: Highest conversation id that doesn't have to be fetched
+                page_size: Conversations per page
+
+            Returns:
+                Iterator[Dict]: The conversations, in the order the backend returns them
+            """
+            seen = set()
+            page = 1
+            while True:
+                params = {"page": page, "pageSize": page_size, "idAfter": after_id}
+                response = self.api.get("conversations", headers=self.headers, params=params)
+                if response.status_code != 200:
+                    raise Exception(f"Failed to fetch conversations: {response.status_code}")
+                received = response.json()
+                conversations = [convo for convo in received if convo['id'] not in seen]
+                seen.update(convo['id'] for convo in conversations)
+                for convo in conversations:
+                    if convo['id'] > after_id:
+                        yield convo
+                # A short page is the last one; a page with nothing new means paging is not supported
+                if len(conversations) < page_size or len(received) > page_size:
+                    return
+                page += 1
+
+        @staticmethod
+        def needs_analysis(conversation: Dict) -> bool:
+            """True for an ended conversation without a sentiment score or summary."""
+            return (conversation['endDatetime'] is not None
+                    and (conversation.get('sentiment') is None or not conversation.get('summary')))
     
         # Get Questions
         def fetch_questions(self) -> None:
-            """Fetch all questions from the last conversation for analysis."""
-
-            url = f"{self.api_base_url}questions"
-            response = requests.get(url, headers=self.headers)
-
-            if response.status_code == 200:
-                self.questions = response.json()
-                print(f"Fetched {len(self.questions)} questions")
-            else:
-                raise Exception(f"Failed to fetch questions: {response.text}")
+            """Fetch all questions from the last conversation for analysis, from the local cache when possible."""
+            self.questions = self.question_cache.get()
+            print(f"Fetched {len(self.questions)} questions")
             
         # Get Answers
         def fetch_answers(self) -> None:
@@ -93,8 +229,8 @@ class SSAgent:
                 print("No conversation ID found. Please fetch the last conversation first.")
                 return
 
-            url = f"{self.api_base_url}answers/conversation/{self.conversation_id}"
-            response = requests.get(url, headers=self.headers)
+            url = f"answers/conversation/{self.conversation_id}"
+            response = self.api.get(url, headers=self.headers)
 
             if response.status_code == 200:
                 self.answers = response.json()
@@ -103,35 +239,56 @@ class SSAgent:
                 raise Exception(f"Failed to fetch answers: {response.text}")
             
         # Put Conversation
-        def update_conversation(self) -> None:
-            """Finalize the conversation by sending a PUT request with the end time."""
+        def update_conversation(self, conversation: Dict = None, conversation_history: List[Dict] = None) -> bool:
+            """
+            Score and summarize a conversation and save the result with a PUT request.
 
-            sentiment_score, conversation_summary = self.analyze_sentiment_and_summarize(self.conversation_history)
+            Args:
+                conversation: The conversation (defaults to the last fetched one)
+                conversation_history: Its questions and answers (defaults to the last created history)
 
-            url = f"{self.api_base_url}conversations/{self.conversation_id}"
+            Returns:
+                bool: True when the conversation was saved
+            """
+            conversation = conversation or self.last_conversation
+            if conversation_history is None:
+                conversation_history = self.conversation_history
+
+            sentiment_score, conversation_summary = self.analyze_sentiment_and_summarize(conversation_history)
+            return self.save_conversation(conversation, sentiment_score, conversation_summary)
+
+        def save_conversation(self, conversation: Dict, sentiment_score: int, conversation_summary: str) -> bool:
+            """Save a conversation's sentiment score and summary with a PUT request; returns whether it was saved."""
+            url = f"conversations/{conversation['id']}"
             payload = {
-                "id":self.last_conversation['id'],
-                "startDatetime": self.last_conversation['startDatetime'],
-                "endDatetime": self.last_conversation['endDatetime'],
+                "id":conversation['id'],
+                "startDatetime": conversation['startDatetime'],
+                "endDatetime": conversation['endDatetime'],
                 "sentiment": int(sentiment_score),
                 "summary": conversation_summary,
-                "benchId": self.last_conversation['benchId']
+                "benchId": conversation['benchId']
             }
 
     
             try:
-                response = requests.put(url, headers=self.headers, json=payload)
+                response = self.api.put(url, headers=self.headers, json=payload)
                 if response.status_code == 204:
-                    print(f"Conversation {self.conversation_id} successfully updated.")
+                    print(f"Conversation {conversation['id']} successfully updated.")
+                    return True
+                elif response.status_code == 429:
+                    raise RateLimited(f"Rate limited updating conversation {conversation['id']}")
                 else:
                     raise Exception(f"Failed to update conversation {response.content}")
+            except RateLimited:
+                raise
             except Exception as e:
                 print(f"Error finalizing conversation: {str(e)}")
+                return False
 
         # Put Answer
         def update_answer_with_keywords(self, answer, keywords: list) -> None:
             """Update an existing answer with a new response and attach extracted keywords."""
-            url = f"{self.api_base_url}answers/{answer['id']}"
+            url = f"answers/{answer['id']}"
     
             # If the keywords list is empty or contains ['[]'], we set it to None
             if not keywords or keywords == ['[]']:
@@ -148,10 +305,12 @@ class SSAgent:
             print(payload)
     
             # Send the PUT request with the updated data
-            response = requests.put(url, json=payload, headers=self.headers)
+            response = self.api.put(url, json=payload, headers=self.headers)
 
             if response.status_code == 204:
                 print(f"Successfully updated answer {answer['id']} with new response and keywords.")
+            elif response.status_code == 429:
+                raise RateLimited(f"Rate limited updating answer {answer['id']}")
             else:
                 raise Exception(f"Failed to update answer {answer['id']}: {response.text}")
            
@@ -174,10 +333,14 @@ class SSAgent:
         
                 # Fetch all questions for the conversation
                 self.fetch_questions()
-                questions = self.questions
+
+                # A question added since the list was cached: fetch the list again
+                if any(answer['questionId'] not in self.question_cache.by_id for answer in answers):
+                    self.question_cache.revalidate()
+                    self.questions = self.question_cache.questions
         
-                # Create a lookup dictionary for questions using their IDs
-                question_lookup = {q['id']: q for q in questions}
+                # Lookup dictionary for questions using their IDs
+                question_lookup = self.question_cache.by_id
         
                 # Create conversation history directly from answers
                 conversation_history = []
@@ -234,21 +397,16 @@ class SSAgent:
                     messages.append({"role": "user", "content": msg["user"]})
 
 
-            chat_completion = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=0.4,
-                    max_tokens=150,  # Allocate tokens
-                    top_p=0.9,
-                    stream=False
+            response = self.router.complete(
+                    "summary", messages, validate=lambda text: SENTIMENT_RE.search(text) is not None
                 )
 
 
             try:
-                response = chat_completion.choices[0].message.content.strip()
+                response = response.strip()
         
                 # Extract sentiment score and summary
-                sentiment_match = re.search(r"SENTIMENT: (\d+)", response)
+                sentiment_match = SENTIMENT_RE.search(response)
                 summary_match = re.search(r"SAMENVATTING: (.*)", response, re.DOTALL)
         
                 score = int(sentiment_match.group(1)) if sentiment_match else 50
@@ -268,11 +426,7 @@ class SSAgent:
             Je bent een AI die relevante trefwoorden extraheert uit gebruikersreacties om feedback over een stad te classificeren.
 Extraheer **alle relevante trefwoorden** uit de reactie op basis van de volgende categorieën:
 
-- Openbaar Vervoer (bus, metro, trein, verkeer, parkeren)
-- Toerisme (museum, bezienswaardigheden, monumenten, hotels)
-- Infrastructuur (wegen, bruggen, bouw, netheid)
-- Veiligheid (criminaliteit, politie, verlichting, ongelukken)
-...
+{KEYWORD_CATEGORIES}
 
 ### Gebruikersreactie:
 "{answer}"
@@ -285,19 +439,19 @@ Geëxtraheerde trefwoorden: [verkeer, parkeren]
             """
 
             # Sending the request to the API
-            chat_completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "system", "content": "Je bent een assistent voor trefwoordextractie."},
-                        {"role": "user", "content": prompt}],
-                temperature=0.0
+            response_content = self.router.complete(
+                "keywords",
+                [{"role": "system", "content": "Je bent een assistent voor trefwoordextractie."},
+                 {"role": "user", "content": prompt}],
+                validate=lambda text: KEYWORDS_MARKER in text
             )
             extracted_keywords_list = None
             try:
                 # Extract keywords from the response, assuming the content is a comma-separated list
-                response_content = chat_completion.choices[0].message.content.strip()
-                if "Geëxtraheerde trefwoorden:" in response_content:
+                response_content = response_content.strip()
+                if KEYWORDS_MARKER in response_content:
                     # Extract everything after "Geëxtraheerde trefwoorden:"
-                    response_content = response_content.split("Geëxtraheerde trefwoorden:")[1].strip()
+                    response_content = response_content.split(KEYWORDS_MARKER)[1].strip()
 
                     # If the response is "None", return None
                     if response_content.lower() == "none":
@@ -311,35 +465,287 @@ Geëxtraheerde trefwoorden: [verkeer, parkeren]
             except KeyError as e:
                 raise Exception(f"Error in processing response: {e}")
 
-        def run(self) -> None:
-            """Run the SS Agent to process the conversation and provide analysis."""
+        def extract_keywords_batch(self, answers: List[str]) -> List[Optional[List[str]]]:
+            """
+            Extract the keywords of several answers with one LLM call.
+
+            The category instructions are sent once for the whole batch and the
+            model answers with JSON, keywords per numbered answer. Answers the
+            reply leaves out, or the whole batch when the reply can't be parsed,
+            fall back to extract_keywords() one answer at a time.
+
+            Args:
+                answers: Answer texts, small enough together to fit in one request (see keyword_batches)
+
+            Returns:
+                List[Optional[List[str]]]: Keywords per answer, in the same order
+            """
+            numbered = [{"id": number, "text": answer} for number, answer in enumerate(answers, start=1)]
+            prompt = f"""
+Je bent een AI die relevante trefwoorden extraheert uit gebruikersreacties om feedback over een stad te classificeren.
+Extraheer voor elke reactie **alle relevante trefwoorden** op basis van de volgende categorieën:
+
+{KEYWORD_CATEGORIES}
+
+### Gebruikersreacties (JSON):
+{json.dumps(numbered, ensure_ascii=False)}
+
+Antwoord alleen met JSON in dit formaat, met één item per reactie en een lege lijst als er geen trefwoorden zijn:
+{{"answers": [{{"id": 1, "keywords": ["verkeer", "parkeren"]}}, {{"id": 2, "keywords": []}}]}}
+            """
+
+            parsed = {}
             try:
+                response_content = self.router.complete(
+                    "keywords_batch",
+                    [{"role": "system", "content": "Je bent een assistent voor trefwoordextractie."},
+                     {"role": "user", "content": prompt}],
+                    validate=lambda text: parse_keyword_batch(text, len(answers)) is not None,
+                    response_format={"type": "json_object"},
+                )
+                parsed = parse_keyword_batch(response_content, len(answers))
+            except RateLimited:
+                raise
+            except Exception as e:
+                print(f"Batched keyword extraction failed, extracting one answer at a time: {str(e)}")
 
-                # Fetch bearer token
+            missing = [number for number in range(1, len(answers) + 1) if number not in parsed]
+            if parsed and missing:
+                print(f"Keyword batch left out {len(missing)} of {len(answers)} answers, extracting those one at a time")
+            for number in missing:
+                parsed[number] = self.extract_keywords(answers[number - 1])
+            return [parsed[number] for number in range(1, len(answers) + 1)]
+
+        def analyze_combined(self, conversation: Dict, conversation_history: List[Dict], answers: List[Dict]) -> bool:
+            """
+            Score, summarize and extract the keywords of a conversation with one LLM call.
+
+            The model returns the sentiment, the summary and the keywords per
+            answer as one JSON object; keywords are only asked for answers the
+            local keyword matcher doesn't cover. A reply that doesn't validate escalates
+            along the model chain, and the chain is tried ANALYSIS_ATTEMPTS
+            times; after that the conversation falls back to a summary call
+            and a keyword batch. Answers the reply leaves out get their
+            keywords from a batch of their own.
+
+            Args:
+                conversation: The conversation to update
+                conversation_history: Its questions and answers, for the fallback
+                answers: Its answers, small enough together to fit in one request (see keyword_batches)
+
+            Returns:
+                bool: True when the conversation was saved
+            """
+            keywords = {}
+            todo = []
+            for number, answer in enumerate(answers, start=1):
+                covered, answer_keywords = self.keyword_matcher.extract(answer['response'])
+                if covered:
+                    keywords[number] = answer_keywords
+                else:
+                    todo.append(number)
+            if todo:
+                keyword_task = (f"3. Extraheer voor de antwoorden met id {', '.join(str(number) for number in todo)} "
+                                f"**alle relevante trefwoorden** op basis van de volgende categorieën:\n\n{KEYWORD_CATEGORIES}\n")
+            else:
+                keyword_task = "3. Trefwoorden zijn niet nodig, geef een lege lijst bij \"answers\".\n"
+
+            question_lookup = self.question_cache.by_id
+            numbered = [
+                {"id": number,
+                 "vraag": question_lookup.get(answer['questionId'], {}).get('text'),
+                 "antwoord": answer['response']}
+                for number, answer in enumerate(answers, start=1)
+            ]
+            prompt = f"""
+Je bent een AI-assistent die gesprekken tussen een pratende bank en een bezoeker analyseert. Voer de volgende taken uit:
+1. Geef een positiviteitsscore tussen 1 en 100 op basis van het sentiment van het gesprek.
+2. Genereer een korte en coherente samenvatting van de reacties van de gebruiker.
+{keyword_task}
+### Gesprek (JSON, vragen van de bank en antwoorden van de bezoeker):
+{json.dumps(numbered, ensure_ascii=False)}
+
+Antwoord alleen met JSON in dit formaat, met één item per gevraagd antwoord en een lege lijst als er geen trefwoorden zijn:
+{{"sentiment": 72, "summary": "<tekst>", "answers": [{{"id": 1, "keywords": ["verkeer", "parkeren"]}}, {{"id": 2, "keywords": []}}]}}
+            """
+            messages = [{"role": "system", "content": "Je bent een assistent voor gespreksanalyse."},
+                        {"role": "user", "content": prompt}]
+
+            analysis = None
+            for attempt in range(ANALYSIS_ATTEMPTS):
+                try:
+                    response_content = self.router.complete(
+                        "analysis", messages,
+                        validate=lambda text: parse_analysis(text, len(answers)) is not None,
+                        response_format={"type": "json_object"},
+                        max_tokens=ANALYSIS_REPLY_TOKENS + KEYWORD_REPLY_TOKENS * len(todo),
+                        # A retry samples a little so it doesn't repeat the same invalid reply
+                        temperature=0.3 if attempt else None,
+                    )
+                    analysis = parse_analysis(response_content, len(answers))
+                    break
+                except RateLimited:
+                    raise
+                except Exception as e:
+                    print(f"Combined analysis of conversation {conversation['id']} failed "
+                          f"(attempt {attempt + 1} of {ANALYSIS_ATTEMPTS}): {str(e)}")
+
+            if analysis is None:
+                ok = self.update_conversation(conversation, conversation_history)
+                self.tag_answers(answers)
+                return ok
+
+            sentiment_score, conversation_summary, parsed = analysis
+            ok = self.save_conversation(conversation, sentiment_score, conversation_summary)
+
+            for number in todo:
+                if number in parsed:
+                    keywords[number] = parsed[number]
+                    self.keyword_matcher.remember(answers[number - 1]['response'], parsed[number])
+            missing = [answer for number, answer in enumerate(answers, start=1) if number not in keywords]
+            for number, answer in enumerate(answers, start=1):
+                if number in keywords:
+                    self.update_answer_with_keywords(answer, keywords[number])
+            if missing:
+                print(f"Combined analysis left out {len(missing)} of {len(answers)} answers, extracting those separately")
+                self.tag_answers(missing)
+            return ok
+
+        def tag_answers(self, answers: List[Dict]) -> bool:
+            """Extract the keywords of a batch of answers, locally or with one LLM call for the rest, and save them."""
+            keywords = {}
+            uncovered = []
+            for index, answer in enumerate(answers):
+                covered, answer_keywords = self.keyword_matcher.extract(answer['response'])
+                if covered:
+                    keywords[index] = answer_keywords
+                else:
+                    uncovered.append(index)
+
+            if uncovered:
+                extracted = self.extract_keywords_batch([answers[index]['response'] for index in uncovered])
+                for index, answer_keywords in zip(uncovered, extracted):
+                    keywords[index] = answer_keywords
+                    self.keyword_matcher.remember(answers[index]['response'], answer_keywords)
+
+            for index, answer in enumerate(answers):
+                self.update_answer_with_keywords(answer, keywords[index])
+            return True
+
+        def queue_analysis(self, conversation: Dict) -> List[Future]:
+            """
+            Fetch a conversation's answers and queue its LLM and update calls on the worker pool.
+
+            A conversation whose answers fit in one request is analyzed with a
+            single combined call. A longer one gets a summary call and keyword
+            batches, which run concurrently, bounded by the pool size.
+
+            Returns:
+                List[Future]: The futures of the conversation's calls
+            """
+            self.last_conversation = conversation
+            self.conversation_id = conversation['id']
+
+            # Create conversation history
+            self.create_conversation_history()
+
+            answers = [answer for answer in self.answers if answer]  # Ensure the answer is not empty
+            batches = keyword_batches(answers)
+            if len(batches) == 1:
+                return [self.pool.submit(self.analyze_combined, conversation, self.conversation_history, answers)]
+
+            # Update the conversation with sentiment score and summary
+            futures = [self.pool.submit(self.update_conversation, conversation, self.conversation_history)]
+
+            # Extract and save the keywords of every answer, many answers per LLM call
+            for batch in batches:
+                futures.append(self.pool.submit(self.tag_answers, batch))
+            return futures
+
+        def analyze_conversation(self, conversation: Dict) -> bool:
+            """
+            Score and summarize one conversation and extract the keywords of its answers.
+
+            Returns:
+                bool: True when the conversation and all its answers were updated
+            """
+            return WorkPool.succeeded(self.queue_analysis(conversation))
+
+        def run_batch(self, page_size: int = 100) -> None:
+            """
+            Analyze every ended conversation that has no sentiment or summary yet.
+
+            Only conversations the checkpoint hasn't settled are fetched: new
+            ids, and earlier ones that were still open or failed. They are
+            queued on the worker pool, so many conversations are analyzed at
+            the same time. Conversations that are still open or fail stay
+            open in the checkpoint and are looked at again on the next run.
+            """
+            try:
                 self.fetch_token()
-                # Fetch the last conversation
-                self.fetch_last_conversation()
 
-                # Create conversation history
-                self.create_conversation_history()
+                new = [convo for convo in self.fetch_conversations(self.checkpoint.floor, page_size)
+                       if self.checkpoint.wants(convo)]
+                new.sort(key=lambda convo: convo['id'])
+                todo = [convo for convo in new if self.needs_analysis(convo)]
+                print(f"{len(new)} conversations since id {self.checkpoint.floor}, {len(todo)} to analyze")
+
+                queued = []
+                for convo in new:
+                    if convo['endDatetime'] is None:
+                        self.checkpoint.hold(convo)
+                    elif not self.needs_analysis(convo):
+                        self.checkpoint.settle(convo)
+                    else:
+                        try:
+                            queued.append((convo, self.queue_analysis(convo)))
+                        except Exception as e:
+                            print(f"Error analyzing conversation {convo['id']}: {str(e)}")
+                            self.checkpoint.hold(convo)
+
+                analyzed = failed = 0
+                for convo, futures in queued:
+                    if WorkPool.succeeded(futures):
+                        analyzed += 1
+                        self.checkpoint.settle(convo)
+                    else:
+                        failed += 1
+                        self.checkpoint.hold(convo)
+                if new:
+                    self.checkpoint.finish(new[-1]['id'])
 
-                # Update the conversation with sentiment score and summary
-                self.update_conversation()
+                print(f"Analyzed {analyzed} conversations, {failed} failed; checkpoint at id "
+                      f"{self.checkpoint.last_id}, {len(self.checkpoint.open)} open")
 
+            except Exception as e:
+                print(f"Error in running SS Agent batch: {str(e)}")
+            finally:
+                self.metrics.report()
+                self.api.report()
+                self.pool.report()
+                self.keyword_matcher.report()
+                self.keyword_matcher.save()
 
-                answers = self.answers
+        def run(self) -> None:
+            """Run the SS Agent to process the conversation and provide analysis."""
+            try:
 
-                # Iterate over the answers and extract keywords
-                for answer in answers:
-                    if answer:  # Ensure the answer is not empty
-                        # Extract keywords from the answer
-                        keywords = self.extract_keywords(answer['response'])
+                # Fetch bearer token
+                self.fetch_token()
+                # Fetch the last conversation
+                self.fetch_last_conversation()
 
-                        # Update the conversation in the database with the extracted keywords
-                        self.update_answer_with_keywords(answer, keywords)
+                if self.last_conversation is not None:
+                    self.analyze_conversation(self.last_conversation)
 
             except Exception as e:
                 print(f"Error in running SS Agent: {str(e)}")
+            finally:
+                self.metrics.report()
+                self.api.report()
+                self.pool.report()
+                self.keyword_matcher.report()
+                self.keyword_matcher.save()
 
 
 
@@ -347,4 +753,8 @@ if __name__ == "__main__":
 
     ss = SSAgent()
 
-    ss.run()
\ No newline at end of file
+    # Every conversation that is not analyzed yet; --latest only looks at the most recent one
+    if "--latest" in sys.argv:
+        ss.run()
+    else:
+        ss.run_batch()
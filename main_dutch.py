@@ -1,30 +1,103 @@
+import asyncio
+import os
+import sys
+
 from stt.stt_whisper import SpeechToTextAgent
+from stt.inference_config import InferenceConfig
 from llm_dutch import LLMAgent
 from tts.tts_male import TTSAgent
 from manager import ManagerAgent
+from conversation_engine import ConversationEngine
+from conversation_flow import WELCOME_MESSAGE
+from metrics import Stopwatch
+from startup import ModelPreloader
+
+
+# How a conversation is started: 'enter' waits for Enter on the terminal, 'once' runs one conversation
+# and shuts down, 'loop' starts the next conversation as soon as one ends. Without a terminal
+# (systemd, docker without -it) the default is 'once', like the bench always did.
+START_MODES = ("enter", "once", "loop")
+
+
+def start_trigger(mode: str = None):
+    """
+    Build the function that blocks until the next conversation should start.
+
+    Args:
+        mode: One of START_MODES (defaults to BENCH_START, or 'enter' on a terminal and 'once' otherwise)
+
+    Returns:
+        Callable returning True to start a conversation and False when the bench should shut down
+    """
+    mode = mode or os.environ.get("BENCH_START") or ("enter" if sys.stdin.isatty() else "once")
+    if mode not in START_MODES:
+        raise ValueError(f"Unknown start mode '{mode}', expected one of {START_MODES}")
+    started = []
+
+    def wait_for_start() -> bool:
+        if mode == "once":
+            started.append(True)
+            return len(started) == 1
+        if mode == "loop":
+            return True
+        try:
+            input("\nBench ready. Press Enter to start a conversation...")
+            return True
+        except (EOFError, KeyboardInterrupt):
+            return False
+
+    return wait_for_start
 
 
 def main():
 
+    stopwatch = Stopwatch("startup")
+
+    # Load and warm up Whisper while the bench gets ready; on CPU the int8 weights are cached
+    # after the first boot and memory-mapped on later ones
+    stt_loader = ModelPreloader(lambda: SpeechToTextAgent(model_name="base",
+                                                          inference_config=InferenceConfig(quantize=True)),
+                                stopwatch=stopwatch, name="speech recognition")
+
     llm_agent = LLMAgent()
-    stt_agent = SpeechToTextAgent(model_name="base")
     tts_agent = TTSAgent()
 
-    manager = ManagerAgent(llm_agent, stt_agent, tts_agent, "https://frankdepratendebank.azurewebsites.net/api/", 1)
+    manager = ManagerAgent(llm_agent, None, tts_agent, "https://frankdepratendebank.azurewebsites.net/api/", 1)
+
+    # Idle-time ready state: token, warm connection, cached and pre-synthesized questions, reserved conversation
+    manager.stay_ready()
+    stopwatch.mark("backend ready")
+    manager.stt_agent = stt_loader.get()
+    stopwatch.mark("bench ready")
 
-    welcome_message = """Let op, dit gesprek wordt opgenomen en jouw feedback zal binnen ons bedrijf worden gebruikt. Deel alsjeblieft geen persoonlijke informatie met de bank! 
-    Hallo! Ik ben jouw vriendelijke stadfeedbackbank. Ik ben hier om jouw gedachten over onze stad te horen en je ideeën te verzamelen om het nog beter te maken. Wil je jouw ervaringen met mij delen? 
-        """
+    wait_for_start = start_trigger()
+    while wait_for_start():
+        # Time from pressing start to the bench's first word
+        conversation_stopwatch = Stopwatch("conversation")
+        manager.stopwatch = conversation_stopwatch
 
-    manager.tts_agent.text_to_speech(welcome_message)
+        def first_word():
+            conversation_stopwatch.mark("first word")
+            tts_agent.on_play = None
+        tts_agent.on_play = first_word
 
-    print("Starting conversation loop...")
+        manager.tts_agent.text_to_speech(WELCOME_MESSAGE)
 
-    manager.run()
+        print("Starting conversation loop...")
+
+        asyncio.run(ConversationEngine(manager).run())
+
+        print("Stopping conversation loop...")
+        print(f"Start to first word: {conversation_stopwatch.elapsed('first word') or 0:.2f}s, "
+              f"start to first question: {conversation_stopwatch.elapsed('first question') or 0:.2f}s")
+
+    manager.stop_ready()
+    # Give the spool a moment to deliver the last answers; anything left is sent on the next start
+    if not manager.spool.flush(timeout=10):
+        print("Some answers are still spooled and will be sent later.")
+    llm_agent.metrics.report()
+    manager.api.report()
 
-    print("Stopping conversation loop...")
 
-    
 if __name__ == "__main__":
     main()
-
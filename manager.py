@@ -1,118 +1,152 @@
+import threading
 from typing import List, Dict
 from pathlib import Path
-import requests
 from datetime import datetime
-import os
+
+from answer_spool import AnswerSpool, PermanentError
+from api_client import APIClient
+from question_cache import QuestionCache
+from token_manager import TokenManager
+from llm_dutch import stream_sentences
+from conversation_flow import QuestionnaireFlow, CANNED_MESSAGES, GOODBYE_MESSAGE, ERROR_MESSAGE
+
 
 class ManagerAgent:
-    def __init__(self, llm_agent, stt_agent, tts_agent, api_base_url, bench_id):
+    def __init__(self, llm_agent, stt_agent, tts_agent, api_base_url, bench_id, stopwatch=None, api_client=None,
+                 spool=None, token_manager=None, reserve_conversations=True):
 
         self.llm_agent = llm_agent
         self.stt_agent = stt_agent
         self.tts_agent = tts_agent
 
         self.api_base_url = api_base_url
+        # Pooled connections, timeouts and retries for every backend call
+        self.api = api_client if api_client is not None else APIClient(api_base_url, name="bench api")
+        # Conversations and answers go through a durable spool; the user never waits for the backend
+        self.spool = spool
         self.max_follow_ups = 2
         self.conversation_id = None
+        self.local_conversation_id = None
         self.bench_id = bench_id
         self.current_question_index = 0
         self.new_conversation = None
+        self.stopwatch = stopwatch
+        self.prepared = False
+        self.reserve_conversations = reserve_conversations
+        self._ready_thread = None
+        self._ready_stop = threading.Event()
 
         self.questions = []
-        self.headers = {
-            "Authorization": "",
-            "Content-Type": "application/json"
-        }
+        # Conversations start from the cached question list; it is revalidated in the background
+        self.question_cache = QuestionCache(self.api, "questions/active", headers=lambda: self.headers)
+        # Cached on disk and refreshed in the background, shared with every thread of the bench
+        self.tokens = token_manager if token_manager is not None else TokenManager(self.api)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Request headers with a valid bearer token."""
+        return self.tokens.headers()
 
     # Fetch Token
     def fetch_token(self) -> None:
-            """Fetch the last conversation for analysis."""
-            email = "john.doe@example.com"
-            password = "hashedpassword1"
-            API_KEY = os.environ.get("API_KEY")
-
-            url = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={API_KEY}"
-
-            payload = {
-                "email": email,
-                "password": password,
-                "returnSecureToken":True
-            }
-            print(url)
-
-            response = requests.post(url, json=payload)
-            token = response.json()
-            if "idToken" in token:
-                self.headers = {
-                    "Authorization": "Bearer " + token['idToken'],
-                    "Content-Type": "application/json",
-                    }
-                print("Bearer token:", token['idToken'])
-            else:
-                print("Error: ", token)
+        """Make sure a valid bearer token is available and keep it fresh from now on."""
+        self.tokens.token()
+        self.tokens.start()
       
+    def _check(self, response, expected: int, action: str) -> None:
+        """Raise PermanentError for client errors that a retry can't fix, Exception for the rest."""
+        if response.status_code == expected:
+            return
+        if response.status_code == 401:
+            # Revoked or expired early: renew it before the spool retries
+            self.tokens.invalidate()
+        if 400 <= response.status_code < 500 and response.status_code not in (401, 403, 408, 429):
+            raise PermanentError(f"Failed to {action}: {response.status_code} {response.text}")
+        raise Exception(f"Failed to {action}: {response.status_code} {response.text}")
+
     # Post Conversation
     def create_conversation(self) -> None:
-        """Initialize a new conversation by sending a POST request."""
-        url = f"{self.api_base_url}conversations"
-
-        
-        payload = {
+        """Start a new conversation; the spool creates it on the backend in the background."""
+        # Forget the previous conversation first, so a failure below can't send answers to it
+        self.conversation_id = None
+        self.local_conversation_id = None
+        self.new_conversation = {
             "startDatetime": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
             "endDatetime": None,
             "sentiment": None,
             "summary": None,
             "benchId": self.bench_id,
         }
-        response = requests.post(url, headers=self.headers, json=payload)
-        if response.status_code == 201:
-            self.new_conversation = payload
-            self.conversation_id = response.json()["id"]
-            print(f"Conversation started. ID: {self.conversation_id}")
-        else:
-            raise Exception(f"Failed to create conversation: {response.status_code}")
+        start = self.new_conversation['startDatetime']
+        # Take the conversation reserved while the bench was idle, and reserve the next one
+        self.local_conversation_id = self.spool.claim_reservation(self.bench_id, start)
+        if self.local_conversation_id is not None:
+            self.conversation_id = self.spool.remote_id(self.local_conversation_id)
+            print(f"Conversation started from reservation. ID: {self.conversation_id or self.local_conversation_id}")
+            self.reserve_conversation()
+            return
+        self.conversation_id = None
+        self.local_conversation_id = self.spool.start_conversation(self.bench_id, start)
+        print(f"Conversation started. Local ID: {self.local_conversation_id}")
+
+    def reserve_conversation(self) -> None:
+        """Make sure a conversation is reserved on the backend for the next visitor."""
+        if self.reserve_conversations and not self.spool.has_reservation(self.bench_id):
+            self.spool.reserve_conversation(self.bench_id, datetime.now().strftime("%Y-%m-%dT%H:%M:%S"))
+
+    def post_conversation(self, conversation: Dict) -> int:
+        """Create a spooled conversation on the backend and return its ID."""
+        payload = {
+            "startDatetime": conversation['start'],
+            "endDatetime": None,
+            "sentiment": None,
+            "summary": None,
+            "benchId": conversation['bench_id'],
+        }
+        response = self.api.post("conversations", headers=self.headers, json=payload)
+        self._check(response, 201, "create conversation")
+        conversation_id = response.json()["id"]
+        if conversation['local_id'] == self.local_conversation_id:
+            self.conversation_id = conversation_id
+        print(f"Conversation created on the backend. ID: {conversation_id}")
+        return conversation_id
 
     # Put Conversation
     def end_conversation(self) -> None:
-        """Finalize the conversation by sending a PUT request with the end time."""
-        if not self.conversation_id:
+        """Record the end time; the spool closes the conversation once its answers are sent."""
+        if not self.local_conversation_id:
             raise Exception("No active conversation to end.")
+        self.spool.end_conversation(self.local_conversation_id, datetime.now().strftime("%Y-%m-%dT%H:%M:%S"))
+        self.local_conversation_id = None
 
-        url = f"{self.api_base_url}conversations/{self.conversation_id}"
+    def put_conversation(self, conversation_id: int, conversation: Dict) -> None:
+        """Send a spooled conversation's start and end time (None while it runs) to the backend."""
+        url = f"conversations/{conversation_id}"
         payload = {
-            "id": self.conversation_id,
-            "startDatetime": self.new_conversation['startDatetime'],
-            "endDatetime": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),  # Current UTC time in ISO 8601 format
+            "id": conversation_id,
+            "startDatetime": conversation['start'],
+            "endDatetime": conversation['end'],
             "summary": None,  # Optionally, you can update this field
             "sentiment": None,  # Optionally, update sentiment analysis if available
-            "benchId": self.bench_id,
+            "benchId": conversation['bench_id'],
 
         }
-        response = requests.put(url, headers=self.headers,json=payload)
-        if response.status_code == 204:
-            print(f"Conversation {self.conversation_id} successfully updated with end time.")
+        response = self.api.put(url, headers=self.headers, json=payload)
+        self._check(response, 204, "update conversation")
+        if conversation['end'] is None:
+            print(f"Conversation {conversation_id} successfully updated with start time.")
         else:
-            raise Exception(f"Failed to update conversation: {response.text}")
+            print(f"Conversation {conversation_id} successfully updated with end time.")
    
     # Get Questionnaire
     def fetch_questions(self) -> None:
-        """Fetch questions for the questionnaire."""
-        url = f"{self.api_base_url}questions/active"
-        response = requests.get(url, headers=self.headers)
-        if response.status_code == 200:
-            # Filter out only active questions
-
-            self.questions = response.json()
-            print(f"Fetched {len(self.questions)} active questions.")
-        else:
-            raise Exception(f"Failed to fetch questions: {response.text}")
+        """Load the active questions, from the local cache when there is one."""
+        self.questions = self.question_cache.get()
+        print(f"Fetched {len(self.questions)} active questions.")
         
     def get_question_by_id(self, question_id: int) -> Dict:
         """Retrieve a question by its ID."""
-        for question in self.questions:
-            if question['id'] == question_id:
-                return question
-        return None
+        return self.question_cache.get_by_id(question_id)
 
     def get_question_by_index(self, index: int) -> Dict:
         """Retrieve a question by index."""
@@ -122,159 +156,188 @@ class ManagerAgent:
 
     # Post Answers
     def submit_answer(self, question_id: int, user_response: str) -> None:
-        """Submit a user's response for a specific question."""
-        url = f"{self.api_base_url}answers"
+        """Queue a user's response for a specific question; it is sent in the background."""
+        if not self.local_conversation_id:
+            raise Exception("No active conversation to submit an answer to.")
+        self.spool.add_answer(self.local_conversation_id, question_id, user_response)
+        print("Response queued for submission.")
+
+    def post_answer(self, conversation_id: int, question_id: int, user_response: str, key: str) -> None:
+        """Send a spooled answer; the idempotency key lets the backend drop replays."""
         payload = {
-            "ConversationId": self.conversation_id,
+            "ConversationId": conversation_id,
             "QuestionId": question_id,
             "response": user_response
             }
             
-        response = requests.post(url, headers=self.headers, json=payload )
-        if response.status_code == 201:
-            print("Response submitted successfully.")
-        else:
-            raise Exception(f"Failed to submit response: {response.text}")
+        response = self.api.post("answers", headers=dict(self.headers, **{"Idempotency-Key": key}), json=payload)
+        self._check(response, 201, "submit response")
+        print("Response submitted successfully.")
+
+    def prepare(self) -> None:
+        """Sign in, fetch the questions and pre-synthesize everything the bench will say."""
+        self.fetch_token()
+        if self.spool is None:
+            self.spool = AnswerSpool()
+        # Also replays whatever an earlier run could not send
+        self.spool.start(self)
+        self.fetch_questions()
+
+        self.presynthesize()
+        self.reserve_conversation()
+
+        self.prepared = True
+
+    def presynthesize(self) -> None:
+        """Render the scripted lines into the TTS cache while the bench is doing something else."""
+        if not hasattr(self.tts_agent, "prefetch"):
+            print(f"{type(self.tts_agent).__name__} has no speech cache, skipping pre-synthesis.")
+            return
+        texts = [question['text'] for question in self.questions] + CANNED_MESSAGES
+        self.tts_agent.prefetch(texts)
+        print(f"Pre-synthesizing {len(texts)} scripted lines.")
+
+    def _stay_ready(self, interval: float) -> None:
+        while not self._ready_stop.wait(interval):
+            try:
+                # Revalidating the questions also keeps the pooled connection from idling out
+                if self.question_cache.revalidate():
+                    self.questions = self.question_cache.questions
+                    self.presynthesize()
+                self.reserve_conversation()
+            except Exception as e:
+                print(f"Error keeping the bench ready: {e}")
+
+    def stay_ready(self, interval: float = 60.0) -> None:
+        """
+        Keep the bench ready for the next visitor while it is idle.
+
+        The bearer token is refreshed by the token manager; this thread
+        revalidates the question list (which keeps the backend connection
+        warm), pre-synthesizes changed questions and makes sure a conversation
+        is reserved, so pressing start goes straight to speaking.
+
+        Args:
+            interval: Seconds between checks; below the backend's idle connection timeout
+        """
+        if not self.prepared:
+            self.prepare()
+        if self._ready_thread is None:
+            self._ready_thread = threading.Thread(target=self._stay_ready, args=(interval,),
+                                                  name="ready-state", daemon=True)
+            self._ready_thread.start()
+
+    def stop_ready(self) -> None:
+        """Stop the idle-time ready thread, e.g. before flushing the spool on shutdown."""
+        self._ready_stop.set()
+        if self._ready_thread is not None:
+            self._ready_thread.join(timeout=5)
+            self._ready_thread = None
+
+    def respond(self, prompt: str, user_message: str, conversation_history: List[Dict],
+                follow_up_question: str = None) -> str:
+        """
+        Generate the bench's reply and speak it.
+
+        When both agents support streaming, speech starts after the first
+        generated sentence instead of after the whole reply.
+        """
+        if hasattr(self.llm_agent, "generate_response_stream") and hasattr(self.tts_agent, "speak_stream"):
+            chunks = self.llm_agent.generate_response_stream(
+                prompt,
+                user_message,
+                conversation_history,
+                follow_up_question=follow_up_question
+            )
+            qa_response = self.tts_agent.speak_stream(stream_sentences(chunks))
+            print(f"AI response: {qa_response}")
+            return qa_response
+
+        qa_response = self.llm_agent.generate_response(
+            prompt,
+            user_message,
+            conversation_history,
+            follow_up_question=follow_up_question
+        )
+        print(f"AI response: {qa_response}")
+        self.tts_agent.text_to_speech(qa_response)
+        return qa_response
 
     def run(self) -> None:
         """Execute the AI-driven questionnaire loop."""
 
-        self.fetch_token()
+        if not self.prepared:
+            self.prepare()
         conversation_history: List[Dict] = []
     
         # Start a new conversation
         self.create_conversation()
-    
-        # Fetch questions
-        self.fetch_questions()
-
-        # Prompt variables
-        next_question = None
-        follow_up_count = 0
-        prompt = ""
-    
-        # Add tracking for concatenated responses
-        current_question_responses = []
-
-        current_question_index = self.current_question_index
 
-        # Add counter for unsuccessful listening attempts
-        silent_attempts = 0
-        MAX_SILENT_ATTEMPTS = 5
-
-        while current_question_index < len(self.questions):
-            current_question = self.get_question_by_index(current_question_index)
-            if not current_question:
-                print("Questionnaire is complete")
-                self.end_conversation()
-                return
-            
-            current_question_id = current_question['id']
-
-    
-            # Ask the first question
-            self.tts_agent.text_to_speech(current_question['text'])
-            conversation_history.append({"bank": current_question['text']})
-            current_question_id = current_question['id']
-            print(f"\nAI: {current_question['text']}")
-
-            while True:
-                try:
-                    # Listen to the user
-                    print("\nListening...")
-                    user_message = self.stt_agent.transcribe_audio()
-                    
-                    # Check for silence/no response
-                    if not user_message:
-                        silent_attempts += 1
-                        print(f"Geen reactie gedetecteerd. Poging {silent_attempts} van {MAX_SILENT_ATTEMPTS}")
-                    
-                        if silent_attempts >= MAX_SILENT_ATTEMPTS:
-                            print("Maximaal aantal stille pogingen bereikt. Gesprek wordt beëindigd.")
-                            goodbye_message = "Ik heb al een tijdje geen reactie gehoord. Bedankt voor je tijd. Fijne dag verder!"
-                            self.tts_agent.text_to_speech(goodbye_message)
-                            self.end_conversation()
-                            return
-                        continue
-                
-                    # Reset silent attempts counter when user responds
-                    silent_attempts = 0
-                    print(f"User said: {user_message}")
-                
-                
-                    # Evaluate the response
-                    is_response_complete = self.llm_agent.evaluate_response(
-                        user_message,
-                        conversation_history,
-                        current_question,
-                    )
-                    print(is_response_complete)
-
-                    # Check if the user wants to end the conversation
-                    if is_response_complete == "Einde":
-                        qa_response = """Bedankt voor het delen van je gedachten! Jouw feedback zal helpen om onze stad beter te maken. Nog een geweldige dag verder!"""
-                        print(f"AI: {qa_response}")
-                        self.tts_agent.text_to_speech(qa_response)
+        flow = QuestionnaireFlow(self.questions, self.max_follow_ups, start_index=self.current_question_index)
+        current_question = flow.current_question
+        if not current_question:
+            print("Questionnaire is complete")
+            self.end_conversation()
+            return
+
+        # Ask the first question
+        if self.stopwatch is not None:
+            self.stopwatch.mark("first question")
+        self.tts_agent.text_to_speech(current_question['text'])
+        conversation_history.append({"bank": current_question['text']})
+        print(f"\nAI: {current_question['text']}")
+
+        while not flow.finished:
+            try:
+                # Listen to the user
+                print("\nListening...")
+                user_message = self.stt_agent.transcribe_audio()
+
+                # Check for silence/no response
+                if not user_message:
+                    if flow.register_silence():
+                        partial = flow.flush()
+                        if partial is not None:
+                            self.submit_answer(*partial)
+                        self.tts_agent.text_to_speech(GOODBYE_MESSAGE)
                         self.end_conversation()
                         return
-
-                    # A detailed question can be asked max 2 times
-                    if follow_up_count >= self.max_follow_ups:
-                        print("De vraag is twee keer in detail gesteld, dus we gaan verder naar de volgende.")
-                        is_response_complete = "Ja"
-
-                    # Work only with topic related questions
-                    if is_response_complete != "Off":
-
-                        if is_response_complete == "Nee":
-                            # Store response in detailed responses
-                            current_question_responses.append(user_message)
-
-                            self.submit_answer(current_question_id, current_question_responses)
-
-                            prompt = "1. Genereer een verduidelijkende vraag om vriendelijk meer details te verkrijgen of gewoon een vraag om feedback van de gebruiker over de stad te verzamelen. De vragen moeten open-ended zijn."
-                            print("User response is on-topic, but incomplete. Asking for more details.")
-                            next_question = None
-                            follow_up_count += 1
-
-                        # If the user response is complete or we've reached max follow-ups
-                        elif is_response_complete == "Ja":
-                            # Concatenate all responses for this question
-                            combined_response = " ".join(current_question_responses)
-
-                            final_response = f"{combined_response} {user_message}"
-                        
-                            # Submit the concatenated response
-                            self.submit_answer(current_question_id, final_response)
-                        
-                            prompt = "1. Reageer vriendelijk op hun antwoorden. Erken dat we doorgaan naar de volgende vraag in onze vragenlijst. 3. Stel een aangeleverde vervolgvraag."
-                            print("We gaan verder naar de volgende vraag met de samengevoegde reactie:", final_response)
-                            next_question = self.get_question_by_index(current_question_index + 1)['text']
-                            current_question_index += 1
-                            follow_up_count = 0
-                            current_question_responses = []  # Reset for next question
-                        
-                    else:
-                        prompt = "Behandel off-topic reacties van de gebruiker door te bevestigen wat er is gehoord en het gesprek op een beleefde manier terug te leiden naar de vragenlijst. 1. Erkenning van de input van de gebruiker. Als de gebruiker een off-topic vraag stelt, beantwoord deze dan niet. 2. Een vriendelijke opmerking dat de focus ligt op de onderwerpen van de vragenlijst. 3. Stel de vervolgvraag om het gesprek soepel weer op koers te brengen."
-                        print("User response is off-topic. Asking the same question")
-                        next_question = self.get_question_by_id(current_question_id)['text']
-
-                    qa_response = self.llm_agent.generate_response(
-                        prompt,
-                        user_message,
-                        conversation_history,
-                        follow_up_question=next_question
-                    )
-
-                    print(f"AI response: {qa_response}")
-                    self.tts_agent.text_to_speech(qa_response)
-
-                    # Update conversation history
-                    conversation_history.append({
-                        "user": user_message,
-                        "bank": qa_response
-                    })
-
-                except Exception as e:
-                    print(f"Fout tijdens het gesprek: {e}")
-                    self.tts_agent.text_to_speech("Ik heb moeite met begrijpen. Kun je dat alstublieft herhalen?")
+                    continue
+
+                print(f"User said: {user_message}")
+
+                # Evaluate the response
+                is_response_complete = self.llm_agent.evaluate_response(
+                    user_message,
+                    conversation_history,
+                    flow.current_question['text'],
+                )
+                print(is_response_complete)
+
+                plan = flow.plan(is_response_complete, user_message)
+                if plan["submit"] is not None:
+                    self.submit_answer(*plan["submit"])
+                flow.apply(plan, user_message)
+
+                if plan["end"]:
+                    print(f"AI: {plan['reply']}")
+                    self.tts_agent.text_to_speech(plan["reply"])
+                    self.end_conversation()
+                    return
+
+                qa_response = self.respond(
+                    plan["prompt"],
+                    user_message,
+                    conversation_history,
+                    follow_up_question=plan["follow_up_question"]
+                )
+
+                # Update conversation history
+                conversation_history.append({
+                    "user": user_message,
+                    "bank": qa_response
+                })
+
+            except Exception as e:
+                print(f"Fout tijdens het gesprek: {e}")
+                self.tts_agent.text_to_speech(ERROR_MESSAGE)
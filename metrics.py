@@ -0,0 +1,135 @@
+import threading
+import time
+
+
+class Stopwatch:
+    def __init__(self, name: str = "startup"):
+        """
+        Record named milestones relative to a common start time.
+
+        Args:
+            name: Label printed with every milestone
+        """
+        self.name = name
+        self.started = time.perf_counter()
+        self.marks = {}
+
+    def mark(self, label: str) -> float:
+        """Record a milestone and return the seconds elapsed since the start."""
+        elapsed = time.perf_counter() - self.started
+        self.marks.setdefault(label, elapsed)
+        print(f"[{self.name}] {label}: {elapsed:.2f}s")
+        return elapsed
+
+    def elapsed(self, label: str) -> float:
+        return self.marks.get(label)
+
+
+class LatencyHistogram:
+    # Bucket upper bounds in seconds
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, float("inf"))
+
+    def __init__(self):
+        """Fixed-bucket latency histogram with count, sum and approximate percentiles."""
+        self.counts = [0] * len(self.BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        for index, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of observations."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.BUCKETS, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+
+# Groq list prices in USD per million (input, output) tokens
+MODEL_PRICES = {
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+}
+
+
+class TaskMetrics:
+    def __init__(self, name: str = "llm"):
+        """
+        Per task and model latency, token and cost accounting for LLM calls.
+
+        Args:
+            name: Label printed in the report
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def _entry(self, task: str, model: str) -> dict:
+        key = (task, model)
+        if key not in self.stats:
+            self.stats[key] = {
+                "calls": 0, "failures": 0, "rejected": 0,
+                "prompt_tokens": 0, "completion_tokens": 0,
+                "latency": LatencyHistogram(),
+            }
+        return self.stats[key]
+
+    def record(self, task: str, model: str, seconds: float, prompt_tokens: int = 0,
+               completion_tokens: int = 0, failed: bool = False, rejected: bool = False) -> None:
+        """
+        Record one call.
+
+        Args:
+            task: Task the call was made for, e.g. 'evaluate'
+            model: Model that served it
+            seconds: Wall-clock latency
+            prompt_tokens: Input tokens reported by the API
+            completion_tokens: Output tokens reported by the API
+            failed: The call raised an error
+            rejected: The output failed validation
+        """
+        with self._lock:
+            entry = self._entry(task, model)
+            entry["calls"] += 1
+            entry["failures"] += failed
+            entry["rejected"] += rejected
+            entry["prompt_tokens"] += prompt_tokens or 0
+            entry["completion_tokens"] += completion_tokens or 0
+            entry["latency"].observe(seconds)
+
+    @staticmethod
+    def cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+        return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+    def report(self) -> None:
+        """Print a summary table per task and model."""
+        if not self.stats:
+            return
+        print(f"\n[{self.name}] {'task':<12}{'model':<26}{'calls':>6}{'fail':>6}{'rej':>5}"
+              f"{'p50 (s)':>9}{'p95 (s)':>9}{'tokens in/out':>16}{'cost ($)':>11}")
+        with self._lock:
+            for (task, model), entry in sorted(self.stats.items()):
+                latency = entry["latency"]
+                tokens = f"{entry['prompt_tokens']}/{entry['completion_tokens']}"
+                cost = self.cost(model, entry["prompt_tokens"], entry["completion_tokens"])
+                print(f"[{self.name}] {task:<12}{model:<26}{entry['calls']:>6}{entry['failures']:>6}"
+                      f"{entry['rejected']:>5}{latency.percentile(0.5):>9.2f}{latency.percentile(0.95):>9.2f}"
+                      f"{tokens:>16}{cost:>11.5f}")
@@ -0,0 +1,213 @@
+import asyncio
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from metrics import TaskMetrics
+from rate_limit import RateLimitGate, RateLimited, is_rate_limited, retry_after
+
+SMALL_MODEL = "llama-3.1-8b-instant"
+LARGE_MODEL = "llama-3.3-70b-versatile"
+
+
+class ModelRoute:
+    def __init__(self, models: List[str], max_tokens: Optional[int] = None, timeout: float = 30.0,
+                 temperature: float = 0.0, top_p: float = 0.9):
+        """
+        Settings for one kind of LLM call.
+
+        Args:
+            models: Fallback chain, tried in order until one returns valid output
+            max_tokens: Completion token limit
+            timeout: Request timeout in seconds
+            temperature: Sampling temperature
+            top_p: Top-p sampling value
+        """
+        self.models = models
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self.temperature = temperature
+        self.top_p = top_p
+
+    def options(self, **overrides) -> Dict:
+        options = {
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "top_p": self.top_p,
+            "timeout": self.timeout,
+        }
+        options.update({key: value for key, value in overrides.items() if value is not None})
+        if options["max_tokens"] is None:
+            del options["max_tokens"]
+        return options
+
+
+# Bench side: classification on the small model, replies on the large one
+BENCH_ROUTES = {
+    "evaluate": ModelRoute([SMALL_MODEL, LARGE_MODEL], max_tokens=15, timeout=5.0, temperature=0.0),
+    "generate": ModelRoute([LARGE_MODEL, SMALL_MODEL], max_tokens=150, timeout=15.0, temperature=0.7),
+}
+
+# Cloud side: analysis runs on the small model and escalates when its output is unusable
+CLOUD_ROUTES = {
+    "summary": ModelRoute([SMALL_MODEL, LARGE_MODEL], max_tokens=150, timeout=30.0, temperature=0.4),
+    "keywords": ModelRoute([SMALL_MODEL, LARGE_MODEL], max_tokens=100, timeout=30.0, temperature=0.0),
+    "keywords_batch": ModelRoute([SMALL_MODEL, LARGE_MODEL], max_tokens=600, timeout=30.0, temperature=0.0),
+    "analysis": ModelRoute([SMALL_MODEL, LARGE_MODEL], max_tokens=850, timeout=30.0, temperature=0.0),
+}
+
+
+class ModelRouter:
+    def __init__(self, client, async_client=None, routes: Dict[str, ModelRoute] = None,
+                 metrics: Optional[TaskMetrics] = None):
+        """
+        Route LLM calls to a model per task, falling back along the route's chain.
+
+        A model is skipped when the request fails or its output does not pass
+        the caller's validation. Every attempt is recorded in the metrics.
+        A 429 pauses all calls to that model, from every thread, until its
+        Retry-After has passed; when every model is rate limited the call
+        raises RateLimited so the caller can schedule it again.
+
+        Args:
+            client: groq.Client
+            async_client: groq.AsyncClient, needed for acomplete()
+            routes: Task name to ModelRoute
+            metrics: Where to record latency, tokens and failures
+        """
+        self.client = client
+        self.async_client = async_client
+        self.routes = routes or {}
+        self.metrics = metrics or TaskMetrics()
+        self.gates: Dict[str, RateLimitGate] = {}
+
+    def gate(self, model: str) -> RateLimitGate:
+        """Rate-limit pause shared by all calls to one model."""
+        if model not in self.gates:
+            self.gates.setdefault(model, RateLimitGate(model))
+        return self.gates[model]
+
+    def _failed(self, task: str, model: str, started: float, error: Exception, errors: List[str],
+                waits: List[float]) -> None:
+        self.metrics.record(task, model, time.perf_counter() - started, failed=True)
+        errors.append(f"{model}: {error}")
+        if is_rate_limited(error):
+            waits.append(retry_after(error))
+            self.gate(model).pause(waits[-1])
+
+    def _raise(self, task: str, errors: List[str], waits: List[float]):
+        message = f"All models failed for '{task}': {'; '.join(errors)}"
+        if waits and len(waits) == len(errors):
+            raise RateLimited(message, min(waits))
+        raise Exception(message)
+
+    def _usage(self, completion):
+        # Groq reports a stream's usage on its last chunk, under x_groq
+        usage = getattr(completion, "usage", None) or getattr(getattr(completion, "x_groq", None), "usage", None)
+        if usage is None:
+            return 0, 0
+        return usage.prompt_tokens, usage.completion_tokens
+
+    def _accept(self, task: str, model: str, started: float, completion,
+                validate: Optional[Callable[[str], bool]]) -> Optional[str]:
+        text = completion.choices[0].message.content or ""
+        valid = validate is None or validate(text)
+        self.metrics.record(task, model, time.perf_counter() - started, *self._usage(completion),
+                            rejected=not valid)
+        if not valid:
+            print(f"Output of {model} for '{task}' failed validation, trying the next model.")
+            return None
+        return text
+
+    def complete(self, task: str, messages: List[Dict], validate: Optional[Callable[[str], bool]] = None,
+                 **overrides) -> str:
+        """
+        Run a chat completion for a task.
+
+        Args:
+            task: Route name, e.g. 'evaluate'
+            messages: Chat messages
+            validate: Returns False for output that should fall back to the next model
+            **overrides: Replace route settings (temperature, max_tokens, top_p, timeout)
+
+        Returns:
+            str: The first valid completion
+
+        Raises:
+            RateLimited: When every model in the chain answered 429
+            Exception: When every model in the chain failed
+        """
+        route = self.routes[task]
+        errors = []
+        waits = []
+        for model in route.models:
+            self.gate(model).wait()
+            started = time.perf_counter()
+            try:
+                completion = self.client.chat.completions.create(
+                    model=model, messages=messages, stream=False, **route.options(**overrides)
+                )
+            except Exception as e:
+                self._failed(task, model, started, e, errors, waits)
+                continue
+            text = self._accept(task, model, started, completion, validate)
+            if text is not None:
+                return text
+            errors.append(f"{model}: invalid output")
+        self._raise(task, errors, waits)
+
+    async def acomplete(self, task: str, messages: List[Dict],
+                        validate: Optional[Callable[[str], bool]] = None, **overrides) -> str:
+        """Asynchronous complete(); cancelling the coroutine aborts the request."""
+        route = self.routes[task]
+        errors = []
+        waits = []
+        for model in route.models:
+            await asyncio.sleep(self.gate(model).remaining())
+            started = time.perf_counter()
+            try:
+                completion = await self.async_client.chat.completions.create(
+                    model=model, messages=messages, stream=False, **route.options(**overrides)
+                )
+            except Exception as e:
+                self._failed(task, model, started, e, errors, waits)
+                continue
+            text = self._accept(task, model, started, completion, validate)
+            if text is not None:
+                return text
+            errors.append(f"{model}: invalid output")
+        self._raise(task, errors, waits)
+
+    def stream(self, task: str, messages: List[Dict], **overrides) -> Iterator[str]:
+        """
+        Stream a chat completion for a task, yielding text fragments.
+
+        Falls back to the next model only if a request fails before the first fragment.
+        Token counts come from the usage the last chunk reports.
+        """
+        route = self.routes[task]
+        errors = []
+        waits = []
+        for model in route.models:
+            self.gate(model).wait()
+            started = time.perf_counter()
+            produced = False
+            try:
+                stream = self.client.chat.completions.create(
+                    model=model, messages=messages, stream=True, **route.options(**overrides)
+                )
+                usage = (0, 0)
+                for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        produced = True
+                        yield delta
+                    if usage == (0, 0):
+                        usage = self._usage(chunk)
+                self.metrics.record(task, model, time.perf_counter() - started, *usage)
+                return
+            except Exception as e:
+                if produced:
+                    self.metrics.record(task, model, time.perf_counter() - started, failed=True)
+                    raise
+                self._failed(task, model, started, e, errors, waits)
+        self._raise(task, errors, waits)
@@ -0,0 +1,12 @@
+import os
+from pathlib import Path
+
+# Root directory for everything the bench caches locally (models, audio, tokens, ...)
+CACHE_DIR = Path(os.environ.get("BENCH_CACHE_DIR", Path.home() / ".cache" / "talking-bench"))
+
+
+def cache_path(*parts: str) -> Path:
+    """Return a directory inside the bench cache, creating it if needed."""
+    path = CACHE_DIR.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
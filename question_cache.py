@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from paths import cache_path
+
+
+class QuestionCache:
+    def __init__(self, api, endpoint: str = "questions/active", headers: Callable[[], Dict] = None,
+                 ttl: float = 300.0, path: Optional[Path] = None):
+        """
+        Local copy of a question list, revalidated with the backend instead of downloaded every time.
+
+        The list is kept in memory and in a JSON file in the bench cache, so a
+        conversation can start right away, even after a restart or while the
+        backend is slow. Within the TTL the copy is used as is. After that it
+        is still returned immediately, while a background request revalidates
+        it (stale-while-revalidate); with the ETag/Last-Modified of the last
+        response the backend can answer 304 without sending the list again.
+        Only an empty cache makes the caller wait for the backend.
+
+        Args:
+            api: APIClient for the backend
+            endpoint: Path of the question list, e.g. 'questions/active' or 'questions'
+            headers: Returns the request headers (with a bearer token) for each call
+            ttl: Seconds a fetched list is used without revalidating
+            path: Cache file (defaults to a file per backend URL and endpoint in the bench cache)
+        """
+        self.api = api
+        self.endpoint = endpoint
+        self.headers = headers or (lambda: {})
+        self.ttl = ttl
+        if path is None:
+            # One file per backend and endpoint
+            digest = hashlib.sha1(api.url(endpoint).encode("utf-8")).hexdigest()[:8]
+            path = cache_path("questions") / f"{endpoint.replace('/', '_')}-{digest}.json"
+        self.path = Path(path)
+
+        self._lock = threading.Lock()
+        self._revalidating = False
+        self.questions: List[Dict] = []
+        self.by_id: Dict[int, Dict] = {}
+        self.etag = None
+        self.last_modified = None
+        self.fetched_at = 0.0
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        self._set(data.get("questions", []), data.get("etag"), data.get("last_modified"), data.get("fetched_at", 0.0))
+
+    def _save(self) -> None:
+        data = {
+            "questions": self.questions,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "fetched_at": self.fetched_at,
+        }
+        temp = self.path.with_suffix(".tmp")
+        temp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(str(temp), str(self.path))
+
+    def _set(self, questions: List[Dict], etag: str, last_modified: str, fetched_at: float) -> None:
+        self.questions = questions
+        self.by_id = {question['id']: question for question in questions}
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    @property
+    def fresh(self) -> bool:
+        return bool(self.questions) and time.time() - self.fetched_at < self.ttl
+
+    def revalidate(self) -> bool:
+        """
+        Ask the backend whether the list changed and update the cache.
+
+        Returns:
+            bool: True when the list changed
+
+        Raises:
+            Exception: When the backend returned an error
+        """
+        headers = dict(self.headers())
+        if self.questions and self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.questions and self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        response = self.api.get(self.endpoint, headers=headers)
+        with self._lock:
+            if response.status_code == 304:
+                self.fetched_at = time.time()
+                self._save()
+                return False
+            if response.status_code != 200:
+                raise Exception(f"Failed to fetch questions: {response.text}")
+            questions = response.json()
+            changed = questions != self.questions
+            self._set(questions, response.headers.get("ETag"), response.headers.get("Last-Modified"), time.time())
+            self._save()
+        if changed:
+            print(f"Question list '{self.endpoint}' updated: {len(questions)} questions.")
+        return changed
+
+    def _revalidate_in_background(self) -> None:
+        try:
+            self.revalidate()
+        except Exception as e:
+            print(f"Error revalidating questions, keeping the cached list: {e}")
+        finally:
+            self._revalidating = False
+
+    def get(self) -> List[Dict]:
+        """
+        Return the question list, from the cache whenever there is one.
+
+        Returns:
+            List[Dict]: The questions; a stale list triggers a background revalidation
+        """
+        if not self.questions:
+            self.revalidate()
+            return self.questions
+        with self._lock:
+            start = not self.fresh and not self._revalidating
+            self._revalidating = self._revalidating or start
+        if start:
+            threading.Thread(target=self._revalidate_in_background, name="questions", daemon=True).start()
+        return self.questions
+
+    def get_by_id(self, question_id: int) -> Optional[Dict]:
+        return self.by_id.get(question_id)
@@ -0,0 +1,66 @@
+import threading
+import time
+
+
+class RateLimited(Exception):
+    def __init__(self, message: str, retry_after: float = 1.0):
+        """A service answered 429; the work can be retried after retry_after seconds."""
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """True for a 429 from the Groq SDK, requests or a RateLimited error."""
+    if isinstance(error, RateLimited):
+        return True
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    return status == 429
+
+
+def retry_after(source, default: float = 1.0) -> float:
+    """Seconds to wait from the Retry-After header of a response or of an error's response."""
+    if isinstance(source, RateLimited):
+        return source.retry_after
+    response = getattr(source, "response", source)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+
+class RateLimitGate:
+    def __init__(self, name: str):
+        """
+        Pause shared by every thread calling one rate-limited service.
+
+        When one call gets a 429, pause() holds back all calls through the
+        gate until the service's Retry-After has passed, instead of every
+        worker finding out with a 429 of its own.
+
+        Args:
+            name: Label for the log line
+        """
+        self.name = name
+        self.pauses = 0
+        self._until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            until = time.monotonic() + seconds
+            if until > self._until:
+                self._until = until
+                self.pauses += 1
+                print(f"{self.name} is rate limited, pausing calls for {seconds:.1f}s")
+
+    def remaining(self) -> float:
+        """Seconds until calls may go through again."""
+        return max(self._until - time.monotonic(), 0.0)
+
+    def wait(self) -> None:
+        """Block while the gate is paused."""
+        while self.remaining() > 0:
+            time.sleep(self.remaining())
@@ -0,0 +1,116 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from conversation_flow import QuestionnaireFlow
+
+
+class SpeculativeResponder:
+    MODES = ("off", "likely", "all")
+
+    def __init__(self, llm_agent, mode: str = "likely", min_complete_words: int = 6, min_confidence: float = 0.6):
+        """
+        Generate the bench's reply while the evaluator is still deciding on the verdict.
+
+        The evaluation and the reply for the predicted verdict ('likely') or for
+        every verdict that needs a generated reply ('all') are requested at the
+        same time. When the verdict arrives the matching reply is kept and the
+        other requests are cancelled, so a correct guess saves one LLM round trip.
+        'likely' generates one reply at most: for the local TurnClassifier's
+        verdict when it is at least min_confidence sure, and none otherwise, so
+        an unsure guess costs no generation. The classifier's result is passed
+        on to the evaluator, which doesn't classify the turn again. 'all' is the
+        explicit choice for spending extra generations on a guaranteed hit.
+
+        Args:
+            llm_agent: LLMAgent with aevaluate_response and agenerate_response
+            mode: 'off', 'likely' or 'all'
+            min_complete_words: Without a classifier, answers with at least this many words are predicted 'Ja'
+            min_confidence: Classifier confidence needed to speculate on its verdict
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown speculation mode '{mode}', expected one of {self.MODES}")
+        self.llm_agent = llm_agent
+        self.mode = mode
+        self.min_complete_words = min_complete_words
+        self.min_confidence = min_confidence
+        self.hits = 0
+        self.misses = 0
+
+    def candidate_verdicts(self, flow: QuestionnaireFlow, user_message: str,
+                           classification: Tuple[str, float] = None) -> List[str]:
+        """
+        Verdicts whose reply is generated ahead of the evaluation.
+
+        Args:
+            classification: The local classifier's (verdict, confidence), if the agent has one
+        """
+        if self.mode == "off":
+            return []
+        if self.mode == "all":
+            return ["Ja", "Nee", "Off"]
+        # Once the follow-up limit is reached every verdict but 'Einde' is treated as 'Ja'
+        if flow.follow_up_count >= flow.max_follow_ups:
+            return ["Ja"]
+        if classification is not None:
+            verdict, confidence = classification
+            return [verdict] if confidence >= self.min_confidence else []
+        return ["Ja"] if len(user_message.split()) >= self.min_complete_words else []
+
+    async def run_turn(self, flow: QuestionnaireFlow, user_message: str,
+                       conversation_history: List[Dict]) -> Tuple[str, Dict, Optional[str]]:
+        """
+        Evaluate a user turn and speculatively generate the reply.
+
+        Args:
+            flow: Questionnaire state; only read, never changed
+            user_message: What the user just said
+            conversation_history: Conversation so far
+
+        Returns:
+            Tuple of (verdict, plan from flow.plan, generated reply or None on a miss)
+        """
+        llm_agent = self.llm_agent
+        history = list(conversation_history)
+        question = flow.current_question['text']
+        classification = None
+        if hasattr(llm_agent, "classify_turn"):
+            classification = llm_agent.classify_turn(user_message, question)
+            evaluation = asyncio.create_task(
+                llm_agent.aevaluate_response(user_message, history, question, classification=classification)
+            )
+        else:
+            evaluation = asyncio.create_task(llm_agent.aevaluate_response(user_message, history, question))
+
+        replies = {}
+        for verdict in self.candidate_verdicts(flow, user_message, classification):
+            plan = flow.plan(verdict, user_message)
+            key = (plan["prompt"], plan["follow_up_question"])
+            if plan["reply"] is not None or key in replies:
+                continue
+            replies[key] = asyncio.create_task(
+                llm_agent.agenerate_response(plan["prompt"], user_message, history, plan["follow_up_question"])
+            )
+
+        try:
+            verdict = await evaluation
+        except BaseException:
+            for task in replies.values():
+                task.cancel()
+            raise
+
+        plan = flow.plan(verdict, user_message)
+        key = (plan["prompt"], plan["follow_up_question"])
+        for other, task in replies.items():
+            if other != key:
+                task.cancel()
+
+        reply = None
+        if key in replies:
+            reply = await replies[key]
+            self.hits += 1
+        elif replies:
+            self.misses += 1
+        if replies:
+            print(f"Speculation {'hit' if reply is not None else 'miss'} "
+                  f"({self.hits} hits, {self.misses} misses)")
+        return verdict, plan, reply
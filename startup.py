@@ -0,0 +1,64 @@
+import threading
+from typing import Callable, Optional
+
+from metrics import Stopwatch
+
+
+class ModelPreloader:
+    def __init__(self, factory: Callable, warm_up: bool = True,
+                 stopwatch: Optional[Stopwatch] = None, name: str = "model"):
+        """
+        Build a slow-to-load agent in a background thread.
+
+        The bench can play its welcome message in the meantime; get() blocks
+        only for whatever loading time is left.
+
+        Args:
+            factory: Function that builds the agent, e.g. lambda: SpeechToTextAgent()
+            warm_up: Call the agent's warm_up() method once it is built
+            stopwatch: Optional stopwatch to record when loading finished
+            name: Label used in log messages
+        """
+        self.factory = factory
+        self.warm_up = warm_up
+        self.stopwatch = stopwatch
+        self.name = name
+        self._agent = None
+        self._error = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._load, daemon=True)
+        self._thread.start()
+
+    def _load(self) -> None:
+        try:
+            agent = self.factory()
+            if self.warm_up and hasattr(agent, "warm_up"):
+                agent.warm_up()
+            self._agent = agent
+            if self.stopwatch:
+                self.stopwatch.mark(f"{self.name} ready")
+        except Exception as e:
+            print(f"Error preloading {self.name}: {e}")
+            self._error = e
+        finally:
+            self._ready.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def get(self, timeout: Optional[float] = None):
+        """
+        Wait for the agent to finish loading.
+
+        Returns:
+            The loaded agent
+
+        Raises:
+            Exception: If loading failed or did not finish within the timeout
+        """
+        if not self._ready.wait(timeout):
+            raise Exception(f"Timed out waiting for {self.name} to load")
+        if self._error is not None:
+            raise Exception(f"Failed to load {self.name}: {self._error}")
+        return self._agent
@@ -0,0 +1,79 @@
+import threading
+import numpy as np
+
+
+class AudioRingBuffer:
+    def __init__(self, capacity: int):
+        """
+        Preallocated, fixed-size float32 ring buffer for microphone samples.
+
+        The sounddevice callback writes into it; readers get views addressed
+        by absolute sample position (samples written since the last reset).
+
+        Args:
+            capacity: Number of samples the buffer can hold
+        """
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.float32)
+        self._lock = threading.Lock()
+        self.total_written = 0
+
+    def reset(self) -> None:
+        """Forget all captured samples without reallocating."""
+        with self._lock:
+            self.total_written = 0
+
+    @property
+    def oldest(self) -> int:
+        """Absolute position of the oldest sample still held in the buffer."""
+        return max(0, self.total_written - self.capacity)
+
+    def write(self, block: np.ndarray) -> int:
+        """
+        Copy a block of samples into the buffer, wrapping around if needed.
+
+        Args:
+            block: Mono samples; multi-channel input must be flattened first
+
+        Returns:
+            int: Absolute position of the first sample of the block
+        """
+        block = block.reshape(-1)
+        frames = len(block)
+        if frames > self.capacity:
+            block = block[-self.capacity:]
+        with self._lock:
+            start = self.total_written
+            pos = (start + frames - len(block)) % self.capacity
+            first = min(len(block), self.capacity - pos)
+            self._data[pos:pos + first] = block[:first]
+            if first < len(block):
+                self._data[:len(block) - first] = block[first:]
+            self.total_written += frames
+        return start
+
+    def view(self, start: int = None, end: int = None) -> np.ndarray:
+        """
+        Return the samples between two absolute positions.
+
+        The result is a zero-copy view unless the span wraps around the end of
+        the buffer, in which case the two halves are joined into a new array.
+        A view is only valid until the buffer is reset or overwritten.
+
+        Args:
+            start: Absolute start position (defaults to the oldest sample held)
+            end: Absolute end position (defaults to the newest sample)
+
+        Returns:
+            numpy.ndarray: Float32 samples in capture order
+        """
+        with self._lock:
+            end = self.total_written if end is None else min(end, self.total_written)
+            start = self.oldest if start is None else max(start, self.oldest)
+            if start >= end:
+                return self._data[:0]
+            first = start % self.capacity
+            last = first + (end - start)
+            if last <= self.capacity:
+                return self._data[first:last]
+            return np.concatenate((self._data[first:], self._data[:last - self.capacity]))
@@ -0,0 +1,280 @@
+import abc
+import itertools
+import json
+import os
+import contextlib
+import numpy as np
+
+from pathlib import Path
+from typing import Dict, Optional
+
+from paths import cache_path
+from stt.inference_config import InferenceConfig
+
+
+class STTBackend(abc.ABC):
+    """
+    Interface for speech recognition engines used by SpeechToTextAgent.
+
+    Backends take float32 mono audio at 16 kHz and return a Whisper-style
+    result: {"text": str, "segments": [{"start": float, "end": float, "text": str}]}
+    with segment times in seconds relative to the start of the audio.
+    """
+    name = "base"
+    sample_rate = 16000
+
+    @abc.abstractmethod
+    def transcribe(self, audio: np.ndarray, language: str = "nl",
+                   initial_prompt: Optional[str] = None) -> Dict:
+        pass
+
+
+class WhisperBackend(STTBackend):
+    name = "whisper"
+
+    def __init__(self, model_name: str = "base", config: Optional[InferenceConfig] = None,
+                 cache_dir: Optional[str] = None):
+        """
+        OpenAI Whisper running on PyTorch.
+
+        Downloaded weights are kept in the cache directory. Quantized weights are
+        saved there after conversion as a plain state dict and memory-mapped on
+        later loads into a model built on the meta device, so a restart skips
+        loading, initializing and converting the fp32 model.
+
+        Args:
+            model_name: Whisper model size ('tiny', 'base', 'small', 'medium', 'large')
+            config: Device, precision, threading and quantization settings
+            cache_dir: Where to keep weights (defaults to the bench cache)
+        """
+        import torch
+        import whisper
+
+        self.config = (config or InferenceConfig()).resolve()
+        self.config.apply_threads()
+        cache_dir = Path(cache_dir) if cache_dir else cache_path("whisper")
+        quantized_path = cache_dir / f"{Path(model_name).stem}-int8.pt"
+
+        self.model = None
+        if self.config.quantize and quantized_path.exists():
+            try:
+                self.model = self._load_quantized(quantized_path, model_name)
+            except Exception as e:
+                print(f"Could not load cached quantized model, rebuilding it: {e}")
+
+        if self.model is None:
+            self.model = whisper.load_model(model_name, device=self.config.device,
+                                            download_root=str(cache_dir))
+            if self.config.quantize:
+                self.model = self._quantize(self.model)
+                self._save_quantized(self.model, quantized_path)
+        self.fp16 = self.config.dtype == "fp16"
+        self.bf16 = self.config.dtype == "bf16"
+        print(f"Loaded Whisper '{model_name}' ({self.config.describe()})")
+
+    @staticmethod
+    def _quantize(model):
+        import torch
+
+        # quantize_dynamic only converts exact nn.Linear modules. Whisper's Linear
+        # subclass overrides forward only to cast the weights to the input dtype,
+        # which is a no-op here (quantization runs in fp32), so each one is
+        # replaced by a plain nn.Linear sharing its parameters
+        for parent in list(model.modules()):
+            for name, child in list(parent.named_children()):
+                if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+                    linear = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None,
+                                             device="meta")
+                    linear.weight = child.weight
+                    linear.bias = child.bias
+                    setattr(parent, name, linear)
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    @staticmethod
+    def _save_quantized(model, path: Path) -> None:
+        import torch
+
+        # Tensors only, so the file can be loaded with weights_only=True. Buffers left out of the
+        # state dict (the decoder mask, the alignment heads) are kept too, dense, so loading
+        # doesn't need to initialize the model first
+        state = model.state_dict()
+        extra = {name: buffer for name, buffer in model.named_buffers() if name not in state}
+        temp = path.with_suffix(".tmp")
+        torch.save({
+            "dims": vars(model.dims),
+            "state_dict": state,
+            "buffers": {name: buffer.to_dense() if buffer.is_sparse else buffer for name, buffer in extra.items()},
+            "sparse_buffers": [name for name, buffer in extra.items() if buffer.is_sparse],
+        }, temp)
+        os.replace(str(temp), str(path))
+
+    def _load_quantized(self, path: Path, model_name: str):
+        import torch
+        import whisper
+        from whisper.model import ModelDimensions, Whisper
+
+        checkpoint = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+        # Build the structure on the meta device, so nothing is allocated or initialized, with empty
+        # int8 layers in place of the linear ones; the cached tensors are then assigned, not copied
+        with torch.device("meta"):
+            model = Whisper(ModelDimensions(**checkpoint["dims"]))
+        for parent in list(model.modules()):
+            for name, child in list(parent.named_children()):
+                if isinstance(child, torch.nn.Linear):
+                    setattr(parent, name, torch.ao.nn.quantized.dynamic.Linear(
+                        child.in_features, child.out_features, bias_=child.bias is not None, dtype=torch.qint8))
+        model.load_state_dict(checkpoint["state_dict"], assign=True)
+        for name, buffer in checkpoint["buffers"].items():
+            module_name, _, buffer_name = name.rpartition(".")
+            if name in checkpoint["sparse_buffers"]:
+                buffer = buffer.to_sparse()
+            model.get_submodule(module_name).register_buffer(buffer_name, buffer, persistent=False)
+        if any(tensor.is_meta for tensor in itertools.chain(model.parameters(), model.buffers())):
+            raise Exception(f"{path} is missing some of the model's tensors")
+        alignment_heads = whisper._ALIGNMENT_HEADS.get(model_name)
+        if alignment_heads is not None:
+            model.set_alignment_heads(alignment_heads)
+        return model
+
+    def transcribe(self, audio, language="nl", initial_prompt=None):
+        if self.bf16:
+            import torch
+            precision = torch.autocast(device_type=self.config.device, dtype=torch.bfloat16)
+        else:
+            precision = contextlib.nullcontext()
+        with precision:
+            return self.model.transcribe(
+                audio,
+                fp16=self.fp16,
+                language=language,
+                initial_prompt=initial_prompt
+            )
+
+
+class FasterWhisperBackend(STTBackend):
+    name = "faster-whisper"
+    COMPUTE_TYPES = {"fp32": "float32", "fp16": "float16", "bf16": "bfloat16"}
+
+    def __init__(self, model_name: str = "base", config: Optional[InferenceConfig] = None,
+                 beam_size: int = 5, cache_dir: Optional[str] = None):
+        """
+        Whisper converted to CTranslate2, with int8 quantized weights by default.
+
+        Args:
+            model_name: Whisper model size or path to a converted model
+            config: Device, precision, threading and quantization settings
+                (defaults to int8 on CPU)
+            beam_size: Beam size used for decoding
+            cache_dir: Where to keep converted models (defaults to the bench cache)
+        """
+        from faster_whisper import WhisperModel
+
+        self.config = (config or InferenceConfig(device="cpu", quantize=True)).resolve()
+        if self.config.quantize:
+            compute_type = "int8"
+        else:
+            compute_type = self.COMPUTE_TYPES[self.config.dtype]
+
+        self.model = WhisperModel(model_name,
+                                  device=self.config.device,
+                                  compute_type=compute_type,
+                                  cpu_threads=self.config.num_threads or 0,
+                                  num_workers=self.config.workers,
+                                  download_root=str(cache_dir or cache_path("faster-whisper")))
+        self.beam_size = beam_size
+        print(f"Loaded faster-whisper '{model_name}' (device={self.config.device}, "
+              f"compute_type={compute_type}, cpu_threads={self.config.num_threads or 'auto'}, "
+              f"workers={self.config.workers})")
+
+    def transcribe(self, audio, language="nl", initial_prompt=None):
+        segments, _ = self.model.transcribe(
+            audio,
+            language=language,
+            initial_prompt=initial_prompt,
+            beam_size=self.beam_size
+        )
+        segments = [
+            {"start": segment.start, "end": segment.end, "text": segment.text}
+            for segment in segments
+        ]
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments
+        }
+
+
+class VoskBackend(STTBackend):
+    name = "vosk"
+
+    def __init__(self, model_path: Optional[str] = None, language: str = "nl",
+                 chunk_size: int = 4000):
+        """
+        Kaldi-based Vosk streaming recognizer.
+
+        Args:
+            model_path: Path to an unpacked Vosk model; downloaded by language if omitted
+            language: Model language used when no path is given
+            chunk_size: Number of samples fed to the recognizer at a time
+        """
+        import vosk
+
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.model = vosk.Model(model_path) if model_path else vosk.Model(lang=language)
+        self.chunk_size = chunk_size
+
+    def transcribe(self, audio, language="nl", initial_prompt=None):
+        recognizer = self._vosk.KaldiRecognizer(self.model, self.sample_rate)
+        recognizer.SetWords(True)
+
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+        results = []
+        for offset in range(0, len(pcm), self.chunk_size):
+            if recognizer.AcceptWaveform(pcm[offset:offset + self.chunk_size].tobytes()):
+                results.append(json.loads(recognizer.Result()))
+        results.append(json.loads(recognizer.FinalResult()))
+
+        segments = []
+        for result in results:
+            words = result.get("result", [])
+            if not words:
+                continue
+            segments.append({
+                "start": words[0]["start"],
+                "end": words[-1]["end"],
+                "text": " " + result.get("text", "")
+            })
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments
+        }
+
+
+BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+    VoskBackend.name: VoskBackend,
+}
+
+
+def load_backend(name: str, model_name: str = "base", language: str = "nl",
+                 config: Optional[InferenceConfig] = None, **kwargs) -> STTBackend:
+    """
+    Create a speech recognition backend by name.
+
+    Args:
+        name: One of 'whisper', 'faster-whisper' or 'vosk'
+        model_name: Whisper model size for the Whisper backends (ignored by Vosk,
+            which takes a model_path option instead)
+        language: Recognition language, used by Vosk to pick a model
+        config: Inference settings for the Whisper backends
+        **kwargs: Passed on to the backend's constructor
+
+    Returns:
+        STTBackend: The loaded backend
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown STT backend '{name}', expected one of {sorted(BACKENDS)}")
+    if name == VoskBackend.name:
+        return VoskBackend(language=language, **kwargs)
+    return BACKENDS[name](model_name=model_name, config=config, **kwargs)
@@ -0,0 +1,144 @@
+"""
+Compare speech recognition backends on recorded WAV fixtures.
+
+Every ``<name>.wav`` in the fixture directory needs a ``<name>.txt`` next to it
+holding the reference transcript. For each backend the script reports the
+real-time factor (decode time / audio duration) and the word error rate.
+
+Usage:
+    python -m stt.benchmark fixtures/ --backend whisper:base --backend faster-whisper:base --backend vosk
+"""
+import argparse
+import re
+import time
+import wave
+import numpy as np
+
+from pathlib import Path
+from typing import List, Tuple
+
+from stt.backends import load_backend
+
+
+def load_wav(path: Path, sample_rate: int = 16000) -> np.ndarray:
+    """Read a 16-bit PCM WAV file as mono float32 at the given sample rate."""
+    with wave.open(str(path), "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise Exception(f"{path}: only 16-bit PCM WAV files are supported")
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        pcm = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+
+    audio = pcm.reshape(-1, channels).mean(axis=1).astype(np.float32) / 32768.0
+    if rate != sample_rate:
+        positions = np.arange(0, len(audio), rate / sample_rate)
+        audio = np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+    return audio
+
+
+def normalize_words(text: str) -> List[str]:
+    return re.sub(r"[^\w\s]", " ", text.lower()).split()
+
+
+def word_error_rate(reference: str, hypothesis: str) -> Tuple[int, int]:
+    """
+    Word-level edit distance between a reference and a hypothesis.
+
+    Returns:
+        Tuple[int, int]: (errors, number of reference words)
+    """
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1,
+                               current[j - 1] + 1,
+                               previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def load_fixtures(directory: Path):
+    fixtures = []
+    for wav_path in sorted(directory.glob("*.wav")):
+        txt_path = wav_path.with_suffix(".txt")
+        if not txt_path.exists():
+            print(f"Skipping {wav_path.name}: no reference transcript")
+            continue
+        fixtures.append((wav_path.name, load_wav(wav_path), txt_path.read_text(encoding="utf-8")))
+    return fixtures
+
+
+def benchmark_backend(spec: str, fixtures, language: str = "nl", verbose: bool = False) -> dict:
+    """
+    Load a backend and run it over all fixtures.
+
+    Args:
+        spec: Backend name, optionally followed by ':<model name>'
+        fixtures: List of (name, audio, reference) tuples
+        language: Recognition language
+
+    Returns:
+        dict: Load time, real-time factor and word error rate for the backend
+    """
+    name, _, model_name = spec.partition(":")
+    started = time.perf_counter()
+    backend = load_backend(name, model_name=model_name or "base", language=language)
+    load_time = time.perf_counter() - started
+
+    # Warm up so lazy initialisation is not counted against the first fixture
+    backend.transcribe(np.zeros(backend.sample_rate, dtype=np.float32), language=language)
+
+    audio_seconds = decode_seconds = 0.0
+    errors = words = 0
+    for fixture_name, audio, reference in fixtures:
+        started = time.perf_counter()
+        text = backend.transcribe(audio, language=language)["text"]
+        elapsed = time.perf_counter() - started
+
+        fixture_errors, fixture_words = word_error_rate(reference, text)
+        audio_seconds += len(audio) / backend.sample_rate
+        decode_seconds += elapsed
+        errors += fixture_errors
+        words += fixture_words
+        if verbose:
+            print(f"  [{spec}] {fixture_name}: RTF {elapsed / (len(audio) / backend.sample_rate):.3f}, "
+                  f"WER {fixture_errors / max(fixture_words, 1):.1%} -> {text.strip()}")
+
+    return {
+        "backend": spec,
+        "load_time": load_time,
+        "rtf": decode_seconds / audio_seconds if audio_seconds else 0.0,
+        "wer": errors / words if words else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark STT backends on WAV fixtures.")
+    parser.add_argument("fixtures", type=Path, help="Directory with <name>.wav and <name>.txt files")
+    parser.add_argument("--backend", action="append", dest="backends",
+                        help="Backend to test, e.g. 'whisper:base', 'faster-whisper:small', 'vosk'")
+    parser.add_argument("--language", default="nl")
+    parser.add_argument("--verbose", action="store_true", help="Print per-fixture results")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        raise SystemExit(f"No fixtures found in {args.fixtures}")
+
+    results = []
+    for spec in args.backends or ["whisper:base", "faster-whisper:base", "vosk"]:
+        try:
+            results.append(benchmark_backend(spec, fixtures, args.language, args.verbose))
+        except Exception as e:
+            print(f"Error benchmarking {spec}: {e}")
+
+    print(f"\n{'backend':<24}{'load (s)':>10}{'RTF':>10}{'WER':>10}")
+    for result in results:
+        print(f"{result['backend']:<24}{result['load_time']:>10.2f}{result['rtf']:>10.3f}{result['wer']:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
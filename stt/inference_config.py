@@ -0,0 +1,85 @@
+from typing import Optional
+
+
+def _cuda_available() -> bool:
+    # Ask whichever runtime is installed, so faster-whisper doesn't need torch
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except ImportError:
+        pass
+    try:
+        import ctranslate2
+        return ctranslate2.get_cuda_device_count() > 0
+    except ImportError:
+        return False
+
+
+class InferenceConfig:
+    DTYPES = ("fp32", "fp16", "bf16")
+
+    def __init__(self,
+                 device: str = "auto",
+                 dtype: str = "fp32",
+                 num_threads: Optional[int] = None,
+                 interop_threads: Optional[int] = None,
+                 quantize: bool = False,
+                 workers: int = 1):
+        """
+        Inference settings for the Whisper backends, applied once at load time.
+
+        Args:
+            device: 'cpu', 'cuda' or 'auto' (CUDA when available)
+            dtype: Compute precision: 'fp32', 'fp16' (CUDA only) or 'bf16'
+            num_threads: Intra-op CPU threads (torch.set_num_threads); None keeps the default
+            interop_threads: Inter-op CPU threads (torch.set_num_interop_threads)
+            quantize: Dynamically quantize linear layers to int8 (CPU only)
+            workers: Transcriptions faster-whisper can run in parallel (its num_workers)
+        """
+        if dtype not in self.DTYPES:
+            raise ValueError(f"Unknown dtype '{dtype}', expected one of {self.DTYPES}")
+        self.device = device
+        self.dtype = dtype
+        self.num_threads = num_threads
+        self.interop_threads = interop_threads
+        self.quantize = quantize
+        self.workers = workers
+        self._resolved = False
+
+    def resolve(self) -> "InferenceConfig":
+        """Pick the concrete device and drop settings the device cannot honour."""
+        if self._resolved:
+            return self
+
+        if self.device == "auto":
+            self.device = "cuda" if _cuda_available() else "cpu"
+        if self.device == "cpu" and self.dtype == "fp16":
+            print("fp16 is not supported on CPU, falling back to fp32.")
+            self.dtype = "fp32"
+        if self.device != "cpu" and self.quantize:
+            print("Dynamic quantization is only supported on CPU, disabling it.")
+            self.quantize = False
+        if self.quantize and self.dtype != "fp32":
+            print(f"Dynamic quantization runs in fp32, ignoring dtype {self.dtype}.")
+            self.dtype = "fp32"
+        self._resolved = True
+        return self
+
+    def apply_threads(self) -> None:
+        """Configure PyTorch's CPU thread pools."""
+        import torch
+
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+        if self.interop_threads:
+            try:
+                torch.set_num_interop_threads(self.interop_threads)
+            except RuntimeError as e:
+                # Can only be set once, before any inter-op parallel work has started
+                print(f"Could not set inter-op threads: {e}")
+
+    def describe(self) -> str:
+        import torch
+
+        return (f"device={self.device}, dtype={self.dtype}, quantize={self.quantize}, "
+                f"threads={torch.get_num_threads()}, interop_threads={torch.get_num_interop_threads()}")
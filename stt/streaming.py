@@ -0,0 +1,141 @@
+import re
+import threading
+from typing import Callable, Dict, List, Optional
+
+from stt.audio_buffer import AudioRingBuffer
+from stt.vad import VoiceActivityDetector
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", "", text).lower().split())
+
+
+class StreamingTranscriber:
+    def __init__(self,
+                 decode: Callable[..., Dict],
+                 buffer: AudioRingBuffer,
+                 vad: VoiceActivityDetector,
+                 sample_rate: int = 16000,
+                 step: float = 1.0,
+                 min_window: float = 1.0,
+                 max_window: float = 20.0,
+                 on_partial: Optional[Callable[[str, str], None]] = None):
+        """
+        Decode overlapping windows of the live recording in a background thread.
+
+        Each pass decodes the audio from the last committed position up to the
+        newest sample. Segments that two consecutive passes agree on are
+        committed and the window start moves past them, so when the turn ends
+        only the uncommitted tail is left to decode.
+
+        Args:
+            decode: Function (audio, initial_prompt) -> {"text", "segments"} with
+                segment "start"/"end" times in seconds relative to the audio
+            buffer: Ring buffer the microphone callback is writing into
+            vad: Detector for the current utterance, used to skip leading silence
+            sample_rate: Audio sampling rate in Hz
+            step: Minimum time between two decoding passes (seconds)
+            min_window: Minimum amount of new audio before a pass is run (seconds)
+            max_window: Window length after which everything but the last
+                segment is committed without waiting for agreement (seconds)
+            on_partial: Called with (committed_text, tentative_text) after every pass
+        """
+        self.decode = decode
+        self.buffer = buffer
+        self.vad = vad
+        self.sample_rate = sample_rate
+        self.step = step
+        self.min_window = int(min_window * sample_rate)
+        self.max_window = int(max_window * sample_rate)
+        self.on_partial = on_partial
+
+        self.committed: List[str] = []
+        self.committed_until = 0
+        self._previous: List[Dict] = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def committed_text(self) -> str:
+        return " ".join(self.committed).strip()
+
+    def start(self) -> None:
+        """Start decoding in the background; call after the buffer and VAD are reset."""
+        self.committed = []
+        self.committed_until = 0
+        self._previous = []
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background worker, waiting for a pass in progress to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def finish(self, bounds) -> str:
+        """
+        Stop streaming and decode the remaining tail of the utterance.
+
+        Args:
+            bounds: (start, end) sample positions of the trimmed utterance
+
+        Returns:
+            str: Full transcription of the utterance
+        """
+        self.stop()
+        start = max(self.committed_until, bounds[0])
+        end = bounds[1]
+        if end - start > 0:
+            result = self.decode(self.buffer.view(start, end), initial_prompt=self._prompt())
+            self.committed.append(result["text"].strip())
+        return self.committed_text
+
+    def _prompt(self) -> Optional[str]:
+        text = self.committed_text
+        return text[-200:] if text else None
+
+    def _worker(self) -> None:
+        while not self._stop.wait(self.step):
+            if not self.vad.speech_started:
+                continue
+            start = max(self.committed_until, self.vad.speech_start - self.vad.padding, 0)
+            end = self.buffer.total_written
+            if end - start < self.min_window:
+                continue
+            try:
+                result = self.decode(self.buffer.view(start, end), initial_prompt=self._prompt())
+            except Exception as e:
+                print(f"Error in streaming transcription: {e}")
+                continue
+            if self._stop.is_set():
+                break
+            self._advance(result.get("segments", []), start, end)
+
+    def _advance(self, segments: List[Dict], start: int, end: int) -> None:
+        hypothesis = [
+            {"text": seg["text"].strip(), "end": start + int(seg["end"] * self.sample_rate)}
+            for seg in segments if seg["text"].strip()
+        ]
+
+        # Commit the prefix of segments this pass agrees on with the previous one
+        agreed = 0
+        for new, old in zip(hypothesis, self._previous):
+            if _normalize(new["text"]) != _normalize(old["text"]):
+                break
+            agreed += 1
+        # Never commit the last segment: it may still be cut off mid-word
+        agreed = max(0, min(agreed, len(hypothesis) - 1))
+        if end - start > self.max_window:
+            agreed = max(agreed, len(hypothesis) - 1)
+
+        if agreed > 0:
+            self.committed.extend(seg["text"] for seg in hypothesis[:agreed])
+            self.committed_until = hypothesis[agreed - 1]["end"]
+        self._previous = hypothesis[agreed:]
+
+        if self.on_partial is not None:
+            tentative = " ".join(seg["text"] for seg in self._previous)
+            self.on_partial(self.committed_text, tentative)
@@ -1,90 +1,154 @@
-import whisper
 import numpy as np
 import sounddevice as sd
-import torch
+import threading
+import warnings
 from pathlib import Path
 
-from typing import Optional
+from typing import Callable, Dict, Optional, Union
+
+from stt.audio_buffer import AudioRingBuffer
+from stt.backends import STTBackend, load_backend
+from stt.inference_config import InferenceConfig
+from stt.vad import VoiceActivityDetector, AmplitudeVAD, SpectralVAD
+from stt.streaming import StreamingTranscriber
 
 class SpeechToTextAgent:
     def __init__(self, 
                  model_name: str = "base",
                  sample_rate: int = 16000,
                  recording_duration: float = 360.0,
-                 silence_threshold: float = 0.05,
+                 silence_threshold: Optional[float] = None,
                  silence_duration: float = 9.0,
-                 language = "nl"):
+                 language = "nl",
+                 vad: Optional[VoiceActivityDetector] = None,
+                 streaming: bool = False,
+                 on_partial: Optional[Callable[[str, str], None]] = None,
+                 backend: Union[str, STTBackend] = "whisper",
+                 backend_options: Optional[Dict] = None,
+                 inference_config: Optional[InferenceConfig] = None):
         """
-        Initialize the Speech-to-Text agent using Whisper.
+        Initialize the Speech-to-Text agent.
         
         Args:
             model_name: Whisper model size ('tiny', 'base', 'small', 'medium', 'large')
             sample_rate: Audio sampling rate in Hz
             recording_duration: Maximum recording duration in seconds
-            silence_threshold: Amplitude threshold for silence detection
-            silence_duration: Duration of silence to stop recording (seconds)
+            silence_threshold: Deprecated, pass vad=AmplitudeVAD(threshold=...) instead
+            silence_duration: How long to wait for speech to start before giving up (seconds)
+            language: Language code passed to Whisper
+            vad: Voice activity detector deciding when the turn ends (defaults to SpectralVAD)
+            streaming: Decode while the user is still speaking instead of afterwards
+            on_partial: Called with (committed_text, tentative_text) while streaming
+            backend: Recognition engine ('whisper', 'faster-whisper', 'vosk') or a loaded STTBackend
+            backend_options: Extra constructor arguments for the backend
+            inference_config: Device, precision, thread and quantization settings for Whisper
         """
-        self.model = whisper.load_model(model_name)
+        if silence_threshold is not None:
+            warnings.warn("silence_threshold is deprecated, pass vad=AmplitudeVAD(threshold=...) instead",
+                          DeprecationWarning, stacklevel=2)
+            if vad is not None:
+                raise ValueError("Pass either silence_threshold or vad, not both")
+            vad = AmplitudeVAD(threshold=silence_threshold, sample_rate=sample_rate)
+
+        if isinstance(backend, STTBackend):
+            self.backend = backend
+        else:
+            self.backend = load_backend(backend, model_name=model_name, language=language,
+                                        config=inference_config, **(backend_options or {}))
         self.sample_rate = sample_rate
         self.recording_duration = recording_duration
-        self.silence_threshold = silence_threshold
         self.silence_duration = silence_duration
+        self.vad = vad if vad is not None else SpectralVAD(sample_rate=sample_rate)
+        self.streaming = streaming
+        self.on_partial = on_partial
         self.default_language= language
 
-        
-        # Check for CUDA availability
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        # Preallocated capture buffer, reused for every recording
+        self.audio_buffer = AudioRingBuffer(int(recording_duration * sample_rate))
 
-    def record_audio(self) -> Optional[np.ndarray]:
+    def record_audio(self, streamer: Optional[StreamingTranscriber] = None) -> Optional[np.ndarray]:
         """
-        Record audio from the microphone with silence detection.
-        
+        Record audio from the microphone until the voice activity detector ends the turn.
+
+        Samples are written straight into a preallocated ring buffer by the
+        audio callback, which also feeds the VAD per block, so the end of the
+        utterance is detected on the exact block it occurs in. Leading and
+        trailing silence is trimmed from the result.
+
+        Args:
+            streamer: Optional transcriber to start once capture begins; the
+                caller is responsible for finishing or stopping it
+
         Returns:
-            numpy.ndarray: Recorded audio data, or None if recording failed
+            numpy.ndarray: Zero-copy view of the detected speech (valid until the
+            next recording), or None if no speech was captured
         """
         try:
             print("Listening... (speak now)")
-            
-            # Initialize recording buffer
-            recording = []
-            silence_samples = 0
-            max_samples = int(self.recording_duration * self.sample_rate)
-            
+
+            buffer = self.audio_buffer
+            buffer.reset()
+            vad = self.vad
+            vad.reset()
+            if streamer is not None:
+                streamer.start()
+            max_samples = buffer.capacity
+            no_speech_limit = int(self.silence_duration * self.sample_rate)
+            finished = threading.Event()
+
             def audio_callback(indata, frames, time, status):
                 if status:
                     print(f"Audio callback status: {status}")
-                recording.append(indata.copy())
+                if finished.is_set():
+                    return
+
+                block = indata[:max_samples - buffer.total_written, 0]
+                buffer.write(block)
+
+                if vad.process(block):
+                    finished.set()
+                elif not vad.speech_started and buffer.total_written >= no_speech_limit:
+                    finished.set()
+                elif buffer.total_written >= max_samples:
+                    finished.set()
 
             with sd.InputStream(samplerate=self.sample_rate,
                               channels=1,
+                              dtype="float32",
                               callback=audio_callback):
-                
-                while len(recording) * 1024 < max_samples:
-                    # Convert latest audio chunk to amplitude
-                    if recording:
-                        latest_chunk = np.abs(recording[-1]).mean()
-                        
-                        # Check for silence
-                        if latest_chunk < self.silence_threshold:
-                            silence_samples += len(recording[-1])
-                            if silence_samples > self.silence_duration * self.sample_rate:
-                                break
-                        else:
-                            silence_samples = 0
-                            
-                    sd.sleep(10)  # Small sleep to prevent CPU overload
-
-            if not recording:
+                finished.wait(timeout=self.recording_duration + 1.0)
+
+            bounds = vad.trim_bounds(buffer.total_written)
+            if bounds is None:
                 return None
 
-            # Concatenate all recorded chunks
-            audio_data = np.concatenate(recording, axis=0)
-            return audio_data.flatten()
+            return buffer.view(*bounds)
 
         except Exception as e:
             print(f"Error recording audio: {e}")
             return None
 
+    def decode(self, audio: np.ndarray, initial_prompt: Optional[str] = None) -> Dict:
+        """
+        Run the speech recognition backend on a block of audio.
+
+        Args:
+            audio: Float32 samples at the agent's sample rate
+            initial_prompt: Optional text preceding the audio, for context
+
+        Returns:
+            dict: Whisper-style result with "text" and "segments"
+        """
+        return self.backend.transcribe(
+            audio,
+            language=self.default_language,
+            initial_prompt=initial_prompt
+        )
+
+    def warm_up(self) -> None:
+        """Run one decode on silence so lazy initialisation is paid before the first user."""
+        self.decode(np.zeros(self.sample_rate, dtype=np.float32))
+
     def transcribe_audio(self) -> str:
         """
         Record and transcribe audio to text.
@@ -92,6 +156,9 @@ class SpeechToTextAgent:
         Returns:
             str: Transcribed text, or empty string if transcription failed
         """
+        if self.streaming:
+            return self.transcribe_streaming()
+
         try:
             # Record audio
             audio_data = self.record_audio()
@@ -100,12 +167,8 @@ class SpeechToTextAgent:
 
             print("Processing speech...")
             
-            # Transcribe using Whisper
-            result = self.model.transcribe(
-                audio_data,
-                fp16=torch.cuda.is_available(),
-                language=self.default_language  # You can change this for other languages
-            )
+            # Transcribe using the selected backend
+            result = self.decode(audio_data)
             
             transcribed_text = result["text"].strip()
             
@@ -115,4 +178,32 @@ class SpeechToTextAgent:
             print(f"Error transcribing audio: {e}")
             return ""
 
+    def transcribe_streaming(self) -> str:
+        """
+        Record and transcribe audio, decoding overlapping windows while the user speaks.
 
+        Returns:
+            str: Transcribed text, or empty string if transcription failed
+        """
+        streamer = StreamingTranscriber(
+            self.decode,
+            self.audio_buffer,
+            self.vad,
+            sample_rate=self.sample_rate,
+            on_partial=self.on_partial
+        )
+        try:
+            audio_data = self.record_audio(streamer=streamer)
+            if audio_data is None:
+                streamer.stop()
+                return ""
+
+            print("Processing speech...")
+
+            bounds = self.vad.trim_bounds(self.audio_buffer.total_written)
+            return streamer.finish(bounds)
+
+        except Exception as e:
+            streamer.stop()
+            print(f"Error transcribing audio: {e}")
+            return ""
@@ -0,0 +1,168 @@
+import abc
+
+import numpy as np
+
+
+class VoiceActivityDetector(abc.ABC):
+    def __init__(self, sample_rate: int = 16000, frame_ms: float = 30.0,
+                 hangover_ms: float = 600.0, min_speech_ms: float = 90.0,
+                 padding_ms: float = 200.0):
+        """
+        Base class for frame-based voice activity detectors.
+
+        Incoming blocks of any size are cut into fixed frames. Subclasses only
+        decide whether a single frame contains speech; this class turns those
+        decisions into speech onset, end-of-turn and trim boundaries.
+
+        Args:
+            sample_rate: Audio sampling rate in Hz
+            frame_ms: Analysis frame length in milliseconds
+            hangover_ms: Non-speech time after speech that ends the turn
+            min_speech_ms: Consecutive speech needed before speech counts as started
+            padding_ms: Audio kept around the detected speech when trimming
+        """
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.hangover_frames = max(1, int(round(hangover_ms / frame_ms)))
+        self.min_speech_frames = max(1, int(round(min_speech_ms / frame_ms)))
+        self.padding = int(sample_rate * padding_ms / 1000)
+        self._pending = np.zeros(self.frame_length, dtype=np.float32)
+        self.reset()
+
+    def reset(self) -> None:
+        """Prepare for a new utterance."""
+        self._pending_count = 0
+        self.position = 0
+        self.speech_started = False
+        self.end_of_turn = False
+        self.speech_start = None
+        self.speech_end = None
+        self._speech_run = 0
+        self._silence_run = 0
+
+    @abc.abstractmethod
+    def is_speech(self, frame: np.ndarray) -> bool:
+        """Classify a single frame; implemented by subclasses."""
+
+    def process(self, block: np.ndarray) -> bool:
+        """
+        Feed a block of samples to the detector.
+
+        Args:
+            block: Mono float32 samples in capture order
+
+        Returns:
+            bool: True once the end of the turn has been detected
+        """
+        block = block.reshape(-1)
+        offset = 0
+        while offset < len(block):
+            take = min(self.frame_length - self._pending_count, len(block) - offset)
+            self._pending[self._pending_count:self._pending_count + take] = block[offset:offset + take]
+            self._pending_count += take
+            offset += take
+            if self._pending_count == self.frame_length:
+                self._update(self.is_speech(self._pending))
+                self._pending_count = 0
+                self.position += self.frame_length
+        return self.end_of_turn
+
+    def _update(self, speech: bool) -> None:
+        frame_end = self.position + self.frame_length
+        if speech:
+            self._speech_run += 1
+            self._silence_run = 0
+            if not self.speech_started and self._speech_run >= self.min_speech_frames:
+                self.speech_started = True
+                self.speech_start = frame_end - self._speech_run * self.frame_length
+            if self.speech_started:
+                self.speech_end = frame_end
+        else:
+            self._speech_run = 0
+            if self.speech_started:
+                self._silence_run += 1
+                if self._silence_run >= self.hangover_frames:
+                    self.end_of_turn = True
+
+    def trim_bounds(self, total_samples: int):
+        """
+        Return the span of detected speech, padded, within the captured audio.
+
+        Args:
+            total_samples: Number of samples captured for this utterance
+
+        Returns:
+            tuple: (start, end) sample positions, or None if no speech was found
+        """
+        if not self.speech_started:
+            return None
+        start = max(0, self.speech_start - self.padding)
+        end = min(total_samples, self.speech_end + self.padding)
+        return start, end
+
+
+class AmplitudeVAD(VoiceActivityDetector):
+    def __init__(self, threshold: float = 0.05, **kwargs):
+        """
+        Mean-amplitude detector matching the original silence check.
+
+        Args:
+            threshold: Mean absolute amplitude above which a frame is speech
+        """
+        self.threshold = threshold
+        super().__init__(**kwargs)
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        return float(np.abs(frame).mean()) >= self.threshold
+
+
+class SpectralVAD(VoiceActivityDetector):
+    def __init__(self, energy_margin_db: float = 9.0, min_energy_db: float = -55.0,
+                 noise_adaptation: float = 0.05, band_ratio_threshold: float = 0.55,
+                 flatness_threshold: float = 0.45, **kwargs):
+        """
+        Energy and spectral-shape detector with an adaptive noise floor.
+
+        A frame is speech when its energy is clearly above the tracked noise
+        floor and its spectrum looks like a voice: most power in the 300-3400 Hz
+        band, or a peaky (low flatness) spectrum. The noise floor follows the
+        energy of non-speech frames and drops immediately to quieter frames.
+
+        Args:
+            energy_margin_db: Required energy above the noise floor in dB
+            min_energy_db: Absolute energy (dBFS) below which a frame is never speech
+            noise_adaptation: Smoothing factor for the noise floor (0-1)
+            band_ratio_threshold: Minimum share of power in the voice band
+            flatness_threshold: Maximum spectral flatness of a voiced frame
+        """
+        self.energy_margin_db = energy_margin_db
+        self.min_energy_db = min_energy_db
+        self.noise_adaptation = noise_adaptation
+        self.band_ratio_threshold = band_ratio_threshold
+        self.flatness_threshold = flatness_threshold
+        self.noise_floor_db = None
+        super().__init__(**kwargs)
+
+        self._fft_size = 1 << (self.frame_length - 1).bit_length()
+        self._window = np.hanning(self.frame_length).astype(np.float32)
+        freqs = np.fft.rfftfreq(self._fft_size, 1.0 / self.sample_rate)
+        self._voice_band = (freqs >= 300) & (freqs <= 3400)
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        energy_db = 10.0 * np.log10(float(np.mean(frame * frame)) + 1e-10)
+        if self.noise_floor_db is None:
+            self.noise_floor_db = energy_db
+
+        speech = False
+        if energy_db > self.min_energy_db and energy_db > self.noise_floor_db + self.energy_margin_db:
+            power = np.abs(np.fft.rfft(frame * self._window, self._fft_size)) ** 2 + 1e-12
+            band_power = power[self._voice_band]
+            band_ratio = band_power.sum() / power.sum()
+            flatness = np.exp(np.mean(np.log(band_power))) / np.mean(band_power)
+            speech = band_ratio >= self.band_ratio_threshold or flatness <= self.flatness_threshold
+
+        if energy_db < self.noise_floor_db:
+            self.noise_floor_db = energy_db
+        elif not speech:
+            self.noise_floor_db += self.noise_adaptation * (energy_db - self.noise_floor_db)
+        return speech
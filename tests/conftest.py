@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The bench modules live in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import paths  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def bench_cache(tmp_path, monkeypatch):
+    """Keep the spool, tokens and caches the tests write out of the user's real bench cache."""
+    cache_dir = tmp_path / "bench-cache"
+    monkeypatch.setenv("BENCH_CACHE_DIR", str(cache_dir))
+    monkeypatch.setattr(paths, "CACHE_DIR", cache_dir)
+    return cache_dir
+
+
+class Stub:
+    def __init__(self, server, backend, api_url, sign_in_url, refresh_url):
+        self.server = server
+        self.backend = backend
+        self.api_url = api_url
+        self.sign_in_url = sign_in_url
+        self.refresh_url = refresh_url
+
+
+@pytest.fixture
+def stub():
+    """The stub backend and sign-in service from api_stub.py, on an ephemeral port."""
+    from api_stub import serve
+
+    server = Stub(*serve())
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+
+@pytest.fixture
+def client(stub):
+    """APIClient for the stub with short backoff, so retries don't slow the tests down."""
+    from api_client import APIClient
+
+    api = APIClient(stub.api_url, backoff=0.01, max_backoff=0.05, name="test", sign_in_url=stub.sign_in_url)
+    yield api
+    api.close()
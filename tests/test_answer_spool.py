@@ -0,0 +1,78 @@
+import pytest
+
+from answer_spool import AnswerSpool
+from manager import ManagerAgent
+from token_manager import TokenManager
+
+
+@pytest.fixture
+def manager(stub, client, tmp_path):
+    spool = AnswerSpool(":memory:", retry_delay=0.05)
+    tokens = TokenManager(client, path=tmp_path / "token.json", refresh_url=stub.refresh_url)
+    manager = ManagerAgent(None, None, None, stub.api_url, 1, api_client=client, spool=spool, token_manager=tokens,
+                           reserve_conversations=False)
+    yield manager
+    spool.close()
+
+
+def test_answers_are_sent_once(stub, manager):
+    manager.spool.start(manager)
+    manager.create_conversation()
+    manager.submit_answer(1, "Prima")
+    manager.submit_answer(1, "Prima")
+    manager.submit_answer(2, "Meer bankjes")
+    manager.end_conversation()
+    assert manager.spool.flush(timeout=5)
+
+    assert sorted(answer["response"] for answer in stub.backend.answers.values()) == ["Meer bankjes", "Prima"]
+    (conversation,) = stub.backend.conversations.values()
+    assert conversation["endDatetime"] is not None
+
+
+def test_answers_survive_an_outage(stub, manager):
+    stub.backend.fail("POST", "/api/answers", 503, 503, 503, 503)
+    manager.spool.start(manager)
+    manager.create_conversation()
+    manager.submit_answer(1, "Prima")
+    manager.end_conversation()
+    assert manager.spool.flush(timeout=5)
+    assert len(stub.backend.answers) == 1
+
+
+def test_rejected_conversation_is_dropped_with_its_answers(stub, manager):
+    stub.backend.fail("POST", "/api/conversations", 400)
+    manager.create_conversation()
+    manager.submit_answer(1, "Prima")
+    manager.end_conversation()
+    manager.spool.backend = manager
+    manager.spool.drain_once()
+
+    assert manager.spool.pending() == 0
+    assert stub.backend.conversations == {}
+    assert stub.backend.answers == {}
+
+    # The next conversation is not held up by the rejected one
+    manager.create_conversation()
+    manager.submit_answer(1, "Goed")
+    manager.spool.drain_once()
+    assert [answer["response"] for answer in stub.backend.answers.values()] == ["Goed"]
+
+
+def test_claimed_reservation_sends_the_real_start_time(stub, manager):
+    manager.reserve_conversations = True
+    manager.spool.backend = manager
+    manager.reserve_conversation()
+    assert manager.spool.has_reservation(1)
+    manager.spool.drain_once()
+    (reserved_id,) = stub.backend.conversations
+
+    manager.create_conversation()
+    assert manager.conversation_id == reserved_id
+    # Claiming reserves the next conversation for the visitor after this one
+    assert manager.spool.has_reservation(1)
+    manager.spool.drain_once()
+
+    assert stub.backend.requests.count(("PUT", f"/api/conversations/{reserved_id}")) == 1
+    conversation = stub.backend.conversations[reserved_id]
+    assert conversation["startDatetime"] == manager.new_conversation["startDatetime"]
+    assert conversation["endDatetime"] is None
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+import requests
+
+from api_client import APIClient
+from rate_limit import RateLimitGate
+
+
+def test_get_is_retried_on_server_errors(stub, client):
+    stub.backend.fail("GET", "/api/questions", 503, 502)
+    response = client.get("questions")
+    assert response.status_code == 200
+    assert stub.backend.requests.count(("GET", "/api/questions")) == 3
+    assert client.errors["questions"] == 2
+
+
+def test_post_is_not_retried_on_500(stub, client):
+    stub.backend.fail("POST", "/api/answers", 500)
+    response = client.post("answers", json={"ConversationId": 1, "QuestionId": 1, "response": "Prima"})
+    assert response.status_code == 500
+    assert stub.backend.requests.count(("POST", "/api/answers")) == 1
+
+
+def test_post_is_retried_on_503(stub, client):
+    stub.backend.fail("POST", "/api/answers", 503)
+    response = client.post("answers", json={"ConversationId": 1, "QuestionId": 1, "response": "Prima"})
+    assert response.status_code == 201
+    assert stub.backend.requests.count(("POST", "/api/answers")) == 2
+
+
+def test_retry_after_is_honoured_beyond_max_backoff(stub, client):
+    stub.backend.fail("GET", "/api/questions", 429, retry_after=1)
+    started = time.monotonic()
+    assert client.get("questions").status_code == 200
+    assert time.monotonic() - started >= 1.0
+
+
+def test_max_retry_after_caps_the_servers_retry_after(stub):
+    client = APIClient(stub.api_url, backoff=0.01, max_retry_after=0.1)
+    stub.backend.fail("GET", "/api/questions", 503, retry_after=30)
+    started = time.monotonic()
+    assert client.get("questions").status_code == 200
+    assert time.monotonic() - started < 5.0
+    client.close()
+
+
+def test_429_pauses_the_gate(stub):
+    gate = RateLimitGate("test")
+    client = APIClient(stub.api_url, retries=0, gate=gate)
+    stub.backend.fail("GET", "/api/questions", 429, retry_after=2)
+    assert client.get("questions").status_code == 429
+    assert gate.remaining() > 1.0
+    client.close()
+
+
+def test_read_timeout_per_endpoint(stub):
+    client = APIClient(stub.api_url, retries=0, timeouts={"questions": (1.0, 0.1)})
+    stub.backend.delays["/api/questions/active"] = 0.5
+    with pytest.raises(requests.exceptions.Timeout):
+        client.get("questions/active")
+    # Other endpoints keep the default timeout
+    assert client.get("conversations").status_code == 200
+    client.close()
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("questions/active", "questions"),
+    ("/conversations/12", "conversations"),
+    ("answers/conversation/3?page=2", "answers"),
+    ("", "default"),
+    ("https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key=x", "accounts:signInWithPassword"),
+    ("https://securetoken.googleapis.com/v1/token", "token"),
+])
+def test_endpoint_name(path, expected):
+    assert APIClient("https://bench.example.com/api").endpoint_name(path) == expected
+
+
+def test_latency_is_recorded_per_endpoint(stub, client):
+    client.get("questions/active")
+    client.get("conversations/1")
+    assert client.latency["questions"].count == 1
+    assert client.latency["conversations"].count == 1
+    assert client.errors["conversations"] == 0
@@ -0,0 +1,19 @@
+import pytest
+
+from conversation_fakes import SCENARIOS, check_scenario, run_scripted
+
+
+@pytest.mark.parametrize("engine", [True, False], ids=["engine", "run"])
+@pytest.mark.parametrize("name, replies, verdicts, expected", SCENARIOS, ids=[scenario[0] for scenario in SCENARIOS])
+def test_scenario_submits_every_answer_once(name, replies, verdicts, expected, engine):
+    check_scenario(name, replies, verdicts, expected, engine)
+
+
+def test_engine_ends_after_goodbye():
+    manager = run_scripted(
+        replies=["Het is prima", "De bus is vaak te laat", "", "Wat is het weer morgen?", "Meer bankjes", "Tot ziens"],
+        verdicts=["Nee", "Ja", "Off", "Ja", "Einde"],
+    )
+    calls = [call[0] for call in manager.api_calls]
+    assert calls.count("create_conversation") == 1
+    assert calls[-1] == "end_conversation"
@@ -0,0 +1,85 @@
+import pytest
+
+from keyword_matcher import KeywordMatcher, stem
+from main import SSAgent
+
+
+@pytest.fixture
+def matcher(tmp_path):
+    return KeywordMatcher(path=tmp_path / "keywords.json")
+
+
+@pytest.mark.parametrize("word, expected", [
+    ("parkeerplaatsen", "parkeerplaats"),
+    ("parkeerplaats", "parkeerplaats"),
+    ("fietsen", "fiets"),
+    ("bussen", "bus"),
+    ("bruggen", "brug"),
+])
+def test_stem(word, expected):
+    assert stem(word) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    # The last part of a compound matches longer patterns
+    ("Het stadspark is mooi", {"Infrastructuur": ["park"]}),
+    ("De straatverlichting is kapot", {"Veiligheid": ["verlichting"]}),
+    # Plurals match the singular
+    ("Meer parkeerplaatsen bij het station", {"Openbaar Vervoer": ["parkeerplaats", "station"]}),
+    # A longer match hides the shorter one inside it
+    ("De bushalte", {"Openbaar Vervoer": ["bushalte"]}),
+    ("Ik voel me onveilig", {"Veiligheid": ["onveilig"]}),
+    # Negated keywords are skipped
+    ("Er is geen brand", {}),
+    ("Er zijn nooit parkeerplaatsen", {}),
+    ("Niet veilig, wel een mooi park", {"Infrastructuur": ["park"]}),
+    # Short patterns only match whole words, and a pattern isn't found at the start of a longer word
+    ("Een autobus", {}),
+    ("Ik ga parkeren", {"Openbaar Vervoer": ["parkeren"]}),
+])
+def test_match(matcher, text, expected):
+    assert matcher.match(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Het park", (True, ["park"])),
+    ("Meer parkeerplaatsen bij het station", (True, ["parkeerplaats", "station"])),
+    ("Geen idee", (True, None)),
+    # Keywords found, but most of the answer is about something else: the LLM decides
+    ("Het stadspark is mooi", (False, None)),
+    ("Ik vind de bus prima maar mijn buurman klaagt altijd over de lange wachttijden", (False, None)),
+    ("Er is geen brand", (False, None)),
+])
+def test_extract(matcher, text, expected):
+    assert matcher.extract(text) == expected
+
+
+def test_extract_uses_remembered_llm_keywords(matcher):
+    text = "Het stadspark is mooi"
+    matcher.remember(text, ["park", "groen"])
+    assert matcher.extract(text) == (True, ["park", "groen"])
+    assert matcher.hits["cache"] == 1
+
+
+def test_uncovered_answers_fall_back_to_the_llm(matcher):
+    agent = SSAgent.__new__(SSAgent)
+    agent.keyword_matcher = matcher
+    sent_to_llm = []
+    saved = {}
+
+    def extract_keywords_batch(responses):
+        sent_to_llm.extend(responses)
+        return [["park", "groen"] for _ in responses]
+
+    agent.extract_keywords_batch = extract_keywords_batch
+    agent.update_answer_with_keywords = lambda answer, keywords: saved.update({answer["id"]: keywords})
+
+    answers = [
+        {"id": 1, "response": "Meer parkeerplaatsen bij het station"},
+        {"id": 2, "response": "Het stadspark is mooi"},
+    ]
+    assert agent.tag_answers(answers)
+    assert sent_to_llm == ["Het stadspark is mooi"]
+    assert saved == {1: ["parkeerplaats", "station"], 2: ["park", "groen"]}
+    # The LLM's keywords are cached for the next time the answer comes up
+    assert matcher.extract("Het stadspark is mooi") == (True, ["park", "groen"])
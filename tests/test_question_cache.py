@@ -0,0 +1,73 @@
+import time
+
+from api_stub import QUESTIONS
+from question_cache import QuestionCache
+
+ACTIVE = [question for question in QUESTIONS if question["active"]]
+
+
+def record_statuses(client, monkeypatch):
+    statuses = []
+    get = client.get
+
+    def recording_get(path, **kwargs):
+        response = get(path, **kwargs)
+        statuses.append(response.status_code)
+        return response
+
+    monkeypatch.setattr(client, "get", recording_get)
+    return statuses
+
+
+def test_revalidation_uses_the_etag(stub, client, tmp_path, monkeypatch):
+    statuses = record_statuses(client, monkeypatch)
+    cache = QuestionCache(client, "questions/active", path=tmp_path / "questions.json")
+    assert cache.get() == ACTIVE
+    assert cache.etag is not None
+
+    assert cache.revalidate() is False
+    assert statuses == [200, 304]
+    assert cache.questions == ACTIVE
+
+
+def test_cached_list_is_used_after_a_restart(stub, client, tmp_path):
+    path = tmp_path / "questions.json"
+    QuestionCache(client, "questions/active", path=path).get()
+    requests = len(stub.backend.requests)
+
+    cache = QuestionCache(client, "questions/active", path=path)
+    assert cache.fresh
+    assert cache.get() == ACTIVE
+    assert len(stub.backend.requests) == requests
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_stale_list_is_returned_and_updated_in_the_background(stub, client, tmp_path):
+    cache = QuestionCache(client, "questions/active", ttl=0, path=tmp_path / "questions.json")
+    cache.get()
+    stub.backend.questions.append({"id": 4, "text": "Hoe kom je hier meestal?", "active": True})
+    stub.backend.delay = 0.2
+
+    # The stale list comes back right away; the new one arrives afterwards
+    started = time.monotonic()
+    assert cache.get() == ACTIVE
+    assert time.monotonic() - started < 0.2
+    assert wait_for(lambda: len(cache.questions) == 3)
+    assert cache.get_by_id(4)["text"] == "Hoe kom je hier meestal?"
+
+
+def test_failed_revalidation_keeps_the_cached_list(stub, client, tmp_path):
+    cache = QuestionCache(client, "questions/active", ttl=0, path=tmp_path / "questions.json")
+    cache.get()
+    stub.backend.fail("GET", "/api/questions/active", 500, 500, 500)
+
+    assert cache.get() == ACTIVE
+    assert wait_for(lambda: not cache._revalidating)
+    assert cache.questions == ACTIVE
+    assert stub.backend.requests.count(("GET", "/api/questions/active")) == 4
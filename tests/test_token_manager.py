@@ -0,0 +1,43 @@
+import stat
+
+from token_manager import TokenManager
+
+
+def test_token_is_cached_on_disk(stub, client, tmp_path):
+    path = tmp_path / "token.json"
+    token = TokenManager(client, path=path, refresh_url=stub.refresh_url).token()
+    assert stub.backend.sign_ins == 1
+
+    # A new run reuses the stored token instead of signing in again
+    assert TokenManager(client, path=path, refresh_url=stub.refresh_url).token() == token
+    assert stub.backend.sign_ins == 1
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+
+
+def test_token_is_refreshed_before_it_expires(stub, client, tmp_path):
+    stub.backend.token_lifetime = 60
+    tokens = TokenManager(client, path=tmp_path / "token.json", refresh_margin=120, refresh_url=stub.refresh_url)
+    first = tokens.token()
+    second = tokens.token()
+    assert second != first
+    assert stub.backend.sign_ins == 1
+    assert stub.backend.refreshes == 1
+
+
+def test_invalid_refresh_token_falls_back_to_sign_in(stub, client, tmp_path):
+    tokens = TokenManager(client, path=tmp_path / "token.json", refresh_url=stub.refresh_url)
+    tokens.token()
+    tokens.refresh_token = "revoked"
+    tokens.expires_at = 0
+    tokens._save()
+    tokens.token()
+    assert stub.backend.refreshes == 0
+    assert stub.backend.sign_ins == 2
+
+
+def test_rejected_token_is_renewed(stub, client, tmp_path):
+    tokens = TokenManager(client, path=tmp_path / "token.json", refresh_url=stub.refresh_url)
+    first = tokens.token()
+    tokens.invalidate()
+    assert tokens.token() != first
+    assert stub.backend.refreshes == 1
@@ -0,0 +1,179 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from paths import cache_path
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads in this process are coordinated
+    fcntl = None
+
+REFRESH_URL = os.environ.get("TOKEN_REFRESH_URL", "https://securetoken.googleapis.com/v1/token")
+
+
+class TokenManager:
+    def __init__(self, api, email: str = None, password: str = None, api_key: str = None,
+                 path: Optional[Path] = None, refresh_margin: float = 300.0, refresh_url: str = REFRESH_URL):
+        """
+        Firebase ID token that is cached on disk and refreshed before it expires.
+
+        The ID token, refresh token and expiry are stored in a file only the
+        owner can read (0600), so a new run reuses the token instead of signing
+        in again. When the token is about to expire it is exchanged through the
+        refresh token endpoint, in a background thread once start() is called;
+        signing in with the password is only the fallback. One instance is safe
+        to share between threads, and processes that use the same file take a
+        file lock and pick up each other's refreshed token.
+
+        Args:
+            api: APIClient used for the sign-in and refresh calls
+            email: Account e-mail (defaults to BENCH_EMAIL)
+            password: Account password (defaults to BENCH_PASSWORD)
+            api_key: Firebase web API key (defaults to API_KEY)
+            path: Token file (defaults to firebase_token.json in the bench cache)
+            refresh_margin: Seconds before expiry at which the token is refreshed
+            refresh_url: Secure token endpoint
+        """
+        self.api = api
+        self.email = email or os.environ.get("BENCH_EMAIL", "john.doe@example.com")
+        self.password = password or os.environ.get("BENCH_PASSWORD", "hashedpassword1")
+        self.api_key = api_key or os.environ.get("API_KEY")
+        self.path = Path(path) if path is not None else cache_path("auth") / "firebase_token.json"
+        self.refresh_margin = refresh_margin
+        self.refresh_url = refresh_url
+
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.id_token = None
+        self.refresh_token = None
+        self.expires_at = 0.0
+        self._rejected = None
+        self._load()
+
+    # Storage
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        if data.get("email") != self.email:
+            return
+        self.id_token = data.get("id_token")
+        self.refresh_token = data.get("refresh_token")
+        self.expires_at = float(data.get("expires_at", 0))
+
+    def _save(self) -> None:
+        data = {
+            "email": self.email,
+            "id_token": self.id_token,
+            "refresh_token": self.refresh_token,
+            "expires_at": self.expires_at,
+        }
+        temp = self.path.with_suffix(".tmp")
+        fd = os.open(str(temp), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.chmod(str(temp), 0o600)
+        os.replace(str(temp), str(self.path))
+
+    def _file_lock(self):
+        """Exclusive lock shared with other processes using the same token file."""
+        lock_file = open(str(self.path.with_suffix(".lock")), "a")
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    # Token calls
+
+    def _sign_in(self) -> None:
+        payload = {"email": self.email, "password": self.password, "returnSecureToken": True}
+        response = self.api.post(f"{self.api.sign_in_url}?key={self.api_key}", endpoint="token", json=payload)
+        token = response.json()
+        if "idToken" not in token:
+            raise Exception(f"Failed to sign in: {token}")
+        self._store(token["idToken"], token.get("refreshToken"), token.get("expiresIn", 3600))
+        print("Signed in, new bearer token fetched.")
+
+    def _refresh(self) -> None:
+        response = self.api.post(
+            f"{self.refresh_url}?key={self.api_key}", endpoint="token",
+            data={"grant_type": "refresh_token", "refresh_token": self.refresh_token},
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        token = response.json()
+        if "id_token" not in token:
+            raise Exception(f"Failed to refresh token: {token}")
+        self._store(token["id_token"], token.get("refresh_token", self.refresh_token), token.get("expires_in", 3600))
+        print("Bearer token refreshed.")
+
+    def _store(self, id_token: str, refresh_token: str, expires_in) -> None:
+        self.id_token = id_token
+        self.refresh_token = refresh_token
+        self.expires_at = time.time() + float(expires_in)
+        self._save()
+
+    def _fresh(self) -> bool:
+        return (self.id_token is not None and self.id_token != self._rejected
+                and time.time() < self.expires_at - self.refresh_margin)
+
+    def _renew(self) -> None:
+        with self._lock:
+            lock_file = self._file_lock()
+            try:
+                # Another process may have refreshed the token in the meantime
+                self._load()
+                if self._fresh():
+                    return
+                if self.refresh_token:
+                    try:
+                        self._refresh()
+                        return
+                    except Exception as e:
+                        print(f"{e}; signing in again.")
+                self._sign_in()
+            finally:
+                lock_file.close()
+
+    # Public API
+
+    def token(self) -> str:
+        """Return a valid ID token, refreshing or signing in only when needed."""
+        with self._lock:
+            if not self._fresh():
+                self._renew()
+            return self.id_token
+
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": "Bearer " + self.token(), "Content-Type": "application/json"}
+
+    def invalidate(self) -> None:
+        """Forget the ID token after the backend rejected it; the next call renews it."""
+        with self._lock:
+            self._rejected = self.id_token
+        self._wake.set()
+
+    def _run(self) -> None:
+        while True:
+            delay = self.expires_at - self.refresh_margin - time.time()
+            if delay > 0:
+                self._wake.wait(delay)
+                self._wake.clear()
+                continue
+            try:
+                self._renew()
+            except Exception as e:
+                print(f"Error refreshing bearer token: {e}")
+                self._wake.wait(30)
+                self._wake.clear()
+
+    def start(self) -> None:
+        """Refresh the token in the background before it expires, so no call ever waits for it."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="token-refresh", daemon=True)
+            self._thread.start()
@@ -0,0 +1,90 @@
+"""
+Compare the text-to-speech agents on synthesis latency and real-time factor.
+
+Each phrase is synthesized without playing it and without the speech cache.
+Latency is the time until the audio is available; the real-time factor is
+latency divided by the duration of the produced audio.
+
+Usage:
+    python -m tts.benchmark --agent local --agent female --agent male
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+# Synthesis does not need a sound card
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from tts.speech_cache import SpeechCache
+
+PHRASES = [
+    "Hallo! Ik ben jouw vriendelijke stadfeedbackbank.",
+    "Wat vind je van het openbaar vervoer in de stad?",
+    "Bedankt voor het delen van je gedachten! Jouw feedback zal helpen om onze stad beter te maken.",
+    "Ik heb moeite met begrijpen. Kun je dat alstublieft herhalen?",
+]
+
+
+def load_agent(name, cache):
+    if name == "female":
+        from tts.tts_female import TTSAgent
+        return TTSAgent(cache=cache)
+    if name == "male":
+        from tts.tts_male import TTSAgent
+        return TTSAgent(cache=cache)
+    if name == "local":
+        from tts.tts_local import TTSAgent
+        return TTSAgent(cache=cache)
+    raise ValueError(f"Unknown TTS agent '{name}'")
+
+
+def benchmark_agent(name, phrases):
+    """
+    Synthesize every phrase with one agent.
+
+    :return: Dict with median latency and real-time factor.
+    """
+    with tempfile.TemporaryDirectory() as cache_dir:
+        agent = load_agent(name, SpeechCache(cache_dir))
+        latencies = []
+        factors = []
+        for text in phrases:
+            started = time.perf_counter()
+            pcm, sample_rate, channels, sample_width = agent.render(text)
+            duration = len(pcm) / (sample_rate * channels * sample_width)
+            elapsed = time.perf_counter() - started
+            latencies.append(elapsed)
+            factors.append(elapsed / duration if duration else float("inf"))
+        if hasattr(agent, "close"):
+            agent.close()
+
+    return {
+        "agent": name,
+        "latency": statistics.median(latencies),
+        "rtf": statistics.median(factors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TTS agents.")
+    parser.add_argument("--agent", action="append", dest="agents", choices=["local", "female", "male"],
+                        help="Agent to test (default: all)")
+    parser.add_argument("--phrase", action="append", dest="phrases", help="Phrase to synthesize")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.agents or ["local", "female", "male"]:
+        try:
+            results.append(benchmark_agent(name, args.phrases or PHRASES))
+        except Exception as e:
+            print(f"Error benchmarking {name}: {e}")
+
+    print(f"\n{'agent':<10}{'latency (s)':>14}{'RTF':>10}")
+    for result in results:
+        print(f"{result['agent']:<10}{result['latency']:>14.3f}{result['rtf']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
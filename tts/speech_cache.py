@@ -0,0 +1,98 @@
+import hashlib
+import os
+import threading
+import wave
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from paths import cache_path
+
+
+def write_wav(path, pcm: bytes, sample_rate: int, channels: int = 1, sample_width: int = 2) -> None:
+    """Write decoded PCM audio to a WAV file."""
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+
+
+class SpeechCache:
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 200 * 1024 * 1024):
+        """
+        Content-addressed on-disk cache of synthesized speech as decoded PCM WAV files.
+
+        Entries are keyed by text, voice and language and evicted least recently
+        used first once the cache grows beyond max_bytes. File modification
+        times record use, so the LRU order survives restarts.
+
+        :param directory: Where to store the audio. Defaults to the bench cache.
+        :param max_bytes: Maximum total size of the cached audio.
+        """
+        self.directory = Path(directory) if directory else cache_path("tts")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+
+        for path in sorted(self.directory.glob("*.wav"), key=lambda p: p.stat().st_mtime):
+            size = path.stat().st_size
+            self._entries[path.stem] = size
+            self._size += size
+
+    @staticmethod
+    def key(text: str, voice: str, language: str) -> str:
+        """Return the cache key for a phrase spoken with a given voice and language."""
+        return hashlib.sha256(f"{voice}\0{language}\0{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.wav"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Return the WAV file for a key, or None on a cache miss."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            path = self._path(key)
+            if not path.exists():
+                self._size -= self._entries.pop(key)
+                return None
+            self._entries.move_to_end(key)
+        os.utime(path)
+        return path
+
+    def put(self, key: str, pcm: bytes, sample_rate: int, channels: int = 1, sample_width: int = 2) -> Path:
+        """
+        Store decoded PCM audio under a key.
+
+        :param key: Cache key from SpeechCache.key().
+        :param pcm: Interleaved little-endian PCM samples.
+        :param sample_rate: Sample rate of the audio in Hz.
+        :param channels: Number of channels.
+        :param sample_width: Bytes per sample.
+        :return: Path of the cached WAV file.
+        """
+        path = self._path(key)
+        temp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        write_wav(temp_path, pcm, sample_rate, channels, sample_width)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._size -= self._entries.pop(key, 0)
+            size = path.stat().st_size
+            self._entries[key] = size
+            self._size += size
+            self._evict()
+        return path
+
+    def _evict(self) -> None:
+        # Always keep the entry that was just added
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
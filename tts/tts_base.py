@@ -0,0 +1,190 @@
+import abc
+import os
+import pygame
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+
+from tts.speech_cache import SpeechCache, write_wav
+
+class BaseTTSAgent(abc.ABC):
+    voice = "base"
+
+    def __init__(self, language="nl", cache=None, prefetch_workers=4, mixer_frequency=24000):
+        """
+        Shared playback, caching and prefetching for text-to-speech engines.
+
+        Subclasses only implement render(), which turns text into PCM audio.
+        The pygame mixer is initialized once for the life of the agent, and
+        rendered phrases are kept in a cache of decoded audio so repeated
+        phrases play without synthesizing them again.
+
+        :param language: The default language for text-to-speech. Defaults to 'nl' (Dutch).
+        :param cache: SpeechCache to use. Defaults to the on-disk bench cache.
+        :param prefetch_workers: Number of phrases synthesized in parallel by prefetch().
+        :param mixer_frequency: Playback sample rate; cached audio is resampled to it by pygame.
+        """
+        self.default_language = language
+        self.cache = cache if cache is not None else SpeechCache()
+
+        pygame.mixer.init(frequency=mixer_frequency, size=-16, channels=1)
+        self.clock = pygame.time.Clock()
+
+        # Called when audio starts playing, e.g. to measure time to first word
+        self.on_play = None
+
+        self._pending = {}
+        self._executor = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix="tts-prefetch")
+
+    @abc.abstractmethod
+    def render(self, text):
+        """
+        Synthesize text without playing it.
+
+        :param text: The text to convert to speech.
+        :return: Tuple of (pcm bytes, sample rate, channels, sample width in bytes).
+        """
+
+    def synthesize(self, text):
+        """
+        Return a cached WAV file for the text, rendering it on a cache miss.
+
+        :param text: The text to convert to speech.
+        :return: Path of the WAV file.
+        """
+        key = self.cache.key(text, self.voice, self.default_language)
+        path = self.cache.get(key)
+        if path is not None:
+            return path
+        return self.cache.put(key, *self.render(text))
+
+    def synthesize_once(self, text):
+        """
+        Return a WAV file for text that is only spoken once, without adding it to the cache.
+
+        Generated replies are rarely repeated, so caching them would only evict
+        the scripted lines; a phrase that is already cached is still reused.
+
+        :param text: The text to convert to speech.
+        :return: Tuple of (path of the WAV file, whether it is a temporary file the caller removes).
+        """
+        path = self.cache.get(self.cache.key(text, self.voice, self.default_language))
+        if path is not None:
+            return path, False
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
+            temp_filename = temp_file.name
+        try:
+            write_wav(temp_filename, *self.render(text))
+        except BaseException:
+            os.remove(temp_filename)
+            raise
+        return temp_filename, True
+
+    @staticmethod
+    def _discard(path, temporary):
+        if temporary and os.path.exists(path):
+            os.remove(path)
+
+    def prefetch(self, texts):
+        """
+        Synthesize phrases into the cache in the background.
+
+        :param texts: The phrases that are going to be spoken.
+        :return: List of futures, one per phrase.
+        """
+        futures = []
+        for text in dict.fromkeys(texts):
+            future = self._pending.get(text)
+            if future is None:
+                future = self._executor.submit(self.synthesize, text)
+                self._pending[text] = future
+                future.add_done_callback(lambda f, text=text: self._prefetch_done(text, f))
+            futures.append(future)
+        return futures
+
+    def _prefetch_done(self, text, future):
+        self._pending.pop(text, None)
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Error pre-synthesizing speech: {future.exception()}")
+
+    def play(self, path):
+        """
+        Play a WAV file synchronously.
+
+        :param path: The audio file to play.
+        """
+        channel = pygame.mixer.Sound(str(path)).play()
+        if self.on_play is not None:
+            self.on_play()
+
+        # Wait for the audio to finish playing
+        while channel is not None and channel.get_busy():
+            self.clock.tick(50)
+
+    def text_to_speech(self, text):
+        """
+        Convert text to speech and play synchronously.
+
+        :param text: The text to convert to speech.
+        """
+        # Wait for a background synthesis of the same phrase instead of starting another
+        future = self._pending.get(text)
+        if future is not None and not future.cancelled() and future.exception() is None:
+            path = future.result()
+        else:
+            path = self.synthesize(text)
+        self.play(path)
+
+    def speak_stream(self, sentences):
+        """
+        Speak sentences as they arrive, synthesizing the next one while the current one plays.
+
+        Streamed sentences are not added to the speech cache (see synthesize_once).
+        When playback fails the producer is told to stop and its queue is drained,
+        so it never blocks on a full queue.
+
+        :param sentences: Iterable of sentences, e.g. from llm_dutch.stream_sentences.
+        :return: The full text that was spoken.
+        """
+        spoken = []
+        ready = Queue(maxsize=2)
+        stop = threading.Event()
+
+        def produce():
+            try:
+                for sentence in sentences:
+                    if stop.is_set():
+                        break
+                    spoken.append(sentence)
+                    ready.put(self.synthesize_once(sentence))
+            except Exception as e:
+                print(f"Error synthesizing streamed speech: {e}")
+            finally:
+                ready.put(None)
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        finished = False
+        try:
+            while True:
+                item = ready.get()
+                if item is None:
+                    finished = True
+                    break
+                try:
+                    self.play(item[0])
+                finally:
+                    self._discard(*item)
+        finally:
+            if not finished:
+                stop.set()
+                while (item := ready.get()) is not None:
+                    self._discard(*item)
+            producer.join()
+        return " ".join(spoken)
+
+    def close(self):
+        """Release the audio device and stop background synthesis."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        pygame.mixer.quit()
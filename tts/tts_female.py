@@ -1,24 +1,32 @@
 from gtts import gTTS
 import pygame
 import tempfile
+import threading
 import os
 
-class TTSAgent():
+from tts.tts_base import BaseTTSAgent
 
-    def __init__(self, language="nl"):
+class TTSAgent(BaseTTSAgent):
+    voice = "gtts"
+
+    def __init__(self, language="nl", cache=None, prefetch_workers=4):
         """
         Initialize the TTSAgent with a default language.
-        
+
         :param language: The default language for text-to-speech. Defaults to 'nl' (Dutch).
+        :param cache: SpeechCache to use. Defaults to the on-disk bench cache.
+        :param prefetch_workers: Number of phrases synthesized in parallel by prefetch().
         """
-        self.default_language = language
-        
-    def text_to_speech(self, text):
+        # gTTS produces 24 kHz mono audio
+        super().__init__(language, cache, prefetch_workers, mixer_frequency=24000)
+        self._decode_lock = threading.Lock()
+
+    def render(self, text):
         """
-        Convert text to speech and play synchronously using gTTS and pygame.
+        Synthesize text with the gTTS service and decode it to PCM.
 
         :param text: The text to convert to speech.
-        :param language: The language for the speech. Defaults to 'nl' (Dutch).
+        :return: Tuple of (pcm bytes, sample rate, channels, sample width in bytes).
         """
         # Create a temporary file for the audio
         with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
@@ -29,19 +37,13 @@ class TTSAgent():
             tts = gTTS(text=text, lang=self.default_language, slow=False)
             tts.save(temp_filename)
 
-            # Initialize pygame mixer and play the audio
-            pygame.mixer.init()
-            pygame.mixer.music.load(temp_filename)
-            pygame.mixer.music.play()
-
-            # Wait for the audio to finish playing
-            while pygame.mixer.music.get_busy():
-                pygame.time.Clock().tick(10)
+            # Decode the MP3 to PCM in the mixer's format
+            with self._decode_lock:
+                sound = pygame.mixer.Sound(temp_filename)
+            frequency, size, channels = pygame.mixer.get_init()
+            return sound.get_raw(), frequency, channels, abs(size) // 8
 
         finally:
-            # Stop the mixer and clean up resources
-            pygame.mixer.quit()
-
             # Remove the temporary file
             if os.path.exists(temp_filename):
                 os.remove(temp_filename)
@@ -0,0 +1,72 @@
+import io
+import os
+import shutil
+import subprocess
+import wave
+
+from tts.tts_base import BaseTTSAgent
+
+class TTSAgent(BaseTTSAgent):
+
+    def __init__(self, language="nl", model_path=None, espeak_voice="nl", rate=150, cache=None,
+                 prefetch_workers=2):
+        """
+        Fully local Dutch text-to-speech that runs on a Linux CPU without network access.
+
+        Uses a Piper ONNX voice when a model is given (or PIPER_MODEL is set) and the
+        piper package is installed, and the espeak-ng command line tool otherwise.
+
+        :param language: The default language for text-to-speech. Defaults to 'nl' (Dutch).
+        :param model_path: Path to a Piper .onnx voice, e.g. nl_NL-mls-medium.onnx.
+        :param espeak_voice: espeak-ng voice used when Piper is not available.
+        :param rate: Speaking rate in words per minute for espeak-ng.
+        :param cache: SpeechCache to use. Defaults to the on-disk bench cache.
+        :param prefetch_workers: Number of phrases synthesized in parallel by prefetch().
+        """
+        model_path = model_path or os.environ.get("PIPER_MODEL")
+        self.piper_voice = None
+        self.espeak = None
+
+        if model_path:
+            from piper.voice import PiperVoice
+
+            self.piper_voice = PiperVoice.load(model_path)
+            self.voice = f"piper:{os.path.basename(model_path)}"
+            sample_rate = self.piper_voice.config.sample_rate
+        else:
+            self.espeak = shutil.which("espeak-ng") or shutil.which("espeak")
+            if self.espeak is None:
+                raise Exception("No local TTS engine found: install espeak-ng or provide a Piper model")
+            self.espeak_voice = espeak_voice
+            self.rate = rate
+            self.voice = f"espeak:{espeak_voice}:{rate}"
+            sample_rate = 22050
+
+        super().__init__(language, cache, prefetch_workers, mixer_frequency=sample_rate)
+
+    def render(self, text):
+        """
+        Synthesize text locally.
+
+        :param text: The text to convert to speech.
+        :return: Tuple of (pcm bytes, sample rate, channels, sample width in bytes).
+        """
+        if self.piper_voice is not None:
+            wav_bytes = io.BytesIO()
+            with wave.open(wav_bytes, "wb") as wav:
+                if hasattr(self.piper_voice, "synthesize_wav"):
+                    self.piper_voice.synthesize_wav(text, wav)
+                else:
+                    self.piper_voice.synthesize(text, wav)
+            wav_bytes.seek(0)
+        else:
+            result = subprocess.run(
+                [self.espeak, "-v", self.espeak_voice, "-s", str(self.rate), "--stdout", text],
+                capture_output=True,
+                check=True
+            )
+            wav_bytes = io.BytesIO(result.stdout)
+
+        with wave.open(wav_bytes, "rb") as wav:
+            return (wav.readframes(wav.getnframes()), wav.getframerate(),
+                    wav.getnchannels(), wav.getsampwidth())
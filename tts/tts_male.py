@@ -1,25 +1,88 @@
+import os
+import re
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
+import pygame
 import pyttsx3
 
-class TTSAgent():
-    def __init__(self):
+from tts.tts_base import BaseTTSAgent
+
+class TTSAgent(BaseTTSAgent):
+    def __init__(self, voice=None, rate=150, volume=1.0, driver_name=None, language="nl", cache=None,
+                 prefetch_workers=1):
         """
-        Initialize the TTSAgent with a default language.
-        
+        Initialize the TTSAgent with a Dutch system voice.
+
+        Speech is rendered to a file with pyttsx3 and played, cached and
+        prefetched by BaseTTSAgent, so scripted lines are synthesized once.
+        pyttsx3 engines are not thread-safe (and the macOS nsss driver wants a
+        single thread), so the engine is created and only ever used on one
+        dedicated thread; render() hands its work to that thread.
+
+        :param voice: Voice id. Defaults to Xander on macOS and the first Dutch voice elsewhere.
+        :param rate: Speed of speech in words per minute.
+        :param volume: Volume level (0.0 to 1.0).
+        :param driver_name: pyttsx3 driver. Defaults to 'nsss' on macOS and pyttsx3's platform default elsewhere.
         :param language: The default language for text-to-speech. Defaults to 'nl' (Dutch).
+        :param cache: SpeechCache to use. Defaults to the on-disk bench cache.
+        :param prefetch_workers: Number of phrases queued for rendering in parallel by prefetch().
         """
-        self.engine = pyttsx3.init(driverName='nsss')
-    
+        if driver_name is None and sys.platform == "darwin":
+            driver_name = 'nsss'
+        self._engine_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pyttsx3")
+        self.engine = self._engine_thread.submit(self._init_engine, voice, rate, volume, driver_name).result()
+        # Everything that changes the rendered audio is part of the cache key
+        self.voice = f"pyttsx3:{self.engine.getProperty('voice')}:{rate}:{volume}"
+
+        super().__init__(language, cache, prefetch_workers, mixer_frequency=22050)
+
+    def _init_engine(self, voice, rate, volume, driver_name):
+        engine = pyttsx3.init(driverName=driver_name)
+        if voice is None:
+            voice = self._find_dutch_voice(engine)
+        if voice is not None:
+            engine.setProperty('voice', voice)
+        engine.setProperty('rate', rate) # Speed of speech
+        engine.setProperty('volume', volume) # Volume level (0.0 to 1.0)
+        return engine
 
-    def text_to_speech(self, text):
+    @staticmethod
+    def _find_dutch_voice(engine):
+        if sys.platform == "darwin":
+            return 'com.apple.voice.compact.nl-NL.Xander'
+        for voice in engine.getProperty('voices'):
+            languages = [str(language).lower() for language in (voice.languages or [])]
+            if re.search(r"(^|[/_.-])nl([/_.-]|$)", voice.id.lower()) or any("nl" in language for language in languages):
+                return voice.id
+        return None
+
+    def _save(self, text, filename):
+        self.engine.save_to_file(text, filename)
+        self.engine.runAndWait()
+
+    def render(self, text):
         """
-        Convert text to speech and play synchronously using pyttsx3.
+        Synthesize text with the system voice and decode it to PCM.
 
         :param text: The text to convert to speech.
+        :return: Tuple of (pcm bytes, sample rate, channels, sample width in bytes).
         """
-        self.engine.setProperty('voice', 'com.apple.voice.compact.nl-NL.Xander')
-        self.engine.setProperty('rate', 150) # Speed of speech
-        self.engine.setProperty('volume', 1) # Volume level (0.0 to 1.0)
-        self.engine.say(text)
-        self.engine.runAndWait()
+        # The nsss driver writes AIFF and the others WAV; pygame decodes both
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.aiff' if sys.platform == "darwin" else '.wav') as temp_file:
+            temp_filename = temp_file.name
+
+        try:
+            self._engine_thread.submit(self._save, text, temp_filename).result()
+            sound = pygame.mixer.Sound(temp_filename)
+            frequency, size, channels = pygame.mixer.get_init()
+            return sound.get_raw(), frequency, channels, abs(size) // 8
+        finally:
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
 
+    def close(self):
+        """Release the audio device, background synthesis and the speech engine."""
+        super().close()
+        self._engine_thread.shutdown(wait=False)
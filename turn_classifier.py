@@ -0,0 +1,120 @@
+import os
+import re
+from typing import Optional, Tuple
+
+from conversation_flow import VERDICTS
+from word_lists import NON_ANSWERS, SHORT_ANSWERS, STOPWORDS
+
+# Explicit goodbyes: on their own they mean the visitor wants to stop
+END_PATTERNS = [
+    r"tot ziens", r"doei", r"dag dag", r"daag", r"houdoe",
+    r"(ik )?wil (graag )?stoppen", r"ik stop( ermee)?",
+    r"(ik )?wil( het gesprek)? (beëindigen|afsluiten)",
+]
+END_RE = re.compile(r"\b(" + "|".join(END_PATTERNS) + r")\b")
+# Only goodbyes, e.g. "doei tot ziens"
+END_ONLY_RE = re.compile(r"(" + "|".join(END_PATTERNS) + r")( (" + "|".join(END_PATTERNS) + r"))*")
+
+# Phrases that may mean stop but are also ordinary answers ("dat was het", "het einde van de straat");
+# never confident enough to end the conversation without the LLM
+MAYBE_END_PATTERNS = [
+    r"stop(pen)?( maar)?", r"einde", r"laat maar", r"geen (vragen|zin|tijd) meer",
+    r"ik (moet|ga) (nu )?(gaan|weg|verder)", r"dat was (het|alles)", r"ik wil niet meer",
+]
+MAYBE_END_RE = re.compile(r"\b(" + "|".join(MAYBE_END_PATTERNS) + r")\b")
+
+
+def _words(text: str):
+    return re.sub(r"[^\w\s]", " ", (text or "").lower()).split()
+
+
+class TurnClassifier:
+    def __init__(self, model_path: Optional[str] = None, threshold: float = 0.85,
+                 complete_min_words: int = 12):
+        """
+        Local Ja/Nee/Off/Einde classifier that runs on CPU in milliseconds.
+
+        A keyword cascade catches the obvious cases: a goodbye that is the whole
+        answer is 'Einde' and a bare non-answer is 'Nee'. Its other guesses
+        (long answers are 'Ja', short ones 'Nee') stay below the threshold, so
+        the remote evaluator decides them. When a fine-tuned Dutch sequence
+        classification model is configured (model_path or TURN_CLASSIFIER_MODEL)
+        it handles everything the rules don't. Results below the threshold
+        should be escalated to the remote evaluator.
+
+        Args:
+            model_path: Path or hub id of a transformers model with Ja/Nee/Off/Einde labels
+            threshold: Minimum confidence for a local decision to be trusted
+            complete_min_words: Minimum answer length the rules accept as complete
+        """
+        self.model_path = model_path or os.environ.get("TURN_CLASSIFIER_MODEL")
+        self.threshold = threshold
+        self.complete_min_words = complete_min_words
+        self._pipeline = None
+
+    def _load_model(self):
+        if self._pipeline is None and self.model_path:
+            from transformers import pipeline
+
+            self._pipeline = pipeline("text-classification", model=self.model_path, device=-1)
+        return self._pipeline
+
+    def classify_rules(self, user_message: str, current_question: str = None) -> Tuple[str, float]:
+        """Apply the keyword cascade; returns (verdict, confidence)."""
+        words = _words(user_message)
+        text = " ".join(words)
+        if not words:
+            return "Nee", 0.5
+
+        match = END_RE.search(text)
+        if match:
+            # A goodbye on its own is unambiguous; inside a longer answer it may mean something else
+            return "Einde", 0.95 if END_ONLY_RE.fullmatch(text) else 0.6
+        match = MAYBE_END_RE.search(text)
+        if match and len(match.group(0)) >= len(text) / 2:
+            return "Einde", 0.6
+
+        if text in NON_ANSWERS:
+            return "Nee", 0.9
+        if text in SHORT_ANSWERS:
+            return "Nee", 0.6
+        if text in ("ja", "nee"):
+            # Depends on whether the question was open or a yes/no follow-up
+            return "Nee", 0.6
+
+        question_words = {word for word in _words(current_question) if word not in STOPWORDS and len(word) > 3}
+        overlap = any(word[:5] == question_word[:5] for word in words for question_word in question_words)
+        # Long answers on the question's topic are probably complete, but may still hedge
+        if len(words) >= self.complete_min_words and overlap:
+            return "Ja", 0.7
+        if len(words) >= self.complete_min_words:
+            return "Ja", 0.6
+        return "Nee", 0.4
+
+    def classify(self, user_message: str, current_question: str = None) -> Tuple[str, float]:
+        """
+        Classify a user turn.
+
+        Args:
+            user_message: What the user said
+            current_question: The question being answered
+
+        Returns:
+            Tuple[str, float]: The verdict and a confidence between 0 and 1
+        """
+        verdict, confidence = self.classify_rules(user_message, current_question)
+        if confidence >= self.threshold:
+            return verdict, confidence
+
+        model = self._load_model()
+        if model is not None:
+            prediction = model({"text": current_question or "", "text_pair": user_message})
+            if isinstance(prediction, list):
+                prediction = prediction[0]
+            label = prediction["label"].capitalize()
+            if label in VERDICTS and prediction["score"] > confidence:
+                return label, float(prediction["score"])
+        return verdict, confidence
+
+    def is_confident(self, confidence: float) -> bool:
+        return confidence >= self.threshold
@@ -0,0 +1,16 @@
+# Dutch word lists shared by the bench-side TurnClassifier and the cloud-side KeywordMatcher
+
+# Answers that carry no feedback and call for a follow-up question
+NON_ANSWERS = {
+    "weet ik niet", "ik weet het niet", "geen idee", "geen mening", "hmm", "uhm", "eh", "euh",
+}
+
+# Short answers that may still be a real answer ("goed" to "hoe vind je het park?"); left to the LLM
+SHORT_ANSWERS = {"misschien", "oké", "oke", "ok", "goed", "prima", "wat"}
+
+STOPWORDS = {
+    "de", "het", "een", "en", "of", "van", "in", "op", "te", "je", "jij", "jouw", "ik", "mijn",
+    "wat", "wie", "hoe", "waar", "welke", "is", "zijn", "was", "vind", "vindt", "over", "voor",
+    "met", "aan", "er", "dat", "die", "dit", "deze", "niet", "wel", "heel", "erg", "zou", "kan",
+    "stad", "meer", "ook", "nog", "al", "als", "maar", "om", "bij", "naar",
+}
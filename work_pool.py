@@ -0,0 +1,77 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, List
+
+from rate_limit import is_rate_limited, retry_after
+
+
+class WorkPool:
+    def __init__(self, workers: int = 8, attempts: int = 4, name: str = "pool"):
+        """
+        Bounded thread pool for the cloud analysis calls (Groq and the backend).
+
+        At most `workers` calls run at the same time. A task that fails with a
+        429 is run again after the Retry-After, up to `attempts` times; the
+        gates in ModelRouter and APIClient hold back the other workers in the
+        meantime. Counts and throughput are printed by report().
+
+        Args:
+            workers: Calls in flight at the same time
+            attempts: Tries per task when it is rate limited
+            name: Label printed in the report
+        """
+        self.workers = workers
+        self.attempts = attempts
+        self.name = name
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.done = 0
+        self.failed = 0
+        self.retried = 0
+        self.started = None
+        self.finished = None
+
+    def _run(self, fn: Callable, args: tuple):
+        for attempt in range(self.attempts):
+            try:
+                result = fn(*args)
+                break
+            except Exception as e:
+                if not is_rate_limited(e) or attempt == self.attempts - 1:
+                    with self._lock:
+                        self.failed += 1
+                        self.finished = time.perf_counter()
+                    print(f"[{self.name}] {getattr(fn, '__name__', 'task')} failed: {e}")
+                    raise
+                with self._lock:
+                    self.retried += 1
+                time.sleep(retry_after(e))
+        with self._lock:
+            self.done += 1
+            self.finished = time.perf_counter()
+        return result
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """Queue fn(*args); the future holds its result or exception."""
+        with self._lock:
+            if self.started is None:
+                self.started = time.perf_counter()
+        return self.executor.submit(self._run, fn, args)
+
+    @staticmethod
+    def succeeded(futures: List[Future]) -> bool:
+        """Wait for the futures; True when none raised or returned False."""
+        wait(futures)
+        return all(future.exception() is None and future.result() is not False for future in futures)
+
+    def report(self) -> None:
+        """Print completed and failed tasks and the throughput."""
+        if self.started is None:
+            return
+        elapsed = max((self.finished or time.perf_counter()) - self.started, 1e-9)
+        print(f"\n[{self.name}] {self.done} tasks done, {self.failed} failed, {self.retried} retried after 429 "
+              f"in {elapsed:.1f}s with {self.workers} workers: {self.done / elapsed:.1f} tasks/s")
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True)